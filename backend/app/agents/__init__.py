@@ -6,9 +6,10 @@
 #
 # Legacy copy_supervisor.py is deprecated - all routing is now dynamic.
 
-from app.agents.supervisor import agent_graph, run_agent
+from app.agents.supervisor import agent_graph, run_agent, run_agent_stream
 
 __all__ = [
     "agent_graph",
     "run_agent",
+    "run_agent_stream",
 ]
@@ -4,6 +4,7 @@ Defines the state schema that flows through the graph.
 """
 
 from typing import Annotated, Literal, TypedDict
+from uuid import UUID
 
 from langgraph.graph.message import add_messages
 
@@ -34,19 +35,23 @@ class AgentState(TypedDict):
         current_agent: Which agent is currently handling the request
         organization_id: Multi-tenant organization context
         user_id: The user making the request
+        store_id: Optional store context for RAG
         iteration_count: Safety counter to prevent infinite loops
         final_response: The consolidated response to return
         rag_context: Retrieved context from knowledge base
         agent_config: Configuration from database (set by admin)
+        sub_agents: Pre-fetched active sub-agents (None = not loaded)
     """
     messages: Annotated[list, add_messages]
     current_agent: str
-    organization_id: str | None
+    organization_id: UUID | None
     user_id: str | None
+    store_id: UUID | None
     iteration_count: int
     final_response: str | None
     rag_context: str | None
     agent_config: AgentConfig | None
+    sub_agents: list[dict] | None
 
 
 # Agent routing options
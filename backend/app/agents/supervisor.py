@@ -3,12 +3,32 @@ Dynamic Agent System - All agents are loaded from database.
 No hardcoded workers - everything goes through configurable_worker.
 """
 
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from functools import lru_cache
+from uuid import UUID
+
 from langchain_core.messages import AIMessage, HumanMessage
 from langgraph.graph import END, StateGraph
 
 from app.agents.state import MAX_ITERATIONS, AgentState
-from app.agents.workers.configurable import configurable_worker
+from app.agents.workers.configurable import (
+    configurable_worker_async,
+    direct_response_stream,
+    direct_worker_async,
+)
+from app.core.config import settings
+from app.services.embeddings import generate_query_embedding, start_embedding_scope
 from app.services.knowledge_base import get_relevant_context
+from app.services.semantic_cache import semantic_cache
+from app.services.sub_agents import (
+    ERROR_RESPONSE_PREFIX,
+    get_sub_agents,
+    orchestrate_with_sub_agents_stream,
+)
+
+logger = logging.getLogger(__name__)
 
 
 def agent_node(state: AgentState) -> dict:
@@ -35,7 +55,7 @@ def agent_node(state: AgentState) -> dict:
     agent_config = state.get("agent_config", {})
     agent_name = agent_config.get("name", "Dynamic Agent")
 
-    print(f"[Agent] Processing request with: {agent_name}")
+    logger.debug("[Agent] Processing request with: %s", agent_name)
 
     return {
         "current_agent": "configurable",
@@ -43,43 +63,107 @@ def agent_node(state: AgentState) -> dict:
     }
 
 
-def build_graph() -> StateGraph:
+def route_after_agent(state: AgentState) -> str:
+    """Route to END when agent_node aborted, otherwise to the worker."""
+    return END if state.get("current_agent") == "END" else "worker"
+
+
+def build_graph(fingerprint: frozenset[str] = frozenset({"sub_agents"})) -> StateGraph:
     """
     Builds a simplified LangGraph workflow.
 
     Flow: agent_node -> configurable_worker -> END
+    (agent_node -> END when MAX_ITERATIONS is reached)
+
+    Agents without sub-agents get a single-node graph that calls
+    direct_response inline: direct_worker -> END
 
     All intelligence comes from:
     1. agent_config (loaded from DB)
     2. Sub-agents (if configured)
-    3. RAG context (if enabled)
+    3. RAG context (if enabled, fetched eagerly or via the knowledge tool)
+
+    Args:
+        fingerprint: Graph-shaping features ("sub_agents")
 
     Returns:
         Compiled StateGraph ready for execution
     """
     workflow = StateGraph(AgentState)
 
+    if "sub_agents" not in fingerprint:
+        workflow.add_node("worker", direct_worker_async)
+        workflow.set_entry_point("worker")
+        workflow.add_edge("worker", END)
+        return workflow.compile()
+
     # Only two nodes needed
     workflow.add_node("agent", agent_node)
-    workflow.add_node("worker", configurable_worker)
+    workflow.add_node("worker", configurable_worker_async)
 
     # Simple linear flow
     workflow.set_entry_point("agent")
-    workflow.add_edge("agent", "worker")
+    # Skip the worker entirely when the iteration guard fired
+    workflow.add_conditional_edges(
+        "agent",
+        route_after_agent,
+        {"worker": "worker", END: END},
+    )
     workflow.add_edge("worker", END)
 
     return workflow.compile()
 
 
-# Create the compiled graph instance
-agent_graph = build_graph()
+@lru_cache(maxsize=32)
+def get_agent_graph(fingerprint: frozenset[str]) -> StateGraph:
+    """Compiled graph for the given fingerprint (built once, then cached)."""
+    return build_graph(fingerprint)
+
+
+def graph_fingerprint(sub_agents: list[dict] | None) -> frozenset[str]:
+    """
+    Compute the graph fingerprint for a request.
+
+    Only features that change the graph shape are included, so agents
+    share compiled graphs whenever possible.
+    """
+    # None means sub-agents were not prefetched - keep orchestration
+    if sub_agents is None or sub_agents:
+        return frozenset({"sub_agents"})
+    return frozenset()
+
+
+# Create the compiled graph instance (full orchestration graph)
+agent_graph = get_agent_graph(frozenset({"sub_agents"}))
+
+
+async def _fetch_rag_context(
+    message: str,
+    organization_id: UUID,
+    store_id: UUID | None = None,
+) -> str:
+    """Fetch knowledge base context for the message (empty string on error)."""
+    try:
+        rag_context = await get_relevant_context(
+            organization_id=organization_id,
+            query=message,
+            store_id=store_id,
+            max_tokens=2000,
+        )
+
+        if rag_context:
+            logger.debug("[RAG] Added context (%d chars)", len(rag_context))
+        return rag_context
+    except Exception as e:
+        logger.error("[RAG] Error getting context: %s", e)
+        return ""
 
 
 async def run_agent(
     message: str,
-    organization_id: str | None = None,
+    organization_id: UUID | None = None,
     user_id: str | None = None,
-    store_id: str | None = None,
+    store_id: UUID | None = None,
     agent_config: dict | None = None,
 ) -> str:
     """
@@ -106,34 +190,65 @@ async def run_agent(
     if not agent_config:
         return "Error: No agent configuration provided. Please select an agent."
 
+    # One embedding per query for the whole turn (cache, routing, RAG)
+    start_embedding_scope()
+
     agent_name = agent_config.get("name", "Unknown Agent")
     ai_model = agent_config.get("ai_model", "gpt-4o-mini")
     temperature = agent_config.get("temperature", 0.7)
 
-    print(f"[Agent] {agent_name} | Model: {ai_model} | Temp: {temperature}")
+    logger.info("[Agent] %s | Model: %s | Temp: %s", agent_name, ai_model, temperature)
 
-    # Get RAG context if enabled
-    rag_context = ""
     capabilities = agent_config.get("capabilities", {})
-    rag_enabled = capabilities.get("rag_enabled", True)
 
-    if organization_id and rag_enabled:
+    # has_sub_agents is maintained by the database on sub-agent writes;
+    # when it is missing (older rows) fall back to loading sub-agents.
+    # Start the lookup first so it overlaps the semantic cache embedding.
+    has_sub_agents = capabilities.get("has_sub_agents")
+
+    sub_agents_task = None
+    if has_sub_agents is not False and agent_config.get("id"):
+        sub_agents_task = asyncio.create_task(
+            get_sub_agents(agent_config["id"])
+        )
+
+    # Semantic cache: reuse the answer to a near-identical earlier query.
+    # updated_at is part of the scope so editing the agent retires old answers.
+    cache_scope = (
+        organization_id,
+        agent_config.get("id"),
+        agent_config.get("updated_at"),
+        store_id,
+    )
+    query_embedding = None
+    if settings.SEMANTIC_CACHE_ENABLED and organization_id:
         try:
-            from uuid import UUID
-            org_uuid = UUID(organization_id) if isinstance(organization_id, str) else organization_id
-            store_uuid = UUID(store_id) if store_id and isinstance(store_id, str) else store_id
-
-            rag_context = await get_relevant_context(
-                organization_id=org_uuid,
-                query=message,
-                store_id=store_uuid,
-                max_tokens=2000,
-            )
-
-            if rag_context:
-                print(f"[RAG] Added context ({len(rag_context)} chars)")
+            query_embedding = await generate_query_embedding(message)
+            cached_response = semantic_cache.get(cache_scope, query_embedding)
+            if cached_response is not None:
+                if sub_agents_task:
+                    sub_agents_task.cancel()
+                return cached_response
         except Exception as e:
-            print(f"[RAG] Error getting context: {e}")
+            logger.warning("[Cache] Error checking semantic cache: %s", e)
+
+    # Eager RAG only when explicitly requested; otherwise the worker exposes
+    # the knowledge base as a tool and the LLM fetches context on demand
+    rag_enabled = capabilities.get("rag_enabled", True)
+    rag_eager = capabilities.get("rag_eager", False)
+
+    # Fetch RAG context while the sub-agent lookup is still in flight
+    rag_task = None
+    if organization_id and rag_enabled and rag_eager:
+        rag_task = asyncio.create_task(
+            _fetch_rag_context(message, organization_id, store_id)
+        )
+
+    rag_context = await rag_task if rag_task else ""
+    if has_sub_agents is False:
+        sub_agents = []
+    else:
+        sub_agents = await sub_agents_task if sub_agents_task else None
 
     # Build initial state
     initial_state: AgentState = {
@@ -141,23 +256,96 @@ async def run_agent(
         "current_agent": "agent",
         "organization_id": organization_id,
         "user_id": user_id,
+        "store_id": store_id,
         "iteration_count": 0,
         "final_response": None,
         "rag_context": rag_context,
         "agent_config": agent_config,
+        "sub_agents": sub_agents,
     }
 
-    # Run the graph
-    result = await agent_graph.ainvoke(initial_state)
+    # Run the graph variant matching this agent
+    graph = get_agent_graph(graph_fingerprint(sub_agents))
+    result = await graph.ainvoke(initial_state)
 
     # Extract final response
-    if result.get("final_response"):
-        return result["final_response"]
+    response = result.get("final_response")
 
     # Fallback: get last AI message
-    messages = result.get("messages", [])
-    for msg in reversed(messages):
-        if isinstance(msg, AIMessage):
-            return msg.content
+    if not response:
+        messages = result.get("messages", [])
+        for msg in reversed(messages):
+            if isinstance(msg, AIMessage):
+                response = msg.content
+                break
+
+    if not response:
+        return "No response generated."
+
+    # Never cache the apology returned when a sub-agent call failed
+    if query_embedding is not None and not response.startswith(ERROR_RESPONSE_PREFIX):
+        semantic_cache.set(cache_scope, query_embedding, response)
+
+    return response
+
+
+async def run_agent_stream(
+    message: str,
+    organization_id: UUID | None = None,
+    user_id: str | None = None,
+    store_id: UUID | None = None,
+    agent_config: dict | None = None,
+) -> AsyncIterator[str]:
+    """
+    Streaming entry point - yields response chunks as the LLM generates them.
+
+    Skips the graph's ainvoke (which materializes the full response) and
+    streams the agent's direct response. Orchestrator agents with sub-agents
+    are routed first, then the selected sub-agent's response is streamed.
+
+    Args:
+        message: User's input message
+        organization_id: Multi-tenant org context
+        user_id: User making the request
+        store_id: Optional store context for RAG
+        agent_config: Agent configuration from database (required)
+
+    Yields:
+        Response text chunks
+    """
+    if not agent_config:
+        yield "Error: No agent configuration provided. Please select an agent."
+        return
+
+    start_embedding_scope()
+
+    capabilities = agent_config.get("capabilities", {})
 
-    return "No response generated."
+    # No tool loop while streaming - fetch RAG context up front,
+    # concurrently with the sub-agent lookup
+    rag_task = None
+    if organization_id and capabilities.get("rag_enabled", True):
+        rag_task = asyncio.create_task(
+            _fetch_rag_context(message, organization_id, store_id)
+        )
+
+    sub_agents = []
+    if capabilities.get("has_sub_agents") is not False and agent_config.get("id"):
+        sub_agents = await get_sub_agents(agent_config["id"])
+
+    rag_context = await rag_task if rag_task else ""
+
+    if sub_agents:
+        # Route first, then stream the selected sub-agent's response
+        async for chunk in orchestrate_with_sub_agents_stream(
+            user_message=message,
+            parent_agent=agent_config,
+            organization_id=organization_id,
+            rag_context=rag_context,
+            sub_agents=sub_agents,
+        ):
+            yield chunk
+        return
+
+    async for chunk in direct_response_stream(agent_config, message, rag_context):
+        yield chunk
@@ -1,15 +1,21 @@
 # Agent Workers Package
 #
 # The system now uses a fully dynamic architecture where all agents
-# are configured from the database. The configurable_worker is the
+# are configured from the database. The configurable_worker_async node is the
 # only worker needed - it reads agent config from DB and handles
 # sub-agent orchestration automatically.
 #
 # Legacy static workers (echo, tiktok, amazon, web, email) are kept
 # for backwards compatibility but are no longer used in production.
 
-from app.agents.workers.configurable import configurable_worker
+from app.agents.workers.configurable import (
+    configurable_worker_async,
+    direct_response_stream,
+    direct_worker_async,
+)
 
 __all__ = [
-    "configurable_worker",
+    "configurable_worker_async",
+    "direct_response_stream",
+    "direct_worker_async",
 ]
@@ -6,12 +6,19 @@ configured by admins in the AgentConfigPanel.
 Supports sub-agent orchestration when the agent has sub-agents configured.
 """
 
-import asyncio
-from langchain_core.messages import AIMessage, SystemMessage
+import logging
+from collections.abc import AsyncIterator
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 
 from app.agents.state import AgentState
 from app.core.config import settings
+from app.services.llm_clients import get_llm
+from app.services.sub_agents import orchestrate_with_sub_agents
+from app.tools import ainvoke_with_tools, build_knowledge_tool
+
+logger = logging.getLogger(__name__)
 
 
 # Default fallback configuration
@@ -22,10 +29,58 @@ DEFAULT_CONFIG = {
     "max_tokens": 2048,
 }
 
+def _extract_user_message(messages: list) -> str | None:
+    """Get the latest user message text (None if there are no messages)."""
+    last_message = messages[-1] if messages else None
+
+    if not last_message:
+        return None
+
+    # Get user message content
+    user_message = (
+        last_message.content
+        if hasattr(last_message, "content")
+        else str(last_message)
+    )
+
+    # Clean up the message - remove RAG context prefix if present
+    _, sep, tail = user_message.rpartition("PREGUNTA DEL USUARIO:")
+    if sep:
+        user_message = tail.strip()
+
+    return user_message
+
+
+def _no_message_response() -> dict:
+    return {
+        "messages": [AIMessage(content="No message provided.")],
+        "current_agent": "configurable",
+        "final_response": "No message provided.",
+    }
+
+
+def _build_tools(state: AgentState, agent_config: dict, rag_context: str) -> list:
+    """
+    Lazy RAG: when context was not fetched eagerly, let the LLM decide
+    whether to search the knowledge base.
+    """
+    organization_id = state.get("organization_id")
+    capabilities = agent_config.get("capabilities") or {}
+    if organization_id and not rag_context and capabilities.get("rag_enabled", True):
+        return [build_knowledge_tool(organization_id, state.get("store_id"))]
+    return []
+
 
 async def configurable_worker_async(state: AgentState) -> dict:
     """
-    Async version of configurable worker that supports sub-agent orchestration.
+    Configurable worker node that uses admin-defined settings.
+    Registered directly as an async LangGraph node (no sync wrapper).
+
+    Uses the agent_config from state which includes:
+    - system_prompt: Custom instructions for the agent
+    - ai_model: Which LLM model to use (gpt-4o, gpt-4o-mini, etc.)
+    - temperature: Creativity level (0-2)
+    - max_tokens: Maximum response length
 
     When the agent has sub-agents configured, this worker will:
     1. Load sub-agents from database
@@ -38,40 +93,33 @@ async def configurable_worker_async(state: AgentState) -> dict:
     Returns:
         Updated state with generated response
     """
-    from app.services.sub_agents import orchestrate_with_sub_agents
-
-    messages = state["messages"]
     agent_config = state.get("agent_config") or DEFAULT_CONFIG
     rag_context = state.get("rag_context", "")
     organization_id = state.get("organization_id")
 
-    last_message = messages[-1] if messages else None
+    user_message = _extract_user_message(state["messages"])
+    if user_message is None:
+        return _no_message_response()
 
-    if not last_message:
+    agent_name = agent_config.get("name", "Configurable Agent")
+    logger.debug("[%s] Processing with sub-agent orchestration enabled", agent_name)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[%s] Config keys: %s", agent_name, list(agent_config.keys()))
+        if agent_config.get("system_prompt"):
+            logger.debug("[%s] System prompt preview: %s...", agent_name, agent_config["system_prompt"][:100])
+
+    tools = _build_tools(state, agent_config, rag_context)
+
+    # Agents flagged as having no sub-agents skip orchestration entirely
+    capabilities = agent_config.get("capabilities") or {}
+    if capabilities.get("has_sub_agents") is False:
+        response_text = await direct_response(agent_config, user_message, rag_context, tools)
         return {
-            "messages": [AIMessage(content="No message provided.")],
+            "messages": [AIMessage(content=response_text)],
             "current_agent": "configurable",
-            "final_response": "No message provided.",
+            "final_response": response_text,
         }
 
-    # Get user message content
-    user_message = (
-        last_message.content
-        if hasattr(last_message, "content")
-        else str(last_message)
-    )
-
-    # Clean up the message - remove RAG context prefix if present
-    if "PREGUNTA DEL USUARIO:" in user_message:
-        user_message = user_message.split("PREGUNTA DEL USUARIO:")[-1].strip()
-
-    agent_name = agent_config.get("name", "Configurable Agent")
-    print(f"[{agent_name}] Processing with sub-agent orchestration enabled...")
-    print(f"[{agent_name}] Config keys: {list(agent_config.keys())}")
-    print(f"[{agent_name}] Has system_prompt: {bool(agent_config.get('system_prompt'))}")
-    if agent_config.get("system_prompt"):
-        print(f"[{agent_name}] System prompt preview: {agent_config.get('system_prompt')[:100]}...")
-
     try:
         # Use orchestration which will route to sub-agents if available
         response_text = await orchestrate_with_sub_agents(
@@ -79,14 +127,16 @@ async def configurable_worker_async(state: AgentState) -> dict:
             parent_agent=agent_config,
             organization_id=organization_id,
             rag_context=rag_context,
+            tools=tools,
+            sub_agents=state.get("sub_agents"),
         )
 
-        print(f"[{agent_name}] Response generated ({len(response_text)} chars)")
+        logger.debug("[%s] Response generated (%d chars)", agent_name, len(response_text))
 
     except Exception as e:
-        print(f"[{agent_name}] Error in orchestration: {e}")
+        logger.error("[%s] Error in orchestration: %s", agent_name, e)
         # Fallback to direct response without sub-agents
-        response_text = await direct_response(agent_config, user_message, rag_context)
+        response_text = await direct_response(agent_config, user_message, rag_context, tools)
 
     return {
         "messages": [AIMessage(content=response_text)],
@@ -95,11 +145,40 @@ async def configurable_worker_async(state: AgentState) -> dict:
     }
 
 
-async def direct_response(agent_config: dict, user_message: str, rag_context: str) -> str:
+async def direct_worker_async(state: AgentState) -> dict:
     """
-    Generate a direct response using the agent's config without sub-agent routing.
-    Used as fallback when orchestration fails or for agents without sub-agents.
+    Worker node for agents without sub-agents.
+    Calls direct_response inline, skipping sub-agent orchestration.
+
+    Args:
+        state: Current graph state with agent_config
+
+    Returns:
+        Updated state with generated response
     """
+    agent_config = state.get("agent_config") or DEFAULT_CONFIG
+    rag_context = state.get("rag_context", "")
+
+    user_message = _extract_user_message(state["messages"])
+    if user_message is None:
+        return _no_message_response()
+
+    tools = _build_tools(state, agent_config, rag_context)
+    response_text = await direct_response(agent_config, user_message, rag_context, tools)
+
+    return {
+        "messages": [AIMessage(content=response_text)],
+        "current_agent": "configurable",
+        "final_response": response_text,
+    }
+
+
+def _prepare_direct_call(
+    agent_config: dict,
+    user_message: str,
+    rag_context: str,
+) -> tuple[ChatOpenAI, list]:
+    """Build the LLM client and prompt messages for a direct response."""
     system_prompt = agent_config.get("system_prompt") or DEFAULT_CONFIG["system_prompt"]
     ai_model = agent_config.get("ai_model") or DEFAULT_CONFIG["ai_model"]
     temperature = agent_config.get("temperature") or DEFAULT_CONFIG["temperature"]
@@ -116,50 +195,46 @@ CONTEXTO RELEVANTE (de la base de conocimiento):
 
 Utiliza el contexto anterior para informar tus respuestas cuando sea relevante."""
 
-    llm = ChatOpenAI(
-        model=ai_model,
-        api_key=settings.OPENAI_API_KEY,
-        temperature=temperature,
-        max_tokens=max_tokens,
-    )
+    # Response caching is opt-in per agent (cached answers are replayed verbatim)
+    capabilities = agent_config.get("capabilities") or {}
+    use_cache = settings.LLM_CACHE_ENABLED and capabilities.get("llm_cache_enabled", False)
 
-    response = llm.invoke([
+    llm = get_llm(ai_model, temperature, max_tokens, use_cache)
+    messages = [
         SystemMessage(content=full_system_prompt),
-        {"role": "user", "content": user_message},
-    ])
-
-    return response.content
+        HumanMessage(content=user_message),
+    ]
+    return llm, messages
 
 
-def configurable_worker(state: AgentState) -> dict:
+async def direct_response(
+    agent_config: dict,
+    user_message: str,
+    rag_context: str,
+    tools: list | None = None,
+) -> str:
     """
-    Configurable worker that uses admin-defined settings.
-    Wraps the async version for LangGraph compatibility.
+    Generate a direct response using the agent's config without sub-agent routing.
+    Used as fallback when orchestration fails or for agents without sub-agents.
 
-    Uses the agent_config from state which includes:
-    - system_prompt: Custom instructions for the agent
-    - ai_model: Which LLM model to use (gpt-4o, gpt-4o-mini, etc.)
-    - temperature: Creativity level (0-2)
-    - max_tokens: Maximum response length
+    When tools are given (e.g. the knowledge base search), the LLM may call
+    them before answering.
+    """
+    llm, messages = _prepare_direct_call(agent_config, user_message, rag_context)
+    response = await ainvoke_with_tools(llm, messages, tools)
+    return response.content
 
-    Args:
-        state: Current graph state with agent_config
 
-    Returns:
-        Updated state with generated response
+async def direct_response_stream(
+    agent_config: dict,
+    user_message: str,
+    rag_context: str,
+) -> AsyncIterator[str]:
     """
-    # Check if we're already in an async context
-    try:
-        loop = asyncio.get_running_loop()
-        # We're in an async context, need to use a different approach
-        # Create a new thread to run the async code
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(
-                asyncio.run,
-                configurable_worker_async(state)
-            )
-            return future.result()
-    except RuntimeError:
-        # No running loop, safe to use asyncio.run
-        return asyncio.run(configurable_worker_async(state))
+    Streaming variant of direct_response.
+    Yields content chunks as the LLM produces them.
+    """
+    llm, messages = _prepare_direct_call(agent_config, user_message, rag_context)
+    async for chunk in llm.astream(messages):
+        if chunk.content:
+            yield chunk.content
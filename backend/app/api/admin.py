@@ -3,12 +3,17 @@ Admin API Endpoints
 Protected routes for user management and administration.
 """
 
-from fastapi import APIRouter, HTTPException, Query, status
-from supabase import create_client
+import asyncio
+import logging
+from datetime import UTC, datetime
 
-from app.core.auth import AdminUser
-from app.core.config import settings
-from app.core.supabase import supabase
+from fastapi import APIRouter, HTTPException, Query, Response, status
+from supabase import AuthApiError, Client
+
+from app.core.auth import AdminUser, invalidate_profile
+from app.core.errors import error_detail
+from app.core.responses import model_response, rows_response
+from app.core.supabase import get_supabase_client, supabase
 from app.models.user import (
     UserCreate,
     UserCreateResponse,
@@ -16,105 +21,105 @@ from app.models.user import (
     UserProfile,
     UserUpdate,
 )
+from app.services.users import create_user_with_profile
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+# Columns materialized into UserProfile
+PROFILE_COLS = "id,email,full_name,role,organization_id,avatar_url,created_at,updated_at"
+
 
-def get_admin_client():
+def get_admin_client() -> Client:
     """
     Get Supabase client with service role for admin operations.
     Service role bypasses RLS for user management.
+
+    Returns the long-lived cached client so its HTTP connection pool is
+    reused instead of building a new client per request.
     """
-    return create_client(
-        settings.SUPABASE_URL,
-        settings.SUPABASE_SERVICE_ROLE_KEY,
-    )
+    return get_supabase_client()
 
 
 @router.post(
     "/users",
-    response_model=UserCreateResponse,
     status_code=status.HTTP_201_CREATED,
+    responses={201: {"model": UserCreateResponse}},
     summary="Create a new user",
 )
 async def create_user(
     user_data: UserCreate,
     admin: AdminUser,
-):
+) -> Response:
     """
     Create a new user with email and password.
 
-    Uses SERVICE_ROLE_KEY to bypass RLS and create both:
+    The auth user is created through the auth admin API (SERVICE_ROLE_KEY),
+    then its profile is written with the role and organization:
     1. Auth user in auth.users
-    2. Profile in public.profiles
+    2. Profile in public.profiles (auth user removed again on failure)
 
     Admin only endpoint.
     """
-    admin_client = get_admin_client()
-
     try:
-        # Step 1: Create auth user using admin API
-        auth_response = admin_client.auth.admin.create_user(
-            {
-                "email": user_data.email,
-                "password": user_data.password,
-                "email_confirm": True,  # Auto-confirm email
-                "user_metadata": {
-                    "full_name": user_data.full_name,
-                },
-            }
-        )
-
-        if not auth_response.user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to create auth user",
-            )
-
-        user_id = auth_response.user.id
-
-        # Step 2: Create profile (RLS bypassed with service role)
-        profile_data = {
-            "id": user_id,
-            "email": user_data.email,
-            "full_name": user_data.full_name,
-            "role": user_data.role.value,
-            "organization_id": user_data.organization_id or admin.organization_id,
-        }
-
-        profile_response = (
-            admin_client.table("profiles")
-            .insert(profile_data)
-            .execute()
+        user_id = await create_user_with_profile(
+            email=user_data.email,
+            password=user_data.password,
+            full_name=user_data.full_name,
+            role=user_data.role.value,
+            organization_id=user_data.organization_id or admin.organization_id,
         )
 
-        if not profile_response.data:
-            # Rollback: delete auth user if profile creation fails
-            admin_client.auth.admin.delete_user(user_id)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create user profile",
-            )
-
-        return UserCreateResponse(
-            id=user_id,
-            email=user_data.email,
-            role=user_data.role,
-            message="User created successfully",
+        return model_response(
+            UserCreateResponse(
+                id=user_id,
+                email=user_data.email,
+                role=user_data.role,
+                message="User created successfully",
+            ),
+            status_code=status.HTTP_201_CREATED,
         )
 
     except HTTPException:
         raise
     except Exception as e:
+        if "already been registered" in str(e):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Email already registered",
+            )
+        if isinstance(e, AuthApiError) and e.status < 500:
+            # Rejected by the auth server (e.g. weak password)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+        logger.error(f"Error creating user: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error creating user: {str(e)}",
+            detail=error_detail("Error creating user", e),
         )
 
 
+def now_iso() -> str:
+    """Current UTC time as an ISO-8601 string (second precision)."""
+    return datetime.now(UTC).isoformat(timespec="seconds")
+
+
+def _filter_profiles(query, organization_id: str | None, include_deleted: bool):
+    """Apply the list_users filters to a profiles query."""
+    # Filter by organization if admin has one
+    if organization_id:
+        query = query.eq("organization_id", organization_id)
+
+    # Exclude soft-deleted unless requested
+    if not include_deleted:
+        query = query.is_("deleted_at", "null")
+
+    return query
+
+
 @router.get(
     "/users",
-    response_model=UserListResponse,
+    responses={200: {"model": UserListResponse}},
     summary="List all users",
 )
 async def list_users(
@@ -122,66 +127,61 @@ async def list_users(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     include_deleted: bool = Query(False),
-):
+) -> Response:
     """
     Get paginated list of users.
 
     Admin only endpoint.
     """
     try:
-        query = supabase.table("profiles").select("*", count="exact")
-
-        # Filter by organization if admin has one
-        if admin.organization_id:
-            query = query.eq("organization_id", admin.organization_id)
-
-        # Exclude soft-deleted unless requested
-        if not include_deleted:
-            query = query.is_("deleted_at", "null")
-
         # Pagination
         offset = (page - 1) * page_size
-        query = query.range(offset, offset + page_size - 1)
-
-        response = query.execute()
-
-        users = [
-            UserProfile(
-                id=u["id"],
-                email=u.get("email", ""),
-                full_name=u.get("full_name"),
-                role=u.get("role", "user"),
-                organization_id=u.get("organization_id"),
-                avatar_url=u.get("avatar_url"),
-                created_at=u.get("created_at"),
-                updated_at=u.get("updated_at"),
-            )
-            for u in response.data
-        ]
-
-        return UserListResponse(
-            users=users,
-            total=response.count or 0,
-            page=page,
-            page_size=page_size,
+        page_query = _filter_profiles(
+            supabase.table("profiles").select(PROFILE_COLS),
+            admin.organization_id,
+            include_deleted,
+        ).range(offset, offset + page_size - 1)
+
+        # COUNT(*) runs as a separate head-only query, concurrently with the page
+        count_query = _filter_profiles(
+            supabase.table("profiles").select("id", count="exact", head=True),
+            admin.organization_id,
+            include_deleted,
+        )
+
+        response, count_response = await asyncio.gather(
+            asyncio.to_thread(page_query.execute),
+            asyncio.to_thread(count_query.execute),
+        )
+
+        # PROFILE_COLS rows are already in the UserProfile shape
+        return rows_response(
+            {
+                "users": response.data,
+                "total": count_response.count or 0,
+                "page": page,
+                "page_size": page_size,
+            },
+            UserListResponse,
         )
 
     except Exception as e:
+        logger.error(f"Error listing users: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error listing users: {str(e)}",
+            detail=error_detail("Error listing users", e),
         )
 
 
 @router.get(
     "/users/{user_id}",
-    response_model=UserProfile,
+    responses={200: {"model": UserProfile}},
     summary="Get user by ID",
 )
 async def get_user(
     user_id: str,
     admin: AdminUser,
-):
+) -> Response:
     """
     Get a single user by ID.
 
@@ -190,49 +190,41 @@ async def get_user(
     try:
         response = (
             supabase.table("profiles")
-            .select("*")
+            .select(PROFILE_COLS)
             .eq("id", user_id)
-            .single()
+            .maybe_single()
             .execute()
         )
 
-        if not response.data:
+        # maybe_single() returns None (instead of raising) when no row matches
+        if not response or not response.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found",
             )
 
-        u = response.data
-        return UserProfile(
-            id=u["id"],
-            email=u.get("email", ""),
-            full_name=u.get("full_name"),
-            role=u.get("role", "user"),
-            organization_id=u.get("organization_id"),
-            avatar_url=u.get("avatar_url"),
-            created_at=u.get("created_at"),
-            updated_at=u.get("updated_at"),
-        )
+        return rows_response(response.data, UserProfile)
 
     except HTTPException:
         raise
     except Exception as e:
+        logger.error(f"Error fetching user: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching user: {str(e)}",
+            detail=error_detail("Error fetching user", e),
         )
 
 
 @router.patch(
     "/users/{user_id}",
-    response_model=UserProfile,
+    responses={200: {"model": UserProfile}},
     summary="Update user",
 )
 async def update_user(
     user_id: str,
     user_data: UserUpdate,
     admin: AdminUser,
-):
+) -> Response:
     """
     Update user profile.
 
@@ -255,6 +247,7 @@ async def update_user(
             supabase.table("profiles")
             .update(update_data)
             .eq("id", user_id)
+            .select(PROFILE_COLS)
             .execute()
         )
 
@@ -264,24 +257,16 @@ async def update_user(
                 detail="User not found",
             )
 
-        u = response.data[0]
-        return UserProfile(
-            id=u["id"],
-            email=u.get("email", ""),
-            full_name=u.get("full_name"),
-            role=u.get("role", "user"),
-            organization_id=u.get("organization_id"),
-            avatar_url=u.get("avatar_url"),
-            created_at=u.get("created_at"),
-            updated_at=u.get("updated_at"),
-        )
+        invalidate_profile(user_id)
+        return rows_response(response.data[0], UserProfile)
 
     except HTTPException:
         raise
     except Exception as e:
+        logger.error(f"Error updating user: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error updating user: {str(e)}",
+            detail=error_detail("Error updating user", e),
         )
 
 
@@ -309,13 +294,12 @@ async def delete_user(
         )
 
     try:
-        from datetime import datetime, timezone
-
         response = (
             supabase.table("profiles")
-            .update({"deleted_at": datetime.now(timezone.utc).isoformat()})
+            .update({"deleted_at": now_iso()})
             .eq("id", user_id)
             .is_("deleted_at", "null")  # Only if not already deleted
+            .select("id")
             .execute()
         )
 
@@ -325,24 +309,27 @@ async def delete_user(
                 detail="User not found or already deleted",
             )
 
+        invalidate_profile(user_id)
+
     except HTTPException:
         raise
     except Exception as e:
+        logger.error(f"Error deleting user: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error deleting user: {str(e)}",
+            detail=error_detail("Error deleting user", e),
         )
 
 
 @router.post(
     "/users/{user_id}/restore",
-    response_model=UserProfile,
+    responses={200: {"model": UserProfile}},
     summary="Restore soft-deleted user",
 )
 async def restore_user(
     user_id: str,
     admin: AdminUser,
-):
+) -> Response:
     """
     Restore a soft-deleted user by clearing deleted_at.
 
@@ -354,6 +341,7 @@ async def restore_user(
             .update({"deleted_at": None})
             .eq("id", user_id)
             .not_.is_("deleted_at", "null")  # Only if deleted
+            .select(PROFILE_COLS)
             .execute()
         )
 
@@ -363,22 +351,14 @@ async def restore_user(
                 detail="User not found or not deleted",
             )
 
-        u = response.data[0]
-        return UserProfile(
-            id=u["id"],
-            email=u.get("email", ""),
-            full_name=u.get("full_name"),
-            role=u.get("role", "user"),
-            organization_id=u.get("organization_id"),
-            avatar_url=u.get("avatar_url"),
-            created_at=u.get("created_at"),
-            updated_at=u.get("updated_at"),
-        )
+        invalidate_profile(user_id)
+        return rows_response(response.data[0], UserProfile)
 
     except HTTPException:
         raise
     except Exception as e:
+        logger.error(f"Error restoring user: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error restoring user: {str(e)}",
+            detail=error_detail("Error restoring user", e),
         )
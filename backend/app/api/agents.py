@@ -6,8 +6,11 @@ Handles CRUD operations for agents including configuration management.
 import logging
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Response
 
+from app.core.db import fetch_all, fetch_one, get_db_pool
+from app.core.errors import error_detail
+from app.core.responses import CACHE_PUBLIC, ORJSONResponse, etag_response
 from app.core.supabase import supabase
 from app.models.agent import (
     AgentCreate,
@@ -19,83 +22,130 @@ from app.models.agent import (
     AIModelResponse,
     AIModelsListResponse,
 )
+from app.services.agent_config import invalidate_agent
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
+# Endpoints return rows as-is, so select exactly the response fields
+AGENT_COLS = ",".join(AgentResponse.model_fields)
+# List view without prompts/config blobs (system_prompt, settings, capabilities...)
+AGENT_SUMMARY_COLS = "id,organization_id,name,slug,role,description,icon,is_active,ai_model,category,created_at,updated_at"
+HISTORY_COLS = ",".join(AgentConfigHistoryItem.model_fields)
+AI_MODEL_COLS = ",".join(AIModelResponse.model_fields)
+
+# Direct pool queries, kept constant so asyncpg's per-connection statement
+# cache parses and plans each one only once
+Q_LIST_AGENTS = (
+    f"SELECT {AGENT_COLS} FROM agents"
+    " WHERE organization_id = $1 AND ($2::bool OR is_active) ORDER BY created_at"
+)
+Q_LIST_AGENT_SUMMARIES = (
+    f"SELECT {AGENT_SUMMARY_COLS} FROM agents"
+    " WHERE organization_id = $1 AND ($2::bool OR is_active) ORDER BY created_at"
+)
+Q_GET_AGENT = f"SELECT {AGENT_COLS} FROM agents WHERE id = $1"
+Q_GET_AGENT_BY_SLUG = f"SELECT {AGENT_COLS} FROM agents WHERE organization_id = $1 AND slug = $2"
+Q_DUPLICATE_AGENT = f"SELECT {AGENT_COLS} FROM duplicate_agent($1, $2, $3)"
 
-@router.get("/", response_model=AgentListResponse)
+
+@router.get(
+    "/",
+    response_class=ORJSONResponse,
+    responses={200: {"model": AgentListResponse}},
+)
 async def list_agents(
     organization_id: UUID = Query(..., description="Organization ID"),
     active_only: bool = Query(False, description="Filter to active agents only"),
-) -> AgentListResponse:
+    summary: bool = Query(False, description="Return only list-view columns"),
+) -> ORJSONResponse:
     """
     List all agents for an organization.
 
     Args:
         organization_id: UUID of the organization
         active_only: If true, only return active agents
+        summary: If true, skip prompt and configuration columns
 
     Returns:
         List of agents
     """
-    try:
-        query = supabase.table("agents").select("*").eq(
-            "organization_id", str(organization_id)
-        )
+    columns = AGENT_SUMMARY_COLS if summary else AGENT_COLS
 
-        if active_only:
-            query = query.eq("is_active", True)
+    try:
+        if get_db_pool():
+            agents = await fetch_all(
+                Q_LIST_AGENT_SUMMARIES if summary else Q_LIST_AGENTS,
+                organization_id,
+                not active_only,
+            )
+        else:
+            query = supabase.table("agents").select(columns).eq(
+                "organization_id", str(organization_id)
+            )
 
-        result = query.order("created_at", desc=False).execute()
+            if active_only:
+                query = query.eq("is_active", True)
 
-        agents = [AgentResponse(**agent) for agent in result.data]
+            agents = query.order("created_at", desc=False).execute().data
 
-        return AgentListResponse(agents=agents, total=len(agents))
+        return ORJSONResponse({"agents": agents, "total": len(agents)})
 
     except Exception as e:
         logger.error(f"Error listing agents: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching agents: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error fetching agents", e))
 
 
-@router.get("/{agent_id}", response_model=AgentResponse)
-async def get_agent(agent_id: UUID) -> AgentResponse:
+@router.get(
+    "/{agent_id}",
+    response_class=ORJSONResponse,
+    responses={200: {"model": AgentResponse}},
+)
+async def get_agent(agent_id: UUID, request: Request) -> Response:
     """
     Get a single agent by ID.
 
     Args:
         agent_id: UUID of the agent
+        request: Incoming request (for If-None-Match)
 
     Returns:
         Agent data
     """
     try:
-        result = (
-            supabase.table("agents")
-            .select("*")
-            .eq("id", str(agent_id))
-            .single()
-            .execute()
-        )
-
-        if not result.data:
+        if get_db_pool():
+            agent = await fetch_one(Q_GET_AGENT, agent_id)
+        else:
+            agent = (
+                supabase.table("agents")
+                .select(AGENT_COLS)
+                .eq("id", str(agent_id))
+                .single()
+                .execute()
+            ).data
+
+        if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
 
-        return AgentResponse(**result.data)
+        return etag_response(request, agent)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting agent: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching agent: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error fetching agent", e))
 
 
-@router.get("/slug/{slug}", response_model=AgentResponse)
+@router.get(
+    "/slug/{slug}",
+    response_class=ORJSONResponse,
+    responses={200: {"model": AgentResponse}},
+)
 async def get_agent_by_slug(
     slug: str,
     organization_id: UUID = Query(..., description="Organization ID"),
-) -> AgentResponse:
+) -> ORJSONResponse:
     """
     Get an agent by its slug within an organization.
 
@@ -107,29 +157,41 @@ async def get_agent_by_slug(
         Agent data
     """
     try:
-        result = (
-            supabase.table("agents")
-            .select("*")
-            .eq("organization_id", str(organization_id))
-            .eq("slug", slug)
-            .single()
-            .execute()
-        )
-
-        if not result.data:
+        if get_db_pool():
+            agent = await fetch_one(
+                Q_GET_AGENT_BY_SLUG,
+                organization_id,
+                slug,
+            )
+        else:
+            agent = (
+                supabase.table("agents")
+                .select(AGENT_COLS)
+                .eq("organization_id", str(organization_id))
+                .eq("slug", slug)
+                .single()
+                .execute()
+            ).data
+
+        if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
 
-        return AgentResponse(**result.data)
+        return ORJSONResponse(agent)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting agent by slug: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching agent: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error fetching agent", e))
 
 
-@router.post("/", response_model=AgentResponse, status_code=201)
-async def create_agent(agent: AgentCreate) -> AgentResponse:
+@router.post(
+    "/",
+    status_code=201,
+    response_class=ORJSONResponse,
+    responses={201: {"model": AgentResponse}},
+)
+async def create_agent(agent: AgentCreate) -> ORJSONResponse:
     """
     Create a new agent.
 
@@ -143,25 +205,30 @@ async def create_agent(agent: AgentCreate) -> AgentResponse:
         result = (
             supabase.table("agents")
             .insert(agent.model_dump(mode="json"))
+            .select(AGENT_COLS)
             .execute()
         )
 
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to create agent")
 
-        return AgentResponse(**result.data[0])
+        return ORJSONResponse(result.data[0], status_code=201)
 
     except Exception as e:
         logger.error(f"Error creating agent: {e}")
-        raise HTTPException(status_code=500, detail=f"Error creating agent: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error creating agent", e))
 
 
-@router.patch("/{agent_id}", response_model=AgentResponse)
+@router.patch(
+    "/{agent_id}",
+    response_class=ORJSONResponse,
+    responses={200: {"model": AgentResponse}},
+)
 async def update_agent(
     agent_id: UUID,
     agent_update: AgentUpdate,
     modified_by: UUID = Query(..., description="User ID making the change"),
-) -> AgentResponse:
+) -> ORJSONResponse:
     """
     Update an agent's configuration.
 
@@ -175,10 +242,7 @@ async def update_agent(
     """
     try:
         # Build update data, excluding None values
-        update_data = {
-            k: v for k, v in agent_update.model_dump(mode="json").items()
-            if v is not None
-        }
+        update_data = agent_update.model_dump(mode="json", exclude_none=True, exclude_unset=True)
 
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
@@ -190,42 +254,59 @@ async def update_agent(
             supabase.table("agents")
             .update(update_data)
             .eq("id", str(agent_id))
+            .select(AGENT_COLS)
             .execute()
         )
 
         if not result.data:
             raise HTTPException(status_code=404, detail="Agent not found")
 
-        return AgentResponse(**result.data[0])
+        invalidate_agent(agent_id)
+
+        return ORJSONResponse(result.data[0])
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error updating agent: {e}")
-        raise HTTPException(status_code=500, detail=f"Error updating agent: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error updating agent", e))
+
+
+def _delete_agent_row(agent_id: UUID) -> None:
+    """Delete an agent row and drop its cached config (runs after the response)."""
+    try:
+        supabase.table("agents").delete().eq("id", str(agent_id)).execute()
+        invalidate_agent(agent_id)
+    except Exception as e:
+        logger.error(f"Error deleting agent {agent_id}: {e}")
 
 
 @router.delete("/{agent_id}", status_code=204)
-async def delete_agent(agent_id: UUID) -> None:
+async def delete_agent(agent_id: UUID, background_tasks: BackgroundTasks) -> Response:
     """
     Delete an agent.
 
+    The delete is idempotent, so the 204 is sent right away and the row
+    is removed in a background task.
+
     Args:
         agent_id: UUID of the agent to delete
+        background_tasks: FastAPI background task queue
     """
-    try:
-        supabase.table("agents").delete().eq("id", str(agent_id)).execute()
-    except Exception as e:
-        logger.error(f"Error deleting agent: {e}")
-        raise HTTPException(status_code=500, detail=f"Error deleting agent: {str(e)}")
+    background_tasks.add_task(_delete_agent_row, agent_id)
+    return Response(status_code=204)
 
 
-@router.get("/{agent_id}/history", response_model=AgentConfigHistoryResponse)
+@router.get(
+    "/{agent_id}/history",
+    response_class=ORJSONResponse,
+    responses={200: {"model": AgentConfigHistoryResponse}},
+)
 async def get_agent_config_history(
     agent_id: UUID,
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
-) -> AgentConfigHistoryResponse:
+) -> ORJSONResponse:
     """
     Get configuration change history for an agent.
 
@@ -240,24 +321,27 @@ async def get_agent_config_history(
     try:
         result = (
             supabase.table("agent_config_history")
-            .select("*")
+            .select(HISTORY_COLS, count="exact")
             .eq("agent_id", str(agent_id))
             .order("changed_at", desc=True)
             .range(offset, offset + limit - 1)
             .execute()
         )
 
-        history = [AgentConfigHistoryItem(**item) for item in result.data]
-
-        return AgentConfigHistoryResponse(history=history, total=len(history))
+        # total is the full history size (not the page size) for pagination
+        return ORJSONResponse({"history": result.data, "total": result.count or 0})
 
     except Exception as e:
         logger.error(f"Error fetching agent history: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching history: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error fetching history", e))
 
 
-@router.get("/models/available", response_model=AIModelsListResponse)
-async def list_ai_models() -> AIModelsListResponse:
+@router.get(
+    "/models/available",
+    response_class=ORJSONResponse,
+    responses={200: {"model": AIModelsListResponse}},
+)
+async def list_ai_models(request: Request) -> Response:
     """
     List all available AI models for agent configuration.
 
@@ -267,27 +351,35 @@ async def list_ai_models() -> AIModelsListResponse:
     try:
         result = (
             supabase.table("ai_models")
-            .select("*")
+            .select(AI_MODEL_COLS)
             .eq("is_available", True)
             .order("provider")
             .execute()
         )
 
-        models = [AIModelResponse(**model) for model in result.data]
-
-        return AIModelsListResponse(models=models, total=len(models))
+        # Models change rarely - let browsers and proxies cache the list
+        return etag_response(
+            request,
+            {"models": result.data, "total": len(result.data)},
+            cache_control=CACHE_PUBLIC,
+        )
 
     except Exception as e:
         logger.error(f"Error listing AI models: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching models: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error fetching models", e))
 
 
-@router.post("/{agent_id}/duplicate", response_model=AgentResponse, status_code=201)
+@router.post(
+    "/{agent_id}/duplicate",
+    status_code=201,
+    response_class=ORJSONResponse,
+    responses={201: {"model": AgentResponse}},
+)
 async def duplicate_agent(
     agent_id: UUID,
     new_name: str = Query(..., description="Name for the duplicated agent"),
     new_slug: str = Query(..., description="Slug for the duplicated agent"),
-) -> AgentResponse:
+) -> ORJSONResponse:
     """
     Duplicate an existing agent with a new name.
 
@@ -300,37 +392,32 @@ async def duplicate_agent(
         Newly created agent
     """
     try:
-        # Get original agent
-        original = (
-            supabase.table("agents")
-            .select("*")
-            .eq("id", str(agent_id))
-            .single()
-            .execute()
-        )
-
-        if not original.data:
+        # Copy server-side (INSERT ... SELECT) in a single round-trip
+        if get_db_pool():
+            new_agent = await fetch_one(
+                Q_DUPLICATE_AGENT,
+                agent_id,
+                new_name,
+                new_slug,
+            )
+        else:
+            result = supabase.rpc(
+                "duplicate_agent",
+                {
+                    "p_agent_id": str(agent_id),
+                    "p_name": new_name,
+                    "p_slug": new_slug,
+                },
+            ).select(AGENT_COLS).execute()
+            new_agent = result.data[0] if result.data else None
+
+        if not new_agent:
             raise HTTPException(status_code=404, detail="Agent not found")
 
-        # Create copy with new name/slug
-        new_agent_data = {**original.data}
-        del new_agent_data["id"]
-        del new_agent_data["created_at"]
-        del new_agent_data["updated_at"]
-        new_agent_data["name"] = new_name
-        new_agent_data["slug"] = new_slug
-        new_agent_data["version"] = 1
-        new_agent_data["modified_by"] = None
-
-        result = supabase.table("agents").insert(new_agent_data).execute()
-
-        if not result.data:
-            raise HTTPException(status_code=400, detail="Failed to duplicate agent")
-
-        return AgentResponse(**result.data[0])
+        return ORJSONResponse(new_agent, status_code=201)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error duplicating agent: {e}")
-        raise HTTPException(status_code=500, detail=f"Error duplicating agent: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error duplicating agent", e))
@@ -3,16 +3,25 @@ Auth API Endpoints
 User-facing authentication endpoints.
 """
 
-from fastapi import APIRouter, HTTPException, status
+import logging
+
+from fastapi import APIRouter, HTTPException, Response, status
 from pydantic import BaseModel, EmailStr
-from supabase import create_client
+from supabase import AuthApiError
 
-from app.core.auth import AuthenticatedUser
-from app.core.config import settings
+from app.core.auth import AuthenticatedUser, UserDB
+from app.core.errors import error_detail
+from app.core.responses import model_response, rows_response
 from app.models.user import UserProfile
+from app.services.users import create_user_with_profile
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+# Columns materialized into UserProfile
+PROFILE_COLS = ",".join(UserProfile.model_fields)
+
 # Default organization for new users
 DEFAULT_ORGANIZATION_ID = "11111111-1111-1111-1111-111111111111"
 
@@ -33,92 +42,75 @@ class RegisterResponse(BaseModel):
 
 @router.post(
     "/register",
-    response_model=RegisterResponse,
     status_code=status.HTTP_201_CREATED,
+    responses={201: {"model": RegisterResponse}},
     summary="Register a new user (public)",
 )
-async def register_user(data: RegisterRequest):
+async def register_user(data: RegisterRequest) -> Response:
     """
     Public endpoint to register a new user.
 
     Creates user with email auto-confirmed (no email verification needed).
     User is assigned 'user' role and default organization.
     """
-    # Use service role to create user with confirmed email
-    admin_client = create_client(
-        settings.SUPABASE_URL,
-        settings.SUPABASE_SERVICE_ROLE_KEY,
-    )
-
     try:
-        # Create auth user with email confirmed
-        auth_response = admin_client.auth.admin.create_user(
-            {
-                "email": data.email,
-                "password": data.password,
-                "email_confirm": True,
-                "user_metadata": {
-                    "full_name": data.full_name,
-                },
-            }
+        # Auth user (email confirmed) through the auth admin API, then the
+        # profile with role and default organization
+        user_id = await create_user_with_profile(
+            email=data.email,
+            password=data.password,
+            full_name=data.full_name,
+            role="user",
+            organization_id=DEFAULT_ORGANIZATION_ID,
         )
 
-        if not auth_response.user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to create user",
-            )
-
-        user_id = auth_response.user.id
-
-        # Update profile with organization (trigger creates basic profile)
-        admin_client.table("profiles").update({
-            "full_name": data.full_name,
-            "organization_id": DEFAULT_ORGANIZATION_ID,
-            "role": "user",
-        }).eq("id", user_id).execute()
-
-        return RegisterResponse(
-            id=user_id,
-            email=data.email,
-            message="User created successfully. You can now log in.",
+        return model_response(
+            RegisterResponse(
+                id=user_id,
+                email=data.email,
+                message="User created successfully. You can now log in.",
+            ),
+            status_code=status.HTTP_201_CREATED,
         )
 
     except HTTPException:
         raise
     except Exception as e:
-        error_msg = str(e)
-        if "already been registered" in error_msg:
+        if "already been registered" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Email already registered",
             )
+        if isinstance(e, AuthApiError) and e.status < 500:
+            # Rejected by the auth server (e.g. weak password)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+        logger.error(f"Registration failed: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Registration failed: {error_msg}",
+            detail=error_detail("Registration failed", e),
         )
 
 
 @router.get(
     "/me",
-    response_model=UserProfile,
+    responses={200: {"model": UserProfile}},
     summary="Get current user profile",
 )
 async def get_current_user_profile(
     current_user: AuthenticatedUser,
-):
+    db: UserDB,
+) -> Response:
     """
     Get the currently authenticated user's profile.
 
     Returns the user's ID, email, role, and organization.
     Useful for frontend to verify authentication state.
+    The profile is read with the user's own token (RLS: own profile only).
     """
-    from app.core.supabase import supabase
-
     try:
-        response = (
-            supabase.table("profiles")
-            .select("*")
+        response = await (
+            db.table("profiles")
+            .select(PROFILE_COLS)
             .eq("id", current_user.id)
             .is_("deleted_at", "null")
             .single()
@@ -126,29 +118,18 @@ async def get_current_user_profile(
         )
 
         if not response.data:
-            from fastapi import HTTPException, status
-
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Profile not found",
             )
 
-        u = response.data
-        return UserProfile(
-            id=u["id"],
-            email=u.get("email", ""),
-            full_name=u.get("full_name"),
-            role=u.get("role", "user"),
-            organization_id=u.get("organization_id"),
-            avatar_url=u.get("avatar_url"),
-            created_at=u.get("created_at"),
-            updated_at=u.get("updated_at"),
-        )
+        return rows_response(response.data, UserProfile)
 
+    except HTTPException:
+        raise
     except Exception as e:
-        from fastapi import HTTPException, status
-
+        logger.error(f"Error fetching profile: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching profile: {str(e)}",
+            detail=error_detail("Error fetching profile", e),
         )
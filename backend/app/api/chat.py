@@ -4,49 +4,34 @@ Handles user interactions with the dynamic agent system.
 """
 
 import logging
+from collections.abc import AsyncIterator
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 
-from app.agents import run_agent
-from app.core.supabase import supabase
+from app.core.errors import error_detail
+from app.core.responses import ORJSONResponse
+from app.core.validation import body_schema, json_body
+from app.agents import run_agent, run_agent_stream
 from app.models.chat import ChatRequest, ChatResponse
+from app.services.agent_config import get_agent_config
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+ChatBody = Annotated[ChatRequest, Depends(json_body(ChatRequest))]
 
-async def get_agent_config(agent_id: str) -> dict | None:
-    """
-    Load agent configuration from database.
-
-    Args:
-        agent_id: UUID of the agent
-
-    Returns:
-        Agent configuration dict or None if not found
-    """
-    try:
-        result = (
-            supabase.table("agents")
-            .select("*")
-            .eq("id", agent_id)
-            .eq("is_active", True)
-            .single()
-            .execute()
-        )
-
-        if result.data:
-            return result.data
-        return None
 
-    except Exception as e:
-        logger.error(f"Error loading agent config: {e}")
-        return None
-
-
-@router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest) -> ChatResponse:
+@router.post(
+    "/",
+    response_class=ORJSONResponse,
+    responses={200: {"model": ChatResponse}},
+    openapi_extra=body_schema(ChatRequest),
+)
+async def chat(request: ChatBody, raw_request: Request) -> Response:
     """
     Send a message to a specific agent.
 
@@ -57,12 +42,19 @@ async def chat(request: ChatRequest) -> ChatResponse:
     If the agent has sub-agents configured, it will automatically
     orchestrate to the appropriate sub-agent based on context.
 
+    Clients sending `Accept: text/event-stream` get the response streamed
+    as Server-Sent Events (same as POST /chat/stream).
+
     Args:
         request: ChatRequest with message and agent_id
+        raw_request: Incoming HTTP request (for content negotiation)
 
     Returns:
-        ChatResponse with agent's response
+        ChatResponse with agent's response, or a StreamingResponse
     """
+    if "text/event-stream" in raw_request.headers.get("accept", ""):
+        return await chat_stream(request)
+
     try:
         logger.info(f"Chat request for agent {request.agent_id}: {request.message[:100]}...")
 
@@ -87,10 +79,12 @@ async def chat(request: ChatRequest) -> ChatResponse:
             agent_config=agent_config,
         )
 
-        return ChatResponse(
-            response=response,
-            session_id=request.session_id,
-            agent_used=agent_name,
+        return ORJSONResponse(
+            {
+                "response": response,
+                "session_id": request.session_id,
+                "agent_used": agent_name,
+            }
         )
 
     except HTTPException:
@@ -99,9 +93,64 @@ async def chat(request: ChatRequest) -> ChatResponse:
         logger.error(f"Chat error: {e}")
         raise HTTPException(
             status_code=500,
-            detail=f"Agent processing error: {str(e)}",
+            detail=error_detail("Agent processing error", e),
+        )
+
+
+async def sse_wrap(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Format text chunks as Server-Sent Events.
+
+    Emits `data: {"content": ...}` per chunk, `data: {"error": ...}` if the
+    agent fails mid-stream, and a final `data: [DONE]`.
+    """
+    try:
+        async for chunk in chunks:
+            yield f"data: {orjson.dumps({'content': chunk}).decode()}\n\n"
+    except Exception as e:
+        logger.error(f"Chat stream error: {e}")
+        yield f"data: {orjson.dumps({'error': 'Agent processing error'}).decode()}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@router.post("/stream", openapi_extra=body_schema(ChatRequest))
+async def chat_stream(request: ChatBody) -> StreamingResponse:
+    """
+    Send a message to a specific agent and stream the response.
+
+    Same as POST /chat/ but returns a text/event-stream so the first
+    tokens reach the client while the LLM is still generating.
+
+    Args:
+        request: ChatRequest with message and agent_id
+
+    Returns:
+        StreamingResponse of Server-Sent Events
+    """
+    logger.info(f"Chat stream request for agent {request.agent_id}: {request.message[:100]}...")
+
+    agent_config = await get_agent_config(request.agent_id)
+
+    if not agent_config:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Agent not found or inactive: {request.agent_id}",
         )
 
+    chunks = run_agent_stream(
+        message=request.message,
+        organization_id=request.organization_id,
+        user_id=None,  # Will be extracted from auth token later
+        store_id=request.store_id,
+        agent_config=agent_config,
+    )
+
+    return StreamingResponse(
+        sse_wrap(chunks),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @router.get("/health")
 async def chat_health() -> dict:
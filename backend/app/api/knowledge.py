@@ -4,16 +4,21 @@ Handles document management for RAG.
 """
 
 import logging
+from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Response
+from pydantic import BaseModel, Field, TypeAdapter
 
+from app.core.errors import error_detail
+from app.core.responses import ORJSONResponse, model_response, rows_response
 from app.services.knowledge_base import (
     add_document,
-    search_knowledge,
+    add_documents_bulk,
+    search_knowledge_json,
     delete_document,
-    list_documents,
+    get_document,
+    list_documents_json,
 )
 
 logger = logging.getLogger(__name__)
@@ -34,12 +39,18 @@ class DocumentCreate(BaseModel):
     source_url: str | None = None
 
 
+class DocumentBulkCreate(BaseModel):
+    """Request body for creating many documents at once."""
+
+    documents: list[DocumentCreate] = Field(..., min_length=1, max_length=2000)
+
+
 class DocumentResponse(BaseModel):
     """Response body for document data."""
 
     id: UUID
-    content: str
-    metadata: dict
+    content: str | None = None  # Omitted in list views with include_content=false
+    metadata: Any
     document_type: str
     source_url: str | None = None
     store_id: UUID | None = None
@@ -69,9 +80,9 @@ class SearchResult(BaseModel):
 
     id: UUID
     content: str
-    metadata: dict
-    document_type: str
-    similarity: float
+    metadata: Any = Field(default_factory=dict)
+    document_type: str = "general"
+    similarity: float = 0
 
 
 class SearchResponse(BaseModel):
@@ -81,11 +92,15 @@ class SearchResponse(BaseModel):
     query: str
 
 
-@router.post("/documents", response_model=DocumentResponse, status_code=201)
+# Parses and validates the search RPC's JSON array in one pydantic-core pass
+_search_results_adapter = TypeAdapter(list[SearchResult])
+
+
+@router.post("/documents", status_code=201, responses={201: {"model": DocumentResponse}})
 async def create_document(
     document: DocumentCreate,
     organization_id: UUID = Query(..., description="Organization ID"),
-) -> DocumentResponse:
+) -> Response:
     """
     Add a new document to the knowledge base.
 
@@ -110,28 +125,56 @@ async def create_document(
             source_url=document.source_url,
         )
 
-        return DocumentResponse(
-            id=result["id"],
-            content=result["content"],
-            metadata=result.get("metadata", {}),
-            document_type=result.get("document_type", "general"),
-            source_url=result.get("source_url"),
-            store_id=result.get("store_id"),
-            agent_id=result.get("agent_id"),
-            sub_agent_id=result.get("sub_agent_id"),
-            created_at=result["created_at"],
-        )
+        # add_document returns exactly the DocumentResponse columns
+        return rows_response(result, DocumentResponse, status_code=201)
 
     except Exception as e:
         logger.error(f"Error creating document: {e}")
-        raise HTTPException(status_code=500, detail=f"Error creating document: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error creating document", e))
 
 
-@router.post("/search", response_model=SearchResponse)
+@router.post(
+    "/documents/bulk",
+    status_code=201,
+    response_class=ORJSONResponse,
+    responses={201: {"model": DocumentListResponse}},
+)
+async def create_documents_bulk(
+    body: DocumentBulkCreate,
+    organization_id: UUID = Query(..., description="Organization ID"),
+) -> ORJSONResponse:
+    """
+    Add many documents to the knowledge base in one request.
+
+    Documents are embedded in batches and inserted with multi-row inserts,
+    instead of one embedding call and one insert per document.
+
+    Args:
+        body: Documents to create
+        organization_id: Organization ID
+
+    Returns:
+        Created documents
+    """
+    try:
+        documents = await add_documents_bulk(
+            organization_id,
+            [document.model_dump() for document in body.documents],
+        )
+        return ORJSONResponse(
+            {"documents": documents, "total": len(documents)}, status_code=201
+        )
+
+    except Exception as e:
+        logger.error(f"Error creating documents: {e}")
+        raise HTTPException(status_code=500, detail=error_detail("Error creating documents", e))
+
+
+@router.post("/search", responses={200: {"model": SearchResponse}})
 async def search_documents(
     search: SearchQuery,
     organization_id: UUID = Query(..., description="Organization ID"),
-) -> SearchResponse:
+) -> Response:
     """
     Search the knowledge base using semantic similarity.
 
@@ -143,7 +186,7 @@ async def search_documents(
         Matching documents with similarity scores
     """
     try:
-        results = await search_knowledge(
+        raw = await search_knowledge_json(
             organization_id=organization_id,
             query=search.query,
             store_id=search.store_id,
@@ -151,26 +194,23 @@ async def search_documents(
             match_count=search.match_count,
         )
 
-        return SearchResponse(
-            results=[
-                SearchResult(
-                    id=r["id"],
-                    content=r["content"],
-                    metadata=r.get("metadata", {}),
-                    document_type=r.get("document_type", "general"),
-                    similarity=r.get("similarity", 0),
-                )
-                for r in results
-            ],
+        # Validated straight from the response bytes, no intermediate dicts
+        results = SearchResponse(
+            results=_search_results_adapter.validate_json(raw),
             query=search.query,
         )
+        return model_response(results)
 
     except Exception as e:
         logger.error(f"Error searching: {e}")
-        raise HTTPException(status_code=500, detail=f"Error searching: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error searching", e))
 
 
-@router.get("/documents", response_model=DocumentListResponse)
+@router.get(
+    "/documents",
+    response_class=ORJSONResponse,
+    responses={200: {"model": DocumentListResponse}},
+)
 async def get_documents(
     organization_id: UUID = Query(..., description="Organization ID"),
     store_id: UUID = Query(None, description="Filter by store"),
@@ -179,7 +219,8 @@ async def get_documents(
     document_type: str = Query(None, description="Filter by type"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
-) -> DocumentListResponse:
+    include_content: bool = Query(True, description="Include the document body (use GET /documents/{id} otherwise)"),
+) -> Response:
     """
     List documents in the knowledge base.
 
@@ -190,12 +231,13 @@ async def get_documents(
         document_type: Optional type filter
         limit: Max results
         offset: Pagination offset
+        include_content: If false, skip the content column (smaller payload)
 
     Returns:
         List of documents
     """
     try:
-        results = await list_documents(
+        documents, total = await list_documents_json(
             organization_id=organization_id,
             store_id=store_id,
             agent_id=agent_id,
@@ -203,44 +245,57 @@ async def get_documents(
             document_type=document_type,
             limit=limit,
             offset=offset,
+            include_content=include_content,
         )
 
-        documents = [
-            DocumentResponse(
-                id=r["id"],
-                content=r["content"],
-                metadata=r.get("metadata", {}),
-                document_type=r.get("document_type", "general"),
-                source_url=r.get("source_url"),
-                store_id=r.get("store_id"),
-                agent_id=r.get("agent_id"),
-                sub_agent_id=r.get("sub_agent_id"),
-                created_at=r["created_at"],
-            )
-            for r in results
-        ]
-
-        return DocumentListResponse(documents=documents, total=len(documents))
+        # The rows already select exactly the DocumentResponse columns, so
+        # PostgREST's JSON array is spliced into the body without decoding it
+        return Response(
+            content=b'{"documents":' + documents + b',"total":%d}' % total,
+            media_type="application/json",
+        )
 
     except Exception as e:
         logger.error(f"Error listing documents: {e}")
-        raise HTTPException(status_code=500, detail=f"Error listing documents: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error listing documents", e))
+
+
+@router.get(
+    "/documents/{document_id}",
+    response_class=ORJSONResponse,
+    responses={200: {"model": DocumentResponse}},
+)
+async def get_document_by_id(
+    document_id: UUID,
+    organization_id: UUID = Query(..., description="Organization ID"),
+) -> ORJSONResponse:
+    """
+    Get a single document including its full content.
+
+    Args:
+        document_id: ID of the document
+        organization_id: Organization ID
+
+    Returns:
+        Document data
+    """
+    document = await get_document(document_id, organization_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return ORJSONResponse(document)
 
 
 @router.delete("/documents/{document_id}", status_code=204)
-async def remove_document(document_id: UUID) -> None:
+async def remove_document(document_id: UUID, background_tasks: BackgroundTasks) -> Response:
     """
     Delete a document from the knowledge base.
 
+    The delete is idempotent, so the 204 is sent right away and the row
+    is removed in a background task (failures are logged).
+
     Args:
         document_id: ID of document to delete
+        background_tasks: FastAPI background task queue
     """
-    try:
-        success = await delete_document(document_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="Document not found")
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error deleting document: {e}")
-        raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
+    background_tasks.add_task(delete_document, document_id)
+    return Response(status_code=204)
@@ -6,8 +6,11 @@ Handles CRUD operations for stores.
 import logging
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Response
 
+from app.core.db import fetch_all, fetch_one, get_db_pool
+from app.core.errors import error_detail
+from app.core.responses import ORJSONResponse, etag_response
 from app.core.supabase import supabase
 from app.models.store import StoreCreate, StoreResponse, StoreListResponse
 
@@ -15,12 +18,28 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/stores", tags=["stores"])
 
+# Endpoints return rows as-is, so select exactly the response fields
+STORE_COLS = ",".join(StoreResponse.model_fields)
 
-@router.get("/", response_model=StoreListResponse)
+# Direct pool queries, kept constant so asyncpg's per-connection statement
+# cache parses and plans each one only once
+Q_LIST_STORES = (
+    f"SELECT {STORE_COLS} FROM stores"
+    " WHERE organization_id = $1 AND ($2::bool OR is_active) ORDER BY created_at"
+)
+Q_GET_STORE = f"SELECT {STORE_COLS} FROM stores WHERE id = $1"
+Q_GET_STORE_BY_SLUG = f"SELECT {STORE_COLS} FROM stores WHERE organization_id = $1 AND slug = $2"
+
+
+@router.get(
+    "/",
+    response_class=ORJSONResponse,
+    responses={200: {"model": StoreListResponse}},
+)
 async def list_stores(
     organization_id: UUID = Query(..., description="Organization ID"),
     active_only: bool = Query(True, description="Filter to active stores only"),
-) -> StoreListResponse:
+) -> ORJSONResponse:
     """
     List all stores for an organization.
 
@@ -32,61 +51,78 @@ async def list_stores(
         List of stores
     """
     try:
-        query = supabase.table("stores").select("*").eq(
-            "organization_id", str(organization_id)
-        )
-
-        if active_only:
-            query = query.eq("is_active", True)
+        if get_db_pool():
+            stores = await fetch_all(
+                Q_LIST_STORES,
+                organization_id,
+                not active_only,
+            )
+        else:
+            query = supabase.table("stores").select(STORE_COLS).eq(
+                "organization_id", str(organization_id)
+            )
 
-        result = query.order("created_at", desc=False).execute()
+            if active_only:
+                query = query.eq("is_active", True)
 
-        stores = [StoreResponse(**store) for store in result.data]
+            stores = query.order("created_at", desc=False).execute().data
 
-        return StoreListResponse(stores=stores, total=len(stores))
+        return ORJSONResponse({"stores": stores, "total": len(stores)})
 
     except Exception as e:
         logger.error(f"Error listing stores: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching stores: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error fetching stores", e))
 
 
-@router.get("/{store_id}", response_model=StoreResponse)
-async def get_store(store_id: UUID) -> StoreResponse:
+@router.get(
+    "/{store_id}",
+    response_class=ORJSONResponse,
+    responses={200: {"model": StoreResponse}},
+)
+async def get_store(store_id: UUID, request: Request) -> Response:
     """
     Get a single store by ID.
 
     Args:
         store_id: UUID of the store
+        request: Incoming request (for If-None-Match)
 
     Returns:
         Store data
     """
     try:
-        result = (
-            supabase.table("stores")
-            .select("*")
-            .eq("id", str(store_id))
-            .single()
-            .execute()
-        )
-
-        if not result.data:
+        if get_db_pool():
+            store = await fetch_one(Q_GET_STORE, store_id)
+        else:
+            store = (
+                supabase.table("stores")
+                .select(STORE_COLS)
+                .eq("id", str(store_id))
+                .single()
+                .execute()
+            ).data
+
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
 
-        return StoreResponse(**result.data)
+        return etag_response(request, store)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting store: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching store: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error fetching store", e))
 
 
-@router.get("/slug/{slug}", response_model=StoreResponse)
+@router.get(
+    "/slug/{slug}",
+    response_class=ORJSONResponse,
+    responses={200: {"model": StoreResponse}},
+)
 async def get_store_by_slug(
     slug: str,
     organization_id: UUID = Query(..., description="Organization ID"),
-) -> StoreResponse:
+) -> ORJSONResponse:
     """
     Get a store by its slug within an organization.
 
@@ -98,29 +134,41 @@ async def get_store_by_slug(
         Store data
     """
     try:
-        result = (
-            supabase.table("stores")
-            .select("*")
-            .eq("organization_id", str(organization_id))
-            .eq("slug", slug)
-            .single()
-            .execute()
-        )
-
-        if not result.data:
+        if get_db_pool():
+            store = await fetch_one(
+                Q_GET_STORE_BY_SLUG,
+                organization_id,
+                slug,
+            )
+        else:
+            store = (
+                supabase.table("stores")
+                .select(STORE_COLS)
+                .eq("organization_id", str(organization_id))
+                .eq("slug", slug)
+                .single()
+                .execute()
+            ).data
+
+        if not store:
             raise HTTPException(status_code=404, detail="Store not found")
 
-        return StoreResponse(**result.data)
+        return ORJSONResponse(store)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting store by slug: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching store: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error fetching store", e))
 
 
-@router.post("/", response_model=StoreResponse, status_code=201)
-async def create_store(store: StoreCreate) -> StoreResponse:
+@router.post(
+    "/",
+    status_code=201,
+    response_class=ORJSONResponse,
+    responses={201: {"model": StoreResponse}},
+)
+async def create_store(store: StoreCreate) -> ORJSONResponse:
     """
     Create a new store.
 
@@ -134,29 +182,39 @@ async def create_store(store: StoreCreate) -> StoreResponse:
         result = (
             supabase.table("stores")
             .insert(store.model_dump(mode="json"))
+            .select(STORE_COLS)
             .execute()
         )
 
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to create store")
 
-        return StoreResponse(**result.data[0])
+        return ORJSONResponse(result.data[0], status_code=201)
 
     except Exception as e:
         logger.error(f"Error creating store: {e}")
-        raise HTTPException(status_code=500, detail=f"Error creating store: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error creating store", e))
+
+
+def _delete_store_row(store_id: UUID) -> None:
+    """Delete a store row (runs after the response)."""
+    try:
+        supabase.table("stores").delete().eq("id", str(store_id)).execute()
+    except Exception as e:
+        logger.error(f"Error deleting store {store_id}: {e}")
 
 
 @router.delete("/{store_id}", status_code=204)
-async def delete_store(store_id: UUID) -> None:
+async def delete_store(store_id: UUID, background_tasks: BackgroundTasks) -> Response:
     """
     Delete a store.
 
+    The delete is idempotent, so the 204 is sent right away and the row
+    is removed in a background task.
+
     Args:
         store_id: UUID of the store to delete
+        background_tasks: FastAPI background task queue
     """
-    try:
-        supabase.table("stores").delete().eq("id", str(store_id)).execute()
-    except Exception as e:
-        logger.error(f"Error deleting store: {e}")
-        raise HTTPException(status_code=500, detail=f"Error deleting store: {str(e)}")
+    background_tasks.add_task(_delete_store_row, store_id)
+    return Response(status_code=204)
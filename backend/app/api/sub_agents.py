@@ -9,33 +9,60 @@ from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Query
 
-from app.core.supabase import supabase
+from app.core.errors import error_detail
+from app.core.responses import ORJSONResponse
+from app.core.supabase import async_supabase
 from app.models.sub_agent import (
     SubAgentCreate,
     SubAgentUpdate,
     SubAgentResponse,
     SubAgentListResponse,
 )
+from app.services.agent_config import invalidate_agent
+from app.services.sub_agents import invalidate_sub_agents
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/agents", tags=["sub-agents"])
 
+# Endpoints return rows as-is, so select exactly the response fields
+SUB_AGENT_COLS = ",".join(SubAgentResponse.model_fields)
+
+
+# Slug filtering: everything except ASCII letters, digits, whitespace and
+# "-" is deleted in one C-level translate pass, then runs are collapsed
+_SLUG_ALLOWED = set(b"abcdefghijklmnopqrstuvwxyz0123456789-") | {
+    c for c in range(128) if chr(c).isspace()
+}
+_SLUG_DELETE = bytes(c for c in range(256) if c not in _SLUG_ALLOWED)
+_SLUG_COLLAPSE = re.compile(r"[\s-]+")
+
 
 def generate_slug(name: str) -> str:
     """Generate a URL-friendly slug from a name."""
     slug = name.lower().strip()
-    slug = re.sub(r'[^a-z0-9\s-]', '', slug)
-    slug = re.sub(r'[\s_]+', '-', slug)
-    slug = re.sub(r'-+', '-', slug)
-    return slug[:50]
+    if not slug.isascii():
+        # Unicode whitespace still separates words; encode() would drop it
+        slug = " ".join(slug.split())
+    slug = slug.encode("ascii", "ignore").translate(None, _SLUG_DELETE)
+    return _SLUG_COLLAPSE.sub("-", slug.decode())[:50]
+
+
+def _sub_agents_changed(agent_id: UUID) -> None:
+    """Drop cached parent config and sub-agent reads after a write."""
+    invalidate_agent(agent_id)
+    invalidate_sub_agents(agent_id)
 
 
-@router.get("/{agent_id}/sub-agents", response_model=SubAgentListResponse)
+@router.get(
+    "/{agent_id}/sub-agents",
+    response_class=ORJSONResponse,
+    responses={200: {"model": SubAgentListResponse}},
+)
 async def list_sub_agents(
     agent_id: UUID,
     active_only: bool = Query(False, description="Filter to active sub-agents only"),
-) -> SubAgentListResponse:
+) -> ORJSONResponse:
     """
     List all sub-agents for an orchestrator agent.
 
@@ -46,12 +73,14 @@ async def list_sub_agents(
     Returns:
         List of sub-agents
     """
+    parent_id = str(agent_id)
+
     try:
         # Verify parent agent exists and is an orchestrator
-        parent = (
-            supabase.table("agents")
+        parent = await (
+            async_supabase.table("agents")
             .select("id, is_orchestrator")
-            .eq("id", str(agent_id))
+            .eq("id", parent_id)
             .single()
             .execute()
         )
@@ -61,32 +90,35 @@ async def list_sub_agents(
 
         # Build query
         query = (
-            supabase.table("sub_agents")
-            .select("*")
-            .eq("parent_agent_id", str(agent_id))
+            async_supabase.table("sub_agents")
+            .select(SUB_AGENT_COLS)
+            .eq("parent_agent_id", parent_id)
         )
 
         if active_only:
             query = query.eq("is_active", True)
 
-        result = query.order("created_at", desc=False).execute()
+        result = await query.order("created_at", desc=False).execute()
 
-        sub_agents = [SubAgentResponse(**sa) for sa in result.data]
-
-        return SubAgentListResponse(sub_agents=sub_agents, total=len(sub_agents))
+        payload = {"sub_agents": result.data, "total": len(result.data)}
+        return ORJSONResponse(payload)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error listing sub-agents: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching sub-agents: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error fetching sub-agents", e))
 
 
-@router.get("/{agent_id}/sub-agents/{sub_agent_id}", response_model=SubAgentResponse)
+@router.get(
+    "/{agent_id}/sub-agents/{sub_agent_id}",
+    response_class=ORJSONResponse,
+    responses={200: {"model": SubAgentResponse}},
+)
 async def get_sub_agent(
     agent_id: UUID,
     sub_agent_id: UUID,
-) -> SubAgentResponse:
+) -> ORJSONResponse:
     """
     Get a single sub-agent by ID.
 
@@ -98,9 +130,9 @@ async def get_sub_agent(
         Sub-agent data
     """
     try:
-        result = (
-            supabase.table("sub_agents")
-            .select("*")
+        result = await (
+            async_supabase.table("sub_agents")
+            .select(SUB_AGENT_COLS)
             .eq("id", str(sub_agent_id))
             .eq("parent_agent_id", str(agent_id))
             .single()
@@ -110,21 +142,26 @@ async def get_sub_agent(
         if not result.data:
             raise HTTPException(status_code=404, detail="Sub-agent not found")
 
-        return SubAgentResponse(**result.data)
+        return ORJSONResponse(result.data)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting sub-agent: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching sub-agent: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error fetching sub-agent", e))
 
 
-@router.post("/{agent_id}/sub-agents", response_model=SubAgentResponse, status_code=201)
+@router.post(
+    "/{agent_id}/sub-agents",
+    status_code=201,
+    response_class=ORJSONResponse,
+    responses={201: {"model": SubAgentResponse}},
+)
 async def create_sub_agent(
     agent_id: UUID,
     sub_agent: SubAgentCreate,
     created_by: UUID = Query(..., description="User ID creating the sub-agent"),
-) -> SubAgentResponse:
+) -> ORJSONResponse:
     """
     Create a new sub-agent for an orchestrator agent.
 
@@ -136,12 +173,14 @@ async def create_sub_agent(
     Returns:
         Created sub-agent
     """
+    parent_id = str(agent_id)
+
     try:
         # Get parent agent to verify it exists and get organization_id
-        parent = (
-            supabase.table("agents")
+        parent = await (
+            async_supabase.table("agents")
             .select("id, organization_id, is_orchestrator")
-            .eq("id", str(agent_id))
+            .eq("id", parent_id)
             .single()
             .execute()
         )
@@ -151,7 +190,7 @@ async def create_sub_agent(
 
         # Prepare sub-agent data
         sub_agent_data = sub_agent.model_dump(mode="json")
-        sub_agent_data["parent_agent_id"] = str(agent_id)
+        sub_agent_data["parent_agent_id"] = parent_id
         sub_agent_data["organization_id"] = parent.data["organization_id"]
         sub_agent_data["created_by"] = str(created_by)
 
@@ -159,32 +198,40 @@ async def create_sub_agent(
         if not sub_agent_data.get("slug"):
             sub_agent_data["slug"] = generate_slug(sub_agent_data["name"])
 
-        result = (
-            supabase.table("sub_agents")
+        result = await (
+            async_supabase.table("sub_agents")
             .insert(sub_agent_data)
+            .select(SUB_AGENT_COLS)
             .execute()
         )
 
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to create sub-agent")
 
+        # Parent's has_sub_agents flag changed in the database
+        _sub_agents_changed(agent_id)
+
         logger.info(f"Created sub-agent {result.data[0]['id']} for agent {agent_id}")
-        return SubAgentResponse(**result.data[0])
+        return ORJSONResponse(result.data[0], status_code=201)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error creating sub-agent: {e}")
-        raise HTTPException(status_code=500, detail=f"Error creating sub-agent: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error creating sub-agent", e))
 
 
-@router.patch("/{agent_id}/sub-agents/{sub_agent_id}", response_model=SubAgentResponse)
+@router.patch(
+    "/{agent_id}/sub-agents/{sub_agent_id}",
+    response_class=ORJSONResponse,
+    responses={200: {"model": SubAgentResponse}},
+)
 async def update_sub_agent(
     agent_id: UUID,
     sub_agent_id: UUID,
     sub_agent_update: SubAgentUpdate,
     modified_by: UUID = Query(..., description="User ID making the change"),
-) -> SubAgentResponse:
+) -> ORJSONResponse:
     """
     Update a sub-agent's configuration.
 
@@ -198,24 +245,8 @@ async def update_sub_agent(
         Updated sub-agent
     """
     try:
-        # Verify sub-agent exists and belongs to this parent
-        existing = (
-            supabase.table("sub_agents")
-            .select("id")
-            .eq("id", str(sub_agent_id))
-            .eq("parent_agent_id", str(agent_id))
-            .single()
-            .execute()
-        )
-
-        if not existing.data:
-            raise HTTPException(status_code=404, detail="Sub-agent not found")
-
         # Build update data, excluding None values
-        update_data = {
-            k: v for k, v in sub_agent_update.model_dump(mode="json").items()
-            if v is not None
-        }
+        update_data = sub_agent_update.model_dump(mode="json", exclude_none=True, exclude_unset=True)
 
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
@@ -227,24 +258,29 @@ async def update_sub_agent(
         if "name" in update_data and "slug" not in update_data:
             update_data["slug"] = generate_slug(update_data["name"])
 
-        result = (
-            supabase.table("sub_agents")
+        # The parent predicate doubles as the existence/ownership check
+        result = await (
+            async_supabase.table("sub_agents")
             .update(update_data)
             .eq("id", str(sub_agent_id))
+            .eq("parent_agent_id", str(agent_id))
+            .select(SUB_AGENT_COLS)
             .execute()
         )
 
         if not result.data:
             raise HTTPException(status_code=404, detail="Sub-agent not found")
 
+        _sub_agents_changed(agent_id)
+
         logger.info(f"Updated sub-agent {sub_agent_id}")
-        return SubAgentResponse(**result.data[0])
+        return ORJSONResponse(result.data[0])
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error updating sub-agent: {e}")
-        raise HTTPException(status_code=500, detail=f"Error updating sub-agent: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error updating sub-agent", e))
 
 
 @router.delete("/{agent_id}/sub-agents/{sub_agent_id}", status_code=204)
@@ -262,21 +298,20 @@ async def delete_sub_agent(
         sub_agent_id: UUID of the sub-agent to delete
     """
     try:
-        # Verify sub-agent exists and belongs to this parent
-        existing = (
-            supabase.table("sub_agents")
-            .select("id")
+        # Delete (cascades to knowledge_base via FK); no rows means the
+        # sub-agent does not exist or belongs to another parent
+        result = await (
+            async_supabase.table("sub_agents")
+            .delete()
             .eq("id", str(sub_agent_id))
             .eq("parent_agent_id", str(agent_id))
-            .single()
             .execute()
         )
 
-        if not existing.data:
+        if not result.data:
             raise HTTPException(status_code=404, detail="Sub-agent not found")
 
-        # Delete (cascades to knowledge_base via FK)
-        supabase.table("sub_agents").delete().eq("id", str(sub_agent_id)).execute()
+        _sub_agents_changed(agent_id)
 
         logger.info(f"Deleted sub-agent {sub_agent_id}")
 
@@ -284,16 +319,21 @@ async def delete_sub_agent(
         raise
     except Exception as e:
         logger.error(f"Error deleting sub-agent: {e}")
-        raise HTTPException(status_code=500, detail=f"Error deleting sub-agent: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error deleting sub-agent", e))
 
 
-@router.post("/{agent_id}/sub-agents/{sub_agent_id}/duplicate", response_model=SubAgentResponse, status_code=201)
+@router.post(
+    "/{agent_id}/sub-agents/{sub_agent_id}/duplicate",
+    status_code=201,
+    response_class=ORJSONResponse,
+    responses={201: {"model": SubAgentResponse}},
+)
 async def duplicate_sub_agent(
     agent_id: UUID,
     sub_agent_id: UUID,
     new_name: str = Query(..., description="Name for the duplicated sub-agent"),
     created_by: UUID = Query(..., description="User ID creating the duplicate"),
-) -> SubAgentResponse:
+) -> ORJSONResponse:
     """
     Duplicate an existing sub-agent.
 
@@ -308,8 +348,8 @@ async def duplicate_sub_agent(
     """
     try:
         # Get original sub-agent
-        original = (
-            supabase.table("sub_agents")
+        original = await (
+            async_supabase.table("sub_agents")
             .select("*")
             .eq("id", str(sub_agent_id))
             .eq("parent_agent_id", str(agent_id))
@@ -320,26 +360,34 @@ async def duplicate_sub_agent(
         if not original.data:
             raise HTTPException(status_code=404, detail="Sub-agent not found")
 
-        # Create copy with new name/slug
-        new_sub_agent_data = {**original.data}
-        del new_sub_agent_data["id"]
-        del new_sub_agent_data["created_at"]
-        del new_sub_agent_data["updated_at"]
-        new_sub_agent_data["name"] = new_name
-        new_sub_agent_data["slug"] = generate_slug(new_name)
-        new_sub_agent_data["created_by"] = str(created_by)
-        new_sub_agent_data["modified_by"] = None
+        # Reuse the fetched row as the insert payload (no copy)
+        new_sub_agent_data = original.data
+        for key in ("id", "created_at", "updated_at"):
+            new_sub_agent_data.pop(key, None)
+        new_sub_agent_data.update(
+            name=new_name,
+            slug=generate_slug(new_name),
+            created_by=str(created_by),
+            modified_by=None,
+        )
 
-        result = supabase.table("sub_agents").insert(new_sub_agent_data).execute()
+        result = await (
+            async_supabase.table("sub_agents")
+            .insert(new_sub_agent_data)
+            .select(SUB_AGENT_COLS)
+            .execute()
+        )
 
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to duplicate sub-agent")
 
+        _sub_agents_changed(agent_id)
+
         logger.info(f"Duplicated sub-agent {sub_agent_id} to {result.data[0]['id']}")
-        return SubAgentResponse(**result.data[0])
+        return ORJSONResponse(result.data[0], status_code=201)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error duplicating sub-agent: {e}")
-        raise HTTPException(status_code=500, detail=f"Error duplicating sub-agent: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error duplicating sub-agent", e))
@@ -3,13 +3,21 @@ Threads API Endpoint
 Handles chat threads and messages.
 """
 
+import asyncio
 import logging
+from collections.abc import AsyncIterator
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from app.core.supabase import supabase
-from app.agents import run_agent
+from app.core.errors import error_detail
+from app.core.responses import ORJSONResponse, check_rows, rows_response
+from app.core.supabase import async_supabase
+from app.core.validation import body_schema, json_body
+from app.agents import run_agent, run_agent_stream
 from app.models.thread import (
     ThreadCreate,
     ThreadResponse,
@@ -24,8 +32,22 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/threads", tags=["threads"])
 
+# Endpoints return rows as-is, so select exactly the response fields
+THREAD_COLS = "id,user_id,organization_id,store_id,agent_id,title,status,created_at,updated_at"
+# Agent summary embedded in thread lists (saves the client a fetch per agent)
+THREAD_AGENT_EMBED = "agent:agents(id,name,slug,ai_model,welcome_message)"
+# chat_messages uses session_id as the FK; alias it to the API's thread_id
+MESSAGE_COLS = "id,thread_id:session_id,role,content,created_at,metadata"
 
-@router.get("/", response_model=ThreadListResponse)
+# Agent fields run_agent needs for a thread reply
+AGENT_CONFIG_COLS = "id, name, slug, role, system_prompt, ai_model, temperature, max_tokens, welcome_message, capabilities, updated_at"
+
+
+@router.get(
+    "/",
+    response_class=ORJSONResponse,
+    responses={200: {"model": ThreadListResponse}},
+)
 async def list_threads(
     organization_id: UUID = Query(..., description="Organization ID"),
     user_id: UUID = Query(None, description="Filter by user ID"),
@@ -33,7 +55,7 @@ async def list_threads(
     agent_id: UUID = Query(None, description="Filter by agent ID"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
-) -> ThreadListResponse:
+) -> ORJSONResponse:
     """
     List chat threads for an organization.
 
@@ -49,7 +71,7 @@ async def list_threads(
         List of threads
     """
     try:
-        query = supabase.table("chat_sessions").select("*").eq(
+        query = async_supabase.table("chat_sessions").select(f"{THREAD_COLS},{THREAD_AGENT_EMBED}", count="exact").eq(
             "organization_id", str(organization_id)
         )
 
@@ -60,25 +82,29 @@ async def list_threads(
         if agent_id:
             query = query.eq("agent_id", str(agent_id))
 
-        result = (
+        result = await (
             query.order("updated_at", desc=True)
             .range(offset, offset + limit - 1)
             .execute()
         )
 
-        threads = [ThreadResponse(**thread) for thread in result.data]
-
-        return ThreadListResponse(threads=threads, total=len(threads))
+        # total is the full match count (not the page size) for pagination
+        payload = {"threads": result.data, "total": result.count or 0}
+        return rows_response(payload, ThreadListResponse)
 
     except Exception as e:
         logger.error(f"Error listing threads: {e}")
         raise HTTPException(
-            status_code=500, detail=f"Error fetching threads: {str(e)}"
+            status_code=500, detail=error_detail("Error fetching threads", e)
         )
 
 
-@router.get("/{thread_id}", response_model=ThreadWithMessagesResponse)
-async def get_thread(thread_id: UUID) -> ThreadWithMessagesResponse:
+@router.get(
+    "/{thread_id}",
+    response_class=ORJSONResponse,
+    responses={200: {"model": ThreadWithMessagesResponse}},
+)
+async def get_thread(thread_id: UUID) -> ORJSONResponse:
     """
     Get a thread with all its messages.
 
@@ -89,11 +115,13 @@ async def get_thread(thread_id: UUID) -> ThreadWithMessagesResponse:
         Thread data with messages
     """
     try:
-        # Get thread
-        thread_result = (
-            supabase.table("chat_sessions")
-            .select("*")
+        # Thread and its messages in one request (PostgREST embedded select,
+        # renamed to the API's "messages")
+        thread_result = await (
+            async_supabase.table("chat_sessions")
+            .select(f"{THREAD_COLS},messages:chat_messages({MESSAGE_COLS})")
             .eq("id", str(thread_id))
+            .order("created_at", foreign_table="messages")
             .single()
             .execute()
         )
@@ -101,47 +129,26 @@ async def get_thread(thread_id: UUID) -> ThreadWithMessagesResponse:
         if not thread_result.data:
             raise HTTPException(status_code=404, detail="Thread not found")
 
-        # Get messages (session_id is the FK column in chat_messages)
-        messages_result = (
-            supabase.table("chat_messages")
-            .select("*")
-            .eq("session_id", str(thread_id))
-            .order("created_at", desc=False)
-            .execute()
-        )
-
-        # Map session_id to thread_id for API response
-        messages = [
-            MessageResponse(
-                id=msg["id"],
-                thread_id=msg["session_id"],
-                role=msg["role"],
-                content=msg["content"],
-                created_at=msg["created_at"],
-                token_count=msg.get("token_count"),
-                metadata=msg.get("metadata", {}),
-            )
-            for msg in messages_result.data
-        ]
-
-        return ThreadWithMessagesResponse(
-            **thread_result.data,
-            messages=messages,
-        )
+        return rows_response(thread_result.data, ThreadWithMessagesResponse)
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting thread: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching thread: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error fetching thread", e))
 
 
-@router.post("/", response_model=ThreadResponse, status_code=201)
+@router.post(
+    "/",
+    status_code=201,
+    response_class=ORJSONResponse,
+    responses={201: {"model": ThreadResponse}},
+)
 async def create_thread(
     thread: ThreadCreate,
     organization_id: UUID = Query(..., description="Organization ID"),
     user_id: UUID = Query(..., description="User ID"),
-) -> ThreadResponse:
+) -> ORJSONResponse:
     """
     Create a new chat thread.
 
@@ -163,39 +170,164 @@ async def create_thread(
             "status": "active",
         }
 
-        result = supabase.table("chat_sessions").insert(data).execute()
+        result = await (
+            async_supabase.table("chat_sessions")
+            .insert(data)
+            .select(THREAD_COLS)
+            .execute()
+        )
 
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to create thread")
 
-        return ThreadResponse(**result.data[0])
+        return ORJSONResponse(result.data[0], status_code=201)
 
     except Exception as e:
         logger.error(f"Error creating thread: {e}")
-        raise HTTPException(status_code=500, detail=f"Error creating thread: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error creating thread", e))
+
+
+async def _insert_message(thread_id: str, role: str, content: str) -> dict | None:
+    """Save a chat message (using session_id as the FK column) and return it in the API shape."""
+    result = await (
+        async_supabase.table("chat_messages")
+        .insert({"session_id": thread_id, "role": role, "content": content})
+        .select(MESSAGE_COLS)
+        .execute()
+    )
+    return check_rows(result.data[0], MessageResponse) if result.data else None
+
+
+async def _load_thread_agent(agent_id: str | None) -> dict | None:
+    """Fetch the agent configuration for a thread (None if unset or on error)."""
+    if not agent_id:
+        return None
+    try:
+        agent_result = await (
+            async_supabase.table("agents")
+            .select(AGENT_CONFIG_COLS)
+            .eq("id", agent_id)
+            .single()
+            .execute()
+        )
+        agent_config = agent_result.data
+        if agent_config:
+            logger.info(f"Loaded agent config: {agent_config.get('name')} (model: {agent_config.get('ai_model')})")
+        return agent_config
+    except Exception as e:
+        logger.warning(f"Failed to load agent config: {e}")
+        return None
+
+
+async def _touch_thread(thread_id: str) -> None:
+    """Bump the thread's updated_at (runs after the response)."""
+    try:
+        await async_supabase.table("chat_sessions").update(
+            {"updated_at": "now()"}
+        ).eq("id", thread_id).execute()
+    except Exception as e:
+        logger.error(f"Error updating thread {thread_id}: {e}")
+
+
+AGENT_ERROR_MESSAGE = "Lo siento, hubo un error procesando tu mensaje. Por favor intenta de nuevo."
+
+
+def _sse(payload: dict) -> bytes:
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
 
 
-@router.post("/{thread_id}/messages", response_model=SendMessageResponse)
+async def _message_events(
+    thread_id: str,
+    thread: dict,
+    message: str,
+    agent_config: dict | None,
+    user_insert: asyncio.Task,
+) -> AsyncIterator[bytes]:
+    """
+    Stream a thread reply as Server-Sent Events.
+
+    Emits `{"user_message": ...}` once the user message is saved, then
+    `{"delta": ...}` per response chunk, and finally `{"done": ...}` with
+    the saved assistant message (or `{"error": ...}`).
+    """
+    try:
+        msg_data = await user_insert
+    except Exception as e:
+        logger.error(f"Error saving user message in thread {thread_id}: {e}")
+        msg_data = None
+    if not msg_data:
+        yield _sse({"error": "Failed to save user message"})
+        return
+    yield _sse({"user_message": msg_data})
+
+    parts = []
+    try:
+        async for chunk in run_agent_stream(
+            message=message,
+            organization_id=UUID(thread["organization_id"]) if thread.get("organization_id") else None,
+            user_id=thread.get("user_id"),
+            store_id=UUID(thread["store_id"]) if thread.get("store_id") else None,
+            agent_config=agent_config,
+        ):
+            parts.append(chunk)
+            yield _sse({"delta": chunk})
+    except Exception as e:
+        logger.error(f"Agent stream error: {e}")
+        parts = [AGENT_ERROR_MESSAGE]
+        yield _sse({"delta": AGENT_ERROR_MESSAGE})
+
+    try:
+        asst_data = await _insert_message(
+            thread_id, "assistant", "".join(parts) or "No response generated."
+        )
+    except Exception as e:
+        logger.error(f"Error saving assistant message in thread {thread_id}: {e}")
+        asst_data = None
+    if not asst_data:
+        yield _sse({"error": "Failed to save assistant message"})
+        return
+    yield _sse({"done": {"assistant_message": asst_data}})
+
+
+@router.post(
+    "/{thread_id}/messages",
+    response_class=ORJSONResponse,
+    responses={200: {"model": SendMessageResponse}},
+    openapi_extra=body_schema(SendMessageRequest),
+)
 async def send_message(
     thread_id: UUID,
-    request: SendMessageRequest,
-) -> SendMessageResponse:
+    request: Annotated[SendMessageRequest, Depends(json_body(SendMessageRequest))],
+    background_tasks: BackgroundTasks,
+    raw_request: Request,
+) -> Response:
     """
     Send a message in a thread and get AI response.
 
+    The user message is saved while the agent runs (it is persisted even
+    if the agent fails); the thread's updated_at is bumped after the response.
+
+    Clients sending `Accept: text/event-stream` get the reply streamed as
+    Server-Sent Events instead of waiting for the full completion.
+
     Args:
         thread_id: UUID of the thread
         request: Message content
+        background_tasks: FastAPI background task queue
+        raw_request: Incoming HTTP request (for content negotiation)
 
     Returns:
-        User message and AI response
+        User message and AI response, or a StreamingResponse
     """
+    # Reused by every query below
+    thread_key = str(thread_id)
+
     try:
         # Verify thread exists
-        thread_result = (
-            supabase.table("chat_sessions")
+        thread_result = await (
+            async_supabase.table("chat_sessions")
             .select("*")
-            .eq("id", str(thread_id))
+            .eq("id", thread_key)
             .single()
             .execute()
         )
@@ -205,109 +337,62 @@ async def send_message(
 
         thread = thread_result.data
 
-        # Save user message (using session_id as the FK column)
-        user_message_data = {
-            "session_id": str(thread_id),
-            "role": "user",
-            "content": request.message,
-        }
-
-        user_msg_result = (
-            supabase.table("chat_messages")
-            .insert(user_message_data)
-            .execute()
+        # Save the user message concurrently with the agent config load and
+        # the LLM call; it is awaited before the assistant reply is saved
+        # so message order is preserved
+        user_insert = asyncio.create_task(
+            _insert_message(thread_key, "user", request.message)
         )
 
-        if not user_msg_result.data:
-            raise HTTPException(status_code=400, detail="Failed to save user message")
+        agent_config = await _load_thread_agent(thread.get("agent_id"))
 
-        msg_data = user_msg_result.data[0]
-        user_message = MessageResponse(
-            id=msg_data["id"],
-            thread_id=msg_data["session_id"],
-            role=msg_data["role"],
-            content=msg_data["content"],
-            created_at=msg_data["created_at"],
-            token_count=msg_data.get("token_count"),
-            metadata=msg_data.get("metadata", {}),
-        )
+        # Update thread's updated_at once the response is sent
+        background_tasks.add_task(_touch_thread, thread_key)
 
-        # Fetch agent configuration if agent_id is set
-        agent_config = None
-        agent_id = thread.get("agent_id")
-        if agent_id:
-            try:
-                agent_result = (
-                    supabase.table("agents")
-                    .select("id, name, slug, role, system_prompt, ai_model, temperature, max_tokens, welcome_message, capabilities")
-                    .eq("id", agent_id)
-                    .single()
-                    .execute()
-                )
-                if agent_result.data:
-                    agent_config = agent_result.data
-                    logger.info(f"Loaded agent config: {agent_config.get('name')} (model: {agent_config.get('ai_model')})")
-            except Exception as e:
-                logger.warning(f"Failed to load agent config: {e}")
+        if "text/event-stream" in raw_request.headers.get("accept", ""):
+            return StreamingResponse(
+                _message_events(thread_key, thread, request.message, agent_config, user_insert),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
 
         # Get AI response using agent configuration
         try:
             ai_response = await run_agent(
                 message=request.message,
-                organization_id=thread.get("organization_id"),
+                organization_id=UUID(thread["organization_id"]) if thread.get("organization_id") else None,
                 user_id=thread.get("user_id"),
-                store_id=thread.get("store_id"),
+                store_id=UUID(thread["store_id"]) if thread.get("store_id") else None,
                 agent_config=agent_config,
             )
         except Exception as e:
             logger.error(f"Agent error: {e}")
-            ai_response = f"Lo siento, hubo un error procesando tu mensaje. Por favor intenta de nuevo."
+            ai_response = AGENT_ERROR_MESSAGE
 
-        # Save assistant message (using session_id as the FK column)
-        assistant_message_data = {
-            "session_id": str(thread_id),
-            "role": "assistant",
-            "content": ai_response,
-        }
+        msg_data = await user_insert
+        if not msg_data:
+            raise HTTPException(status_code=400, detail="Failed to save user message")
 
-        assistant_msg_result = (
-            supabase.table("chat_messages")
-            .insert(assistant_message_data)
-            .execute()
-        )
+        asst_data = await _insert_message(thread_key, "assistant", ai_response)
 
-        if not assistant_msg_result.data:
+        if not asst_data:
             raise HTTPException(
                 status_code=400, detail="Failed to save assistant message"
             )
 
-        asst_data = assistant_msg_result.data[0]
-        assistant_message = MessageResponse(
-            id=asst_data["id"],
-            thread_id=asst_data["session_id"],
-            role=asst_data["role"],
-            content=asst_data["content"],
-            created_at=asst_data["created_at"],
-            token_count=asst_data.get("token_count"),
-            metadata=asst_data.get("metadata", {}),
-        )
-
-        # Update thread's updated_at
-        supabase.table("chat_sessions").update(
-            {"updated_at": "now()"}
-        ).eq("id", str(thread_id)).execute()
-
-        return SendMessageResponse(
-            user_message=user_message,
-            assistant_message=assistant_message,
-            thread_id=thread_id,
+        return ORJSONResponse(
+            {
+                "user_message": msg_data,
+                "assistant_message": asst_data,
+                "thread_id": thread_key,
+            }
         )
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error sending message: {e}")
-        raise HTTPException(status_code=500, detail=f"Error sending message: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error sending message", e))
 
 
 @router.delete("/{thread_id}", status_code=204)
@@ -320,7 +405,12 @@ async def delete_thread(thread_id: UUID) -> None:
     """
     try:
         # Messages will be cascade deleted
-        supabase.table("chat_sessions").delete().eq("id", str(thread_id)).execute()
+        await (
+            async_supabase.table("chat_sessions")
+            .delete()
+            .eq("id", str(thread_id))
+            .execute()
+        )
     except Exception as e:
         logger.error(f"Error deleting thread: {e}")
-        raise HTTPException(status_code=500, detail=f"Error deleting thread: {str(e)}")
+        raise HTTPException(status_code=500, detail=error_detail("Error deleting thread", e))
@@ -3,21 +3,44 @@ JWT Authentication Module
 High-performance local JWT validation without external API calls.
 """
 
+import logging
+import time
 from datetime import datetime, timezone
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from postgrest import AsyncPostgrestClient
 from pydantic import BaseModel
 
 from app.core.config import settings
-from app.core.supabase import supabase
+from app.core.errors import error_detail
+from app.core.supabase import async_supabase, supabase_for
 
+logger = logging.getLogger(__name__)
 
 # Security scheme
 security = HTTPBearer(auto_error=False)
 
+# Decoded tokens keyed by the raw token string, so repeat requests with the
+# same Bearer token skip the HMAC check and payload parsing. Entries expire
+# after JWT_CACHE_TTL_SECONDS or shortly before the token itself does.
+JWT_CACHE_TTL_SECONDS = 300
+JWT_CACHE_MAXSIZE = 10_000
+JWT_EXPIRY_LEEWAY_SECONDS = 5
+
+# Profiles (role, organization) change rarely - cache them per user so
+# authenticated requests skip the profiles round-trip
+PROFILE_CACHE_TTL_SECONDS = 45
+PROFILE_CACHE_MAXSIZE = 50_000
+
+# Decoder and key are built once: the jwt.decode() convenience function
+# creates a new PyJWT instance and re-encodes the secret on every call
+JWT_ALGORITHMS = ["HS256"]
+_jwt_decoder = jwt.PyJWT()
+_jwt_key = settings.SUPABASE_JWT_SECRET.encode()
+
 
 class TokenPayload(BaseModel):
     """Decoded JWT payload from Supabase."""
@@ -39,10 +62,67 @@ class CurrentUser(BaseModel):
     organization_id: str | None = None
 
 
+_token_cache: dict[str, tuple[TokenPayload, float]] = {}
+
+
+def _cached_token(token: str) -> TokenPayload | None:
+    entry = _token_cache.get(token)
+    if entry is None:
+        return None
+    payload, expires_at = entry
+    if expires_at < time.time():
+        _token_cache.pop(token, None)
+        return None
+    return payload
+
+
+def _cache_token(token: str, payload: TokenPayload) -> None:
+    if len(_token_cache) >= JWT_CACHE_MAXSIZE:
+        # Drop the oldest entry (dicts keep insertion order)
+        _token_cache.pop(next(iter(_token_cache)), None)
+    expires_at = min(
+        time.time() + JWT_CACHE_TTL_SECONDS,
+        payload.exp - JWT_EXPIRY_LEEWAY_SECONDS,
+    )
+    _token_cache[token] = (payload, expires_at)
+
+
+_profile_cache: dict[str, tuple[CurrentUser, float]] = {}
+
+
+def _cached_profile(user_id: str) -> CurrentUser | None:
+    entry = _profile_cache.get(user_id)
+    if entry is None:
+        return None
+    user, expires_at = entry
+    if expires_at < time.monotonic():
+        _profile_cache.pop(user_id, None)
+        return None
+    return user
+
+
+def _cache_profile(user: CurrentUser) -> None:
+    if len(_profile_cache) >= PROFILE_CACHE_MAXSIZE:
+        _profile_cache.pop(next(iter(_profile_cache)), None)
+    _profile_cache[user.id] = (user, time.monotonic() + PROFILE_CACHE_TTL_SECONDS)
+
+
+def invalidate_profile(user_id: str) -> None:
+    """
+    Drop a cached user profile after it was modified.
+
+    Args:
+        user_id: ID of the user whose profile changed
+    """
+    _profile_cache.pop(user_id, None)
+
+
 def decode_jwt(token: str) -> TokenPayload:
     """
     Decode and validate JWT locally without API call.
 
+    Valid tokens are cached until shortly before they expire.
+
     Args:
         token: Raw JWT token string
 
@@ -58,14 +138,20 @@ def decode_jwt(token: str) -> TokenPayload:
             detail="JWT secret not configured",
         )
 
+    cached = _cached_token(token)
+    if cached is not None:
+        return cached
+
     try:
-        payload = jwt.decode(
+        payload = _jwt_decoder.decode(
             token,
-            settings.SUPABASE_JWT_SECRET,
-            algorithms=["HS256"],
+            _jwt_key,
+            algorithms=JWT_ALGORITHMS,
             audience="authenticated",
         )
-        return TokenPayload(**payload)
+        token_payload = TokenPayload(**payload)
+        _cache_token(token, token_payload)
+        return token_payload
 
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -88,15 +174,18 @@ def decode_jwt(token: str) -> TokenPayload:
 
 
 async def get_current_user(
+    request: Request,
     credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security)],
 ) -> CurrentUser:
     """
     FastAPI dependency to get the current authenticated user.
 
     Validates JWT locally, then fetches user profile from database.
-    Profile is cached in memory for the request duration.
+    Profiles are cached in memory for PROFILE_CACHE_TTL_SECONDS, and the
+    resolved user is memoized on request.state for the rest of the request.
 
     Args:
+        request: Incoming request (holds the per-request user)
         credentials: Bearer token from Authorization header
 
     Returns:
@@ -105,6 +194,10 @@ async def get_current_user(
     Raises:
         HTTPException: 401 if not authenticated, 403 if profile not found
     """
+    current_user = getattr(request.state, "current_user", None)
+    if current_user is not None:
+        return current_user
+
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -124,10 +217,15 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    cached_user = _cached_profile(token_payload.sub)
+    if cached_user is not None:
+        request.state.current_user = cached_user
+        return cached_user
+
     # Fetch user profile from database
     try:
-        response = (
-            supabase.table("profiles")
+        response = await (
+            async_supabase.table("profiles")
             .select("id, email, role, organization_id, deleted_at")
             .eq("id", token_payload.sub)
             .is_("deleted_at", "null")  # Respect soft delete
@@ -143,19 +241,23 @@ async def get_current_user(
 
         profile = response.data
 
-        return CurrentUser(
+        user = CurrentUser(
             id=profile["id"],
             email=profile.get("email"),
             role=profile.get("role", "user"),
             organization_id=profile.get("organization_id"),
         )
+        _cache_profile(user)
+        request.state.current_user = user
+        return user
 
     except HTTPException:
         raise
     except Exception as e:
+        logger.error(f"Error fetching user profile: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching user profile: {str(e)}",
+            detail=error_detail("Error fetching user profile", e),
         )
 
 
@@ -182,6 +284,27 @@ async def get_current_admin(
     return current_user
 
 
+async def get_user_db(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security)],
+) -> AsyncPostgrestClient:
+    """
+    FastAPI dependency for a database client scoped to the caller.
+
+    Queries run with the user's JWT, so RLS enforces tenant boundaries in
+    the database and endpoints need no ownership preflight.
+
+    Args:
+        current_user: Authenticated user (guarantees a valid token)
+        credentials: Bearer token from Authorization header
+
+    Returns:
+        PostgREST client acting as the current user
+    """
+    return supabase_for(credentials.credentials)
+
+
 # Type aliases for cleaner dependency injection
 AuthenticatedUser = Annotated[CurrentUser, Depends(get_current_user)]
 AdminUser = Annotated[CurrentUser, Depends(get_current_admin)]
+UserDB = Annotated[AsyncPostgrestClient, Depends(get_user_db)]
@@ -3,17 +3,24 @@ Application Configuration
 Uses Pydantic Settings for type-safe environment variable management.
 """
 
-from functools import lru_cache
-
-from pydantic_settings import BaseSettings
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    """Application settings loaded from environment variables."""
+    """Application settings loaded from environment variables (read-only)."""
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=True,
+        frozen=True,
+    )
 
     # Project
     PROJECT_NAME: str = "MultiAgent Marketing Platform"
     DEBUG: bool = False
+    LOG_LEVEL: str = "INFO"
 
     # API
     API_V1_PREFIX: str = "/api/v1"
@@ -24,29 +31,68 @@ class Settings(BaseSettings):
     # Supabase
     SUPABASE_URL: str = ""
     SUPABASE_ANON_KEY: str = ""
-    SUPABASE_SERVICE_ROLE_KEY: str = ""
+    SUPABASE_SERVICE_ROLE_KEY: str = Field("", repr=False)
+    # Shared HTTP connection pool for the Supabase clients (keep-alive, HTTP/2)
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = 50
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = 20
+    SUPABASE_HTTP_TIMEOUT: float = 30.0
+
+    # Direct Postgres connection for read-heavy endpoints (optional).
+    # Find in: Supabase Dashboard > Project Settings > Database > Connection string
+    DATABASE_URL: str = Field("", repr=False)  # contains the password
+    # Pool sizes are per worker: with WEB_CONCURRENCY=4 the defaults open up
+    # to 40 connections, within the direct-connection limit of small plans
+    DB_POOL_MIN_SIZE: int = 2
+    DB_POOL_MAX_SIZE: int = 10
+    # Prepared statements cached per connection (set 0 behind a
+    # transaction-mode pooler such as Supavisor on port 6543)
+    DB_STATEMENT_CACHE_SIZE: int = 1024
 
     # JWT - Use Supabase JWT Secret for local validation
     # Find in: Supabase Dashboard > Project Settings > API > JWT Secret
-    SUPABASE_JWT_SECRET: str = ""
+    SUPABASE_JWT_SECRET: str = Field("", repr=False)
 
     # OpenAI / Anthropic
-    OPENAI_API_KEY: str = ""
-    ANTHROPIC_API_KEY: str = ""
+    OPENAI_API_KEY: str = Field("", repr=False)
+    ANTHROPIC_API_KEY: str = Field("", repr=False)
 
     # Tavily (for web search)
-    TAVILY_API_KEY: str = ""
-
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = True
+    TAVILY_API_KEY: str = Field("", repr=False)
+
+    # LLM response cache (in-process, exact prompt match, per worker); only
+    # used by agents with capabilities.llm_cache_enabled, FIFO-bounded
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAXSIZE: int = 256
+
+    # Query embedding cache (repeat queries skip the embeddings API)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAXSIZE: int = 1024
+    EMBEDDING_CACHE_TTL_SECONDS: int = 600
+
+    # Sub-agent routing cache (repeat queries skip the router LLM call)
+    ROUTE_CACHE_ENABLED: bool = True
+    ROUTE_CACHE_MAXSIZE: int = 4096
+    # Second tier: reuse the decision for paraphrased queries
+    ROUTE_SEMANTIC_CACHE_ENABLED: bool = True
+    ROUTE_SEMANTIC_THRESHOLD: float = 0.93
+    # Run the parent agent alongside a sub-agent picked by a partial name match
+    ROUTE_SPECULATIVE_ENABLED: bool = True
+    ROUTE_SPECULATIVE_THRESHOLD: float = 0.8
+
+    # Semantic cache (reuse responses for near-duplicate queries)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    SEMANTIC_CACHE_TTL_SECONDS: int = 3600
+    # Per worker: entries per scope (org + agent + store) and scopes kept,
+    # least recently used scopes are dropped first (~6KB per entry)
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 64
+    SEMANTIC_CACHE_MAX_SCOPES: int = 128
+
+
+# Loaded once at import; import `settings` directly
+settings = Settings()
 
 
-@lru_cache
 def get_settings() -> Settings:
-    """Cached settings instance."""
-    return Settings()
-
-
-settings = get_settings()
+    """Settings instance (kept for dependency injection)."""
+    return settings
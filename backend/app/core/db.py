@@ -0,0 +1,119 @@
+"""
+Direct Postgres Connection Pool
+asyncpg pool for read-heavy endpoints, bypassing the PostgREST round-trip.
+"""
+
+import json
+import logging
+import struct
+from uuid import UUID
+
+import asyncpg
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: asyncpg.Pool | None = None
+
+
+def _encode_uuid(value: UUID | str) -> bytes:
+    # Bind UUID parameters as their 16 raw bytes (strings are still accepted)
+    return value.bytes if isinstance(value, UUID) else UUID(value).bytes
+
+
+def _decode_uuid(data: bytes) -> str:
+    return str(UUID(bytes=data))
+
+
+def _encode_vector(value: list[float]) -> bytes:
+    # pgvector binary format: dimensions (int16), unused (int16), float4[]
+    return struct.pack(f">HH{len(value)}f", len(value), 0, *value)
+
+
+def _decode_vector(data: bytes) -> list[float]:
+    dim, _ = struct.unpack_from(">HH", data)
+    return list(struct.unpack_from(f">{dim}f", data, 4))
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    # Return rows shaped like PostgREST's: UUIDs as strings, JSON decoded.
+    # UUIDs use the binary wire format in both directions.
+    await conn.set_type_codec(
+        "uuid",
+        encoder=_encode_uuid,
+        decoder=_decode_uuid,
+        schema="pg_catalog",
+        format="binary",
+    )
+    for json_type in ("json", "jsonb"):
+        await conn.set_type_codec(
+            json_type, encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+
+    # Embeddings travel as binary float4 arrays instead of JSON/text numbers.
+    # pgvector may live in `public` or `extensions` depending on the project.
+    vector_schema = await conn.fetchval(
+        "SELECT typnamespace::regnamespace::text FROM pg_type WHERE typname = 'vector'"
+    )
+    if vector_schema:
+        await conn.set_type_codec(
+            "vector",
+            encoder=_encode_vector,
+            decoder=_decode_vector,
+            schema=vector_schema,
+            format="binary",
+        )
+
+
+async def init_db_pool() -> None:
+    """Create the connection pool if DATABASE_URL is configured."""
+    global _pool
+    if _pool is not None or not settings.DATABASE_URL:
+        return
+
+    _pool = await asyncpg.create_pool(
+        settings.DATABASE_URL,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        max_inactive_connection_lifetime=300,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        init=_init_connection,
+    )
+    logger.info("Postgres connection pool ready")
+
+
+async def close_db_pool() -> None:
+    """Close the connection pool on shutdown."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def get_db_pool() -> asyncpg.Pool | None:
+    """
+    Get the direct Postgres pool.
+
+    Returns:
+        The pool, or None when DATABASE_URL is not set (callers then fall
+        back to the Supabase client)
+    """
+    return _pool
+
+
+async def fetch_all(query: str, *args) -> list[dict]:
+    """Run a parameterized query on the pool and return rows as dicts."""
+    rows = await _pool.fetch(query, *args)
+    return [dict(row) for row in rows]
+
+
+async def fetch_one(query: str, *args) -> dict | None:
+    """Run a parameterized query on the pool and return the first row."""
+    row = await _pool.fetchrow(query, *args)
+    return dict(row) if row else None
+
+
+async def fetch_value(query: str, *args):
+    """Run a parameterized query on the pool and return the first column of the first row."""
+    return await _pool.fetchval(query, *args)
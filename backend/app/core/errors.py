@@ -0,0 +1,26 @@
+"""
+Error Helpers
+Client-facing error details for failed requests.
+"""
+
+from app.core.config import settings
+
+
+def error_detail(message: str, exc: Exception) -> str:
+    """
+    Build the `detail` of a 500 response.
+
+    Exception text can be large and may leak internals (queries, keys,
+    upstream payloads), so it is only included in DEBUG; callers log the
+    full error server-side.
+
+    Args:
+        message: Generic description of what failed
+        exc: The exception that caused the failure
+
+    Returns:
+        Detail string for the HTTPException
+    """
+    if settings.DEBUG:
+        return f"{message}: {exc}"
+    return message
@@ -0,0 +1,50 @@
+"""
+Logging Setup
+Routes application logs through a queue so the stream writes run on a
+background thread instead of the event loop.
+"""
+
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from app.core.config import settings
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: QueueListener | None = None
+
+
+def start_logging() -> None:
+    """
+    Attach a queue handler to the "app" logger and start its listener thread.
+
+    The calling thread only renders the message (and any traceback) and
+    enqueues the record; the listener thread writes it to stderr, so a
+    slow or blocked stream never stalls the event loop.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(settings.LOG_LEVEL)
+    app_logger.addHandler(QueueHandler(log_queue))
+    # Handled here - do not also go through the root logger's handlers
+    app_logger.propagate = False
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
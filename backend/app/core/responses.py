@@ -0,0 +1,102 @@
+"""
+Response Classes
+JSON responses serialized with orjson for raw database rows.
+"""
+
+import hashlib
+from typing import Any
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+
+class ORJSONResponse(Response):
+    """
+    JSON response rendered by orjson.
+
+    Used by read endpoints that return Supabase rows as-is instead of
+    re-validating them through Pydantic models. UUID/datetime values are
+    serialized natively; anything else falls back to str().
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str)
+
+
+def check_rows(payload: Any, model: type[BaseModel]) -> Any:
+    """
+    Pass trusted database rows through unvalidated.
+
+    Rows come from our own database already in the API shape, so no models
+    are built for them; with DEBUG on the whole payload is validated against
+    `model` in one call to surface schema drift during development.
+    """
+    if settings.DEBUG:
+        model.model_validate(payload)
+    return payload
+
+
+def rows_response(payload: Any, model: type[BaseModel], status_code: int = 200) -> ORJSONResponse:
+    """Return trusted rows unvalidated (validated against `model` in DEBUG)."""
+    return ORJSONResponse(check_rows(payload, model), status_code=status_code)
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> Response:
+    """
+    Serialize an already validated model straight to a JSON response.
+
+    With `response_model`, FastAPI validates the returned model a second
+    time before dumping it; routes that build the model themselves return
+    this instead and document the schema via `responses={...}`.
+
+    Args:
+        model: Response model instance
+        status_code: HTTP status code
+
+    Returns:
+        Response with the pydantic-core encoded body
+    """
+    return Response(
+        model.model_dump_json(), status_code=status_code, media_type="application/json"
+    )
+
+
+# Cache-Control policies for cacheable read endpoints
+CACHE_PUBLIC = "public, max-age=60, stale-while-revalidate=300"
+CACHE_REVALIDATE = "private, no-cache"
+
+
+def etag_response(
+    request: Request,
+    content: Any,
+    cache_control: str = CACHE_REVALIDATE,
+) -> Response:
+    """
+    Build a JSON response with an ETag and Cache-Control header.
+
+    Answers 304 Not Modified (no body) when the client's If-None-Match
+    already matches the current content.
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        content: JSON-serializable content
+        cache_control: Cache-Control header value
+
+    Returns:
+        200 response with the body, or an empty 304 response
+    """
+    body = orjson.dumps(content, default=str)
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    return Response(body, media_type="application/json", headers=headers)
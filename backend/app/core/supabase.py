@@ -5,24 +5,125 @@ Provides authenticated client for database operations.
 
 from functools import lru_cache
 
-from supabase import Client, create_client
+import httpx
+import orjson
+from postgrest import APIError, AsyncPostgrestClient
+from postgrest._async.request_builder import send_with_retry
+from supabase import AsyncClient, AsyncClientOptions, Client, ClientOptions, create_client
 
 from app.core.config import settings
 
 
+def _http_pool_kwargs() -> dict:
+    """Connection pool settings shared by the sync and async HTTP clients."""
+    return {
+        "http2": True,
+        "limits": httpx.Limits(
+            max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+        ),
+        "timeout": settings.SUPABASE_HTTP_TIMEOUT,
+    }
+
+
 @lru_cache
 def get_supabase_client() -> Client:
     """
     Creates and caches a Supabase client instance.
 
+    Uses a pooled HTTP/2 client so connections stay warm across requests.
+
     Returns:
         Authenticated Supabase client
     """
     return create_client(
         settings.SUPABASE_URL,
         settings.SUPABASE_SERVICE_ROLE_KEY,  # Service role for backend operations
+        ClientOptions(httpx_client=httpx.Client(**_http_pool_kwargs())),
     )
 
 
-# Singleton instance
+@lru_cache
+def get_async_http_client() -> httpx.AsyncClient:
+    """Pooled async HTTP client shared by all async Supabase clients."""
+    return httpx.AsyncClient(**_http_pool_kwargs())
+
+
+@lru_cache
+def get_async_supabase_client() -> AsyncClient:
+    """
+    Creates and caches an async Supabase client instance.
+
+    Queries are awaited (`await client.table(...).execute()`), so database
+    I/O does not block the event loop.
+
+    Returns:
+        Authenticated async Supabase client
+    """
+    return AsyncClient(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_SERVICE_ROLE_KEY,  # Service role for backend operations
+        AsyncClientOptions(httpx_client=get_async_http_client()),
+    )
+
+
+def supabase_for(token: str) -> AsyncPostgrestClient:
+    """
+    Creates a database client that acts as the user owning `token`.
+
+    Requests carry the user's JWT instead of the service role key, so
+    Row Level Security policies filter and authorize them in the database.
+    The client is cheap to build: it reuses the shared connection pool.
+
+    Args:
+        token: The user's Supabase access token (validated by the caller)
+
+    Returns:
+        PostgREST client scoped to the user
+    """
+    return AsyncPostgrestClient(
+        f"{settings.SUPABASE_URL}/rest/v1",
+        headers={
+            "apikey": settings.SUPABASE_ANON_KEY,
+            "Authorization": f"Bearer {token}",
+        },
+        http_client=get_async_http_client(),
+    )
+
+
+async def execute_raw(query) -> httpx.Response:
+    """
+    Execute an async PostgREST query and return the raw HTTP response.
+
+    `query.execute()` decodes the body into Python objects; endpoints that
+    validate or forward the JSON as-is can use the response bytes directly
+    and skip that round-trip.
+
+    Args:
+        query: Async query builder (table select or rpc)
+
+    Returns:
+        The successful HTTP response
+
+    Raises:
+        APIError: If PostgREST returned an error status
+    """
+    response = await send_with_retry(query.request)
+    if not response.is_success:
+        try:
+            error = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            error = {"message": response.text}
+        raise APIError(error if isinstance(error, dict) else {"message": response.text})
+    return response
+
+
+def content_range_total(response: httpx.Response) -> int:
+    """Total row count from a `count="exact"` response (`0-49/123`)."""
+    total = response.headers.get("content-range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else 0
+
+
+# Singleton instances
 supabase = get_supabase_client()
+async_supabase = get_async_supabase_client()
@@ -0,0 +1,60 @@
+"""
+Request Body Validation
+Parses JSON request bodies straight into Pydantic models.
+"""
+
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def json_body(model: type[M]) -> Callable[[Request], Awaitable[M]]:
+    """
+    Build a dependency that validates the raw request body as `model`.
+
+    FastAPI's default body handling decodes the JSON into Python objects
+    first and validates them afterwards; `model_validate_json` parses and
+    validates in a single pass inside pydantic-core. Errors are raised as
+    RequestValidationError, so clients get the usual 422 response.
+
+    Args:
+        model: Pydantic model of the request body
+
+    Returns:
+        Dependency returning the validated model
+    """
+
+    async def dependency(request: Request) -> M:
+        body = await request.body()
+        try:
+            return model.model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)],
+                body=body,
+            )
+
+    return dependency
+
+
+def body_schema(model: type[BaseModel]) -> dict[str, Any]:
+    """
+    OpenAPI `requestBody` for routes that read their body via `json_body`.
+
+    Args:
+        model: Pydantic model of the request body
+
+    Returns:
+        Value for the route's `openapi_extra`
+    """
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
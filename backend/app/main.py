@@ -3,11 +3,28 @@ FastAPI Application Entry Point
 Enterprise Multi-Agent Marketing Platform
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from app.api import router as api_router
 from app.core.config import settings
+from app.core.db import close_db_pool, init_db_pool
+from app.core.logs import start_logging, stop_logging
+from app.core.responses import ORJSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start logging and open the Postgres pool on startup; close both on shutdown."""
+    start_logging()
+    await init_db_pool()
+    yield
+    await close_db_pool()
+    stop_logging()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -15,6 +32,8 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware - Allow all origins in development
@@ -26,6 +45,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses over 1KB (SSE streams are left uncompressed)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
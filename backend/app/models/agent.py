@@ -3,18 +3,28 @@ Agent Models - Pydantic schemas for agent API.
 """
 
 from datetime import datetime
+from typing import Annotated, Any
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class AgentCapabilities(BaseModel):
     """Agent capabilities configuration."""
 
+    # Stored as JSONB - keep keys this model does not know about
+    model_config = ConfigDict(extra="allow")
+
     rag_enabled: bool = True
+    rag_eager: bool = False
     web_search: bool = False
     code_execution: bool = False
     image_generation: bool = False
+    # Serve identical prompts from the shared response cache; opt-in, since
+    # a cached answer is replayed verbatim even when temperature > 0
+    llm_cache_enabled: bool = False
+    # Maintained by the database from the agent's active sub-agents
+    has_sub_agents: bool | None = None
 
 
 class AgentBase(BaseModel):
@@ -23,7 +33,7 @@ class AgentBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     slug: str = Field(..., min_length=1, max_length=50)
     role: str = Field(..., min_length=1, max_length=100)
-    description: str | None = Field(None, max_length=500)
+    description: Annotated[str | None, Field(max_length=500)] = None
     icon: str = Field(default="🤖")
     system_prompt: str | None = None
     is_active: bool = True
@@ -34,12 +44,7 @@ class AgentBase(BaseModel):
     temperature: float = Field(default=0.7, ge=0, le=2)
     max_tokens: int = Field(default=2048, gt=0, le=128000)
     welcome_message: str | None = None
-    capabilities: dict = Field(default_factory=lambda: {
-        "rag_enabled": True,
-        "web_search": False,
-        "code_execution": False,
-        "image_generation": False,
-    })
+    capabilities: AgentCapabilities = Field(default_factory=AgentCapabilities)
     category: str = Field(default="general")
 
 
@@ -52,9 +57,9 @@ class AgentCreate(AgentBase):
 class AgentUpdate(BaseModel):
     """Request body for updating an agent (all fields optional)."""
 
-    name: str | None = Field(None, min_length=1, max_length=100)
-    role: str | None = Field(None, min_length=1, max_length=100)
-    description: str | None = Field(None, max_length=500)
+    name: Annotated[str | None, Field(min_length=1, max_length=100)] = None
+    role: Annotated[str | None, Field(min_length=1, max_length=100)] = None
+    description: Annotated[str | None, Field(max_length=500)] = None
     icon: str | None = None
     system_prompt: str | None = None
     is_active: bool | None = None
@@ -62,10 +67,10 @@ class AgentUpdate(BaseModel):
 
     # AI Configuration
     ai_model: str | None = None
-    temperature: float | None = Field(None, ge=0, le=2)
-    max_tokens: int | None = Field(None, gt=0, le=128000)
+    temperature: Annotated[float | None, Field(ge=0, le=2)] = None
+    max_tokens: Annotated[int | None, Field(gt=0, le=128000)] = None
     welcome_message: str | None = None
-    capabilities: dict | None = None
+    capabilities: AgentCapabilities | None = None
     category: str | None = None
 
 
@@ -78,14 +83,16 @@ class AgentResponse(AgentBase):
     updated_at: datetime
     version: int | None = 1
     modified_by: UUID | None = None
+    settings: Any = Field(default_factory=dict)  # Opaque JSONB, passed through as-is
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class AgentListResponse(BaseModel):
     """Response body for list of agents."""
 
+    model_config = ConfigDict(frozen=True)
+
     agents: list[AgentResponse]
     total: int
 
@@ -97,14 +104,17 @@ class AgentConfigHistoryItem(BaseModel):
     agent_id: UUID
     changed_by: UUID
     changed_at: datetime
-    changes: dict
-    previous_config: dict
+    # Opaque JSONB snapshots, passed through without validation
+    changes: Any
+    previous_config: Any
     change_reason: str | None = None
 
 
 class AgentConfigHistoryResponse(BaseModel):
     """Response for agent config history."""
 
+    model_config = ConfigDict(frozen=True)
+
     history: list[AgentConfigHistoryItem]
     total: int
 
@@ -112,6 +122,8 @@ class AgentConfigHistoryResponse(BaseModel):
 class AIModelResponse(BaseModel):
     """Response for AI model info."""
 
+    model_config = ConfigDict(frozen=True)
+
     id: str
     name: str
     provider: str
@@ -125,5 +137,7 @@ class AIModelResponse(BaseModel):
 class AIModelsListResponse(BaseModel):
     """Response for list of AI models."""
 
+    model_config = ConfigDict(frozen=True)
+
     models: list[AIModelResponse]
     total: int
@@ -2,6 +2,8 @@
 Chat Models - Pydantic schemas for chat API.
 """
 
+from uuid import UUID
+
 from pydantic import BaseModel, Field
 
 
@@ -11,8 +13,8 @@ class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1, max_length=10000, description="User message")
     agent_id: str = Field(..., description="Agent ID to handle the request (required)")
     session_id: str | None = Field(None, description="Optional session ID for context")
-    organization_id: str | None = Field(None, description="Organization context")
-    store_id: str | None = Field(None, description="Store context for RAG")
+    organization_id: UUID | None = Field(None, description="Organization context")
+    store_id: UUID | None = Field(None, description="Store context for RAG")
 
 
 class ChatResponse(BaseModel):
@@ -3,9 +3,10 @@ Store Models - Pydantic schemas for store API.
 """
 
 from datetime import datetime
+from typing import Annotated, Any
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class StoreBase(BaseModel):
@@ -13,7 +14,7 @@ class StoreBase(BaseModel):
 
     name: str = Field(..., min_length=1, max_length=100)
     slug: str = Field(..., min_length=1, max_length=50)
-    description: str | None = Field(None, max_length=500)
+    description: Annotated[str | None, Field(max_length=500)] = None
     color: str = Field(default="#a855f7")
     logo_url: str | None = None
     is_active: bool = True
@@ -33,13 +34,15 @@ class StoreResponse(StoreBase):
     organization_id: UUID
     created_at: datetime
     updated_at: datetime
+    settings: Any = Field(default_factory=dict)  # Opaque JSONB, passed through as-is
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class StoreListResponse(BaseModel):
     """Response body for list of stores."""
 
+    model_config = ConfigDict(frozen=True)
+
     stores: list[StoreResponse]
     total: int
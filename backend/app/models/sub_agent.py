@@ -6,18 +6,27 @@ Each sub-agent handles a specific task within the orchestrator's workflow.
 """
 
 from datetime import datetime
+from typing import Annotated
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class SubAgentCapabilities(BaseModel):
     """Sub-agent capabilities configuration."""
 
+    # Stored as JSONB - keep keys this model does not know about
+    model_config = ConfigDict(extra="allow")
+
     rag_enabled: bool = True
     web_search: bool = False
     code_execution: bool = False
     image_generation: bool = False
+    # Serve identical prompts from the shared response cache (opt-in)
+    llm_cache_enabled: bool = False
+    # Messages containing one of these words go straight to this sub-agent
+    # (when no other sub-agent's keywords match), skipping the router LLM
+    routing_keywords: list[str] = Field(default_factory=list)
 
 
 class SubAgentBase(BaseModel):
@@ -26,7 +35,7 @@ class SubAgentBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     slug: str = Field(..., min_length=1, max_length=50)
     role: str = Field(..., min_length=1, max_length=100)
-    description: str | None = Field(None, max_length=500)
+    description: Annotated[str | None, Field(max_length=500)] = None
     icon: str = Field(default="🔧")
     system_prompt: str | None = None
     is_active: bool = True
@@ -35,12 +44,7 @@ class SubAgentBase(BaseModel):
     ai_model: str = Field(default="gpt-4o-mini")
     temperature: float = Field(default=0.7, ge=0, le=2)
     max_tokens: int = Field(default=2048, gt=0, le=128000)
-    capabilities: dict = Field(default_factory=lambda: {
-        "rag_enabled": True,
-        "web_search": False,
-        "code_execution": False,
-        "image_generation": False,
-    })
+    capabilities: SubAgentCapabilities = Field(default_factory=SubAgentCapabilities)
 
 
 class SubAgentCreate(SubAgentBase):
@@ -53,19 +57,19 @@ class SubAgentCreate(SubAgentBase):
 class SubAgentUpdate(BaseModel):
     """Request body for updating a sub-agent (all fields optional)."""
 
-    name: str | None = Field(None, min_length=1, max_length=100)
-    slug: str | None = Field(None, min_length=1, max_length=50)
-    role: str | None = Field(None, min_length=1, max_length=100)
-    description: str | None = Field(None, max_length=500)
+    name: Annotated[str | None, Field(min_length=1, max_length=100)] = None
+    slug: Annotated[str | None, Field(min_length=1, max_length=50)] = None
+    role: Annotated[str | None, Field(min_length=1, max_length=100)] = None
+    description: Annotated[str | None, Field(max_length=500)] = None
     icon: str | None = None
     system_prompt: str | None = None
     is_active: bool | None = None
 
     # AI Configuration
     ai_model: str | None = None
-    temperature: float | None = Field(None, ge=0, le=2)
-    max_tokens: int | None = Field(None, gt=0, le=128000)
-    capabilities: dict | None = None
+    temperature: Annotated[float | None, Field(ge=0, le=2)] = None
+    max_tokens: Annotated[int | None, Field(gt=0, le=128000)] = None
+    capabilities: SubAgentCapabilities | None = None
 
 
 class SubAgentResponse(SubAgentBase):
@@ -79,13 +83,14 @@ class SubAgentResponse(SubAgentBase):
     created_by: UUID | None = None
     modified_by: UUID | None = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class SubAgentListResponse(BaseModel):
     """Response body for list of sub-agents."""
 
+    model_config = ConfigDict(frozen=True)
+
     sub_agents: list[SubAgentResponse]
     total: int
 
@@ -3,9 +3,10 @@ Thread/Session Models - Pydantic schemas for chat threads.
 """
 
 from datetime import datetime
+from typing import Annotated, Any
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class MessageBase(BaseModel):
@@ -28,16 +29,15 @@ class MessageResponse(MessageBase):
     thread_id: UUID
     created_at: datetime
     token_count: int | None = None
-    metadata: dict = Field(default_factory=dict)
+    metadata: Any = Field(default_factory=dict)  # Opaque JSONB, passed through as-is
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class ThreadBase(BaseModel):
     """Base thread fields."""
 
-    title: str | None = Field(None, max_length=200)
+    title: Annotated[str | None, Field(max_length=200)] = None
 
 
 class ThreadCreate(ThreadBase):
@@ -47,6 +47,16 @@ class ThreadCreate(ThreadBase):
     agent_id: UUID | None = None
 
 
+class AgentBrief(BaseModel):
+    """Agent fields embedded in thread lists."""
+
+    id: UUID
+    name: str
+    slug: str
+    ai_model: str | None = None
+    welcome_message: str | None = None
+
+
 class ThreadResponse(ThreadBase):
     """Response body for thread data."""
 
@@ -58,20 +68,24 @@ class ThreadResponse(ThreadBase):
     status: str
     created_at: datetime
     updated_at: datetime
+    agent: AgentBrief | None = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class ThreadWithMessagesResponse(ThreadResponse):
     """Thread response with all messages."""
 
+    model_config = ConfigDict(frozen=True)
+
     messages: list[MessageResponse] = []
 
 
 class ThreadListResponse(BaseModel):
     """Response body for list of threads."""
 
+    model_config = ConfigDict(frozen=True)
+
     threads: list[ThreadResponse]
     total: int
 
@@ -85,6 +99,8 @@ class SendMessageRequest(BaseModel):
 class SendMessageResponse(BaseModel):
     """Response body after sending a message."""
 
+    model_config = ConfigDict(frozen=True)
+
     user_message: MessageResponse
     assistant_message: MessageResponse
     thread_id: UUID
@@ -42,11 +42,11 @@ class TikTokScript(BaseModel):
     estimated_duration_seconds: int = Field(
         default=30, ge=15, le=60, description="Estimated video length"
     )
-    trending_sounds_suggestion: list[str] = Field(
-        default_factory=list, description="Suggested trending sounds/music"
+    trending_sounds_suggestion: tuple[str, ...] = Field(
+        default=(), description="Suggested trending sounds/music"
     )
-    hashtags: list[str] = Field(
-        default_factory=list, max_length=10, description="Recommended hashtags"
+    hashtags: tuple[str, ...] = Field(
+        default=(), max_length=10, description="Recommended hashtags"
     )
 
 
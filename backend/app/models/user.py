@@ -7,7 +7,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Annotated
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class UserRole(str, Enum):
@@ -43,20 +43,21 @@ class UserUpdate(BaseModel):
 class UserProfile(UserBase):
     """User profile response."""
 
+    model_config = ConfigDict(from_attributes=True, extra="ignore")
+
     id: str
-    role: UserRole
+    role: UserRole = UserRole.USER
     organization_id: str | None = None
     avatar_url: str | None = None
     created_at: datetime | None = None
     updated_at: datetime | None = None
 
-    class Config:
-        from_attributes = True
-
 
 class UserListResponse(BaseModel):
     """Paginated list of users."""
 
+    model_config = ConfigDict(frozen=True)
+
     users: list[UserProfile]
     total: int
     page: int
@@ -66,6 +67,8 @@ class UserListResponse(BaseModel):
 class UserCreateResponse(BaseModel):
     """Response after creating a user."""
 
+    model_config = ConfigDict(frozen=True)
+
     id: str
     email: EmailStr
     role: UserRole
@@ -1,19 +1,32 @@
 # Business Logic Services
-from app.services.embeddings import generate_embedding, generate_embeddings_batch
+from app.services.embeddings import (
+    generate_embedding,
+    generate_embeddings_batch,
+    generate_query_embedding,
+)
 from app.services.knowledge_base import (
     add_document,
+    add_documents_bulk,
     search_knowledge,
+    search_knowledge_json,
     get_relevant_context,
     delete_document,
+    get_document,
     list_documents,
+    list_documents_json,
 )
 
 __all__ = [
     "generate_embedding",
     "generate_embeddings_batch",
+    "generate_query_embedding",
     "add_document",
+    "add_documents_bulk",
     "search_knowledge",
+    "search_knowledge_json",
     "get_relevant_context",
     "delete_document",
+    "get_document",
     "list_documents",
+    "list_documents_json",
 ]
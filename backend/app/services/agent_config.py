@@ -0,0 +1,101 @@
+"""
+Agent Config Service
+Loads agent configurations for chat requests with a short-lived in-process cache.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from uuid import UUID
+
+from app.core.db import fetch_one, get_db_pool
+from app.core.supabase import async_supabase
+
+logger = logging.getLogger(__name__)
+
+# Agent configs change rarely - a short TTL keeps the database round-trip
+# off the chat hot path while admin edits still show up quickly
+AGENT_CACHE_TTL_SECONDS = 30
+AGENT_CACHE_MAXSIZE = 512
+
+_agent_cache: dict[str, tuple[dict, float]] = {}
+_agent_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+def _cache_get(agent_id: str) -> dict | None:
+    entry = _agent_cache.get(agent_id)
+    if entry is None:
+        return None
+    config, expires_at = entry
+    if expires_at < time.monotonic():
+        _agent_cache.pop(agent_id, None)
+        return None
+    return config
+
+
+def _cache_set(agent_id: str, config: dict) -> None:
+    if len(_agent_cache) >= AGENT_CACHE_MAXSIZE:
+        # Drop the oldest entry (dicts keep insertion order)
+        _agent_cache.pop(next(iter(_agent_cache)), None)
+    _agent_cache[agent_id] = (config, time.monotonic() + AGENT_CACHE_TTL_SECONDS)
+
+
+def invalidate_agent(agent_id: UUID | str) -> None:
+    """
+    Drop a cached agent configuration after it was modified.
+
+    Args:
+        agent_id: UUID (or string) of the agent
+    """
+    _agent_cache.pop(str(agent_id), None)
+
+
+async def get_agent_config(agent_id: UUID | str) -> dict | None:
+    """
+    Load an active agent's configuration, served from cache when fresh.
+
+    Concurrent misses for the same agent share a single database query.
+
+    Args:
+        agent_id: UUID of the agent
+
+    Returns:
+        Agent configuration dict or None if not found
+    """
+    agent_id = str(agent_id)
+    config = _cache_get(agent_id)
+    if config is not None:
+        return config
+
+    async with _agent_locks[agent_id]:
+        # Another request may have filled the cache while we waited
+        config = _cache_get(agent_id)
+        if config is not None:
+            return config
+
+        try:
+            if get_db_pool():
+                config = await fetch_one(
+                    "SELECT * FROM agents WHERE id = $1 AND is_active", agent_id
+                )
+            else:
+                config = (
+                    await async_supabase.table("agents")
+                    .select("*")
+                    .eq("id", agent_id)
+                    .eq("is_active", True)
+                    .single()
+                    .execute()
+                ).data
+        except Exception as e:
+            logger.error(f"Error loading agent config: {e}")
+            return None
+        finally:
+            _agent_locks.pop(agent_id, None)
+
+        if not config:
+            return None
+
+        _cache_set(agent_id, config)
+        return config
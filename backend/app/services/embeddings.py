@@ -3,10 +3,13 @@ Embeddings Service
 Handles text embedding generation using OpenAI's API.
 """
 
+import asyncio
 import logging
-from functools import lru_cache
+import time
+from contextvars import ContextVar
+from functools import lru_cache, partial
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.core.config import settings
 
@@ -15,12 +18,29 @@ logger = logging.getLogger(__name__)
 # OpenAI embedding model
 EMBEDDING_MODEL = "text-embedding-3-small"
 EMBEDDING_DIMENSIONS = 1536
+# Input is truncated to this many characters (the model takes 8191 tokens)
+MAX_EMBEDDING_CHARS = 30000
+
+# Query embeddings keyed by normalized query text -> (embedding, expires_at)
+_query_cache: dict[str, tuple[list[float], float]] = {}
+# Query embeddings being generated, so concurrent callers share one API call
+_pending_queries: dict[str, asyncio.Task] = {}
+# Query embeddings of the current chat turn (see start_embedding_scope)
+_turn_embeddings: ContextVar[dict[str, asyncio.Task] | None] = ContextVar(
+    "turn_embeddings", default=None
+)
+
+
+@lru_cache
+def get_openai_client() -> AsyncOpenAI:
+    """Get cached async OpenAI client (requests are awaited, not blocking)."""
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
 
 
 @lru_cache
-def get_openai_client() -> OpenAI:
-    """Get cached OpenAI client."""
-    return OpenAI(api_key=settings.OPENAI_API_KEY)
+def _get_embed():
+    """Embeddings create call with the model pre-bound."""
+    return partial(get_openai_client().embeddings.create, model=EMBEDDING_MODEL)
 
 
 async def generate_embedding(text: str) -> list[float]:
@@ -34,21 +54,12 @@ async def generate_embedding(text: str) -> list[float]:
         List of floats representing the embedding vector
     """
     try:
-        client = get_openai_client()
-
-        # Clean and truncate text if needed (8191 tokens max for embedding model)
-        clean_text = text.strip()
+        # Clean and truncate text (slicing is a no-op for short texts)
+        clean_text = text.strip()[:MAX_EMBEDDING_CHARS]
         if not clean_text:
             raise ValueError("Empty text cannot be embedded")
 
-        # Truncate to avoid token limits (rough approximation)
-        if len(clean_text) > 30000:
-            clean_text = clean_text[:30000]
-
-        response = client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=clean_text,
-        )
+        response = await _get_embed()(input=clean_text)
 
         return response.data[0].embedding
 
@@ -57,6 +68,111 @@ async def generate_embedding(text: str) -> list[float]:
         raise
 
 
+def to_vector_literal(embedding: list[float]) -> str:
+    """
+    Format an embedding as a pgvector text literal for PostgREST calls.
+
+    OpenAI returns float32 values; 9 significant digits round-trip them
+    exactly, while JSON encodes the widened float64 values with ~17 digits.
+    This makes the payload about a third smaller.
+
+    Args:
+        embedding: Embedding vector
+
+    Returns:
+        Literal like "[0.0123,-0.0456,...]" (cast to vector by Postgres)
+    """
+    return "[" + ",".join(f"{x:.9g}" for x in embedding) + "]"
+
+
+def _query_cache_key(text: str) -> str:
+    """Normalize query text so trivially different queries share an entry."""
+    return " ".join(text.split()).lower()
+
+
+def start_embedding_scope() -> None:
+    """
+    Start a chat turn's embedding scope.
+
+    Until the current request's task ends, generate_query_embedding embeds
+    each query at most once, however many layers (semantic cache, routing,
+    knowledge search) ask for it - even when the process-wide query cache
+    is disabled or has evicted the entry.
+    """
+    _turn_embeddings.set({})
+
+
+async def generate_query_embedding(text: str) -> list[float]:
+    """
+    Embed a search query, reusing recent embeddings of the same query.
+
+    A single chat turn embeds the user message for the semantic cache and
+    again for knowledge search, and users repeat queries; both hit the cache
+    instead of the embeddings API. Entries live EMBEDDING_CACHE_TTL_SECONDS.
+    Concurrent calls for the same query share a single API request.
+    The returned list is shared - callers must not modify it.
+
+    Args:
+        text: The query to embed
+
+    Returns:
+        List of floats representing the embedding vector
+    """
+    key = _query_cache_key(text)
+    turn = _turn_embeddings.get()
+    if turn is None:
+        return await _cached_query_embedding(text, key)
+
+    task = turn.get(key)
+    if task is None:
+        task = asyncio.create_task(_cached_query_embedding(text, key))
+        turn[key] = task
+        # Failures are not memoized - a later caller in the turn retries
+        task.add_done_callback(
+            lambda t: turn.pop(key, None) if not t.cancelled() and t.exception() else None
+        )
+    return await asyncio.shield(task)
+
+
+async def _cached_query_embedding(text: str, key: str) -> list[float]:
+    """Embed a query through the process-wide query cache."""
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return await generate_embedding(text)
+
+    entry = _query_cache.get(key)
+    if entry is not None:
+        embedding, expires_at = entry
+        if expires_at >= time.monotonic():
+            return embedding
+        _query_cache.pop(key, None)
+
+    task = _pending_queries.get(key)
+    if task is None:
+        task = asyncio.create_task(_embed_query(text, key))
+        _pending_queries[key] = task
+        task.add_done_callback(lambda t: _finish_pending_query(key, t))
+    # Shielded: one caller giving up must not cancel the shared request
+    return await asyncio.shield(task)
+
+
+async def _embed_query(text: str, key: str) -> list[float]:
+    """Embed a query and store it in the query cache."""
+    embedding = await generate_embedding(text)
+
+    if len(_query_cache) >= settings.EMBEDDING_CACHE_MAXSIZE:
+        # Drop the oldest entry (dicts keep insertion order)
+        _query_cache.pop(next(iter(_query_cache)), None)
+    _query_cache[key] = (embedding, time.monotonic() + settings.EMBEDDING_CACHE_TTL_SECONDS)
+    return embedding
+
+
+def _finish_pending_query(key: str, task: asyncio.Task) -> None:
+    """Forget a finished query embedding task."""
+    _pending_queries.pop(key, None)
+    if not task.cancelled():
+        task.exception()  # Mark retrieved if every caller already gave up
+
+
 async def generate_embeddings_batch(texts: list[str]) -> list[list[float]]:
     """
     Generate embeddings for multiple texts in a single API call.
@@ -68,17 +184,12 @@ async def generate_embeddings_batch(texts: list[str]) -> list[list[float]]:
         List of embedding vectors
     """
     try:
-        client = get_openai_client()
-
         # Clean texts
-        clean_texts = [t.strip()[:30000] for t in texts if t.strip()]
+        clean_texts = [t.strip()[:MAX_EMBEDDING_CHARS] for t in texts if t.strip()]
         if not clean_texts:
             return []
 
-        response = client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=clean_texts,
-        )
+        response = await _get_embed()(input=clean_texts)
 
         return [item.embedding for item in response.data]
 
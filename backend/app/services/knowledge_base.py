@@ -3,15 +3,83 @@ Knowledge Base Service
 Handles document storage and RAG retrieval.
 """
 
+import asyncio
 import logging
+from bisect import bisect_right
+from itertools import accumulate
 from uuid import UUID
 from typing import Optional
 
-from app.core.supabase import supabase
-from app.services.embeddings import generate_embedding
+from app.core.db import fetch_all, fetch_value, get_db_pool
+from app.core.supabase import async_supabase, content_range_total, execute_raw, supabase
+from app.services.embeddings import (
+    generate_embedding,
+    generate_embeddings_batch,
+    generate_query_embedding,
+    to_vector_literal,
+)
+from app.services.tokens import count_tokens
 
 logger = logging.getLogger(__name__)
 
+# Document columns (never the embedding); list views can skip the content body
+DOCUMENT_SUMMARY_COLS = "id, metadata, document_type, source_url, store_id, agent_id, sub_agent_id, created_at"
+DOCUMENT_COLS = f"{DOCUMENT_SUMMARY_COLS}, content"
+
+# Documents embedded per API call (and inserted per query) in bulk ingestion
+EMBEDDING_BATCH_SIZE = 256
+
+# Direct pool versions of the search RPCs (same SQL functions, no PostgREST
+# hop; the embedding is bound as a binary vector)
+Q_SEARCH_KNOWLEDGE = (
+    "SELECT id, content, metadata, similarity FROM search_knowledge_base($1, $2, $3, $4)"
+)
+Q_SEARCH_STORE_KNOWLEDGE = (
+    "SELECT id, content, metadata, document_type, similarity"
+    " FROM search_store_knowledge($1, $2, $3, $4)"
+)
+# Same searches with the matches aggregated to a JSON array by Postgres
+Q_SEARCH_KNOWLEDGE_JSON = (
+    "SELECT coalesce(json_agg(m), '[]')::text"
+    " FROM search_knowledge_base($1, $2, $3, $4) m"
+)
+Q_SEARCH_STORE_KNOWLEDGE_JSON = (
+    "SELECT coalesce(json_agg(m), '[]')::text"
+    " FROM search_store_knowledge($1, $2, $3, $4) m"
+)
+
+def _document_row(
+    organization_id: UUID,
+    content: str,
+    embedding: list[float],
+    metadata: dict = None,
+    store_id: UUID = None,
+    agent_id: UUID = None,
+    sub_agent_id: UUID = None,
+    document_type: str = "general",
+    source_url: str = None,
+) -> dict:
+    """Build a knowledge_base row (optional links only when set)."""
+    doc_data = {
+        "organization_id": str(organization_id),
+        "content": content,
+        "embedding": to_vector_literal(embedding),
+        "metadata": metadata or {},
+        "document_type": document_type,
+        "token_count": count_tokens(content),
+    }
+
+    if store_id:
+        doc_data["store_id"] = str(store_id)
+    if agent_id:
+        doc_data["agent_id"] = str(agent_id)
+    if sub_agent_id:
+        doc_data["sub_agent_id"] = str(sub_agent_id)
+    if source_url:
+        doc_data["source_url"] = source_url
+
+    return doc_data
+
 
 async def add_document(
     organization_id: UUID,
@@ -36,32 +104,29 @@ async def add_document(
         source_url: Optional source URL
 
     Returns:
-        The created document record
+        The created document record (without embedding)
     """
     try:
         # Generate embedding
         embedding = await generate_embedding(content)
 
         # Prepare document data
-        doc_data = {
-            "organization_id": str(organization_id),
-            "content": content,
-            "embedding": embedding,
-            "metadata": metadata or {},
-            "document_type": document_type,
-        }
-
-        if store_id:
-            doc_data["store_id"] = str(store_id)
-        if agent_id:
-            doc_data["agent_id"] = str(agent_id)
-        if sub_agent_id:
-            doc_data["sub_agent_id"] = str(sub_agent_id)
-        if source_url:
-            doc_data["source_url"] = source_url
+        doc_data = _document_row(
+            organization_id,
+            content,
+            embedding,
+            metadata=metadata,
+            store_id=store_id,
+            agent_id=agent_id,
+            sub_agent_id=sub_agent_id,
+            document_type=document_type,
+            source_url=source_url,
+        )
 
         # Insert into database
-        result = supabase.table("knowledge_base").insert(doc_data).execute()
+        result = (
+            supabase.table("knowledge_base").insert(doc_data).select(DOCUMENT_COLS).execute()
+        )
 
         if not result.data:
             raise Exception("Failed to insert document")
@@ -74,6 +139,96 @@ async def add_document(
         raise
 
 
+async def add_documents_bulk(organization_id: UUID, documents: list[dict]) -> list[dict]:
+    """
+    Add many documents to the knowledge base.
+
+    Documents are embedded EMBEDDING_BATCH_SIZE at a time (one API call per
+    batch) and each batch is stored with a single multi-row insert. The
+    embedding call for the next batch runs while the current batch is
+    being inserted.
+
+    Args:
+        organization_id: Organization the documents belong to
+        documents: Documents as dicts of add_document's keyword arguments
+            (content, metadata, store_id, agent_id, sub_agent_id,
+            document_type, source_url)
+
+    Returns:
+        The created document records (without embeddings)
+    """
+    if any(not doc["content"].strip() for doc in documents):
+        raise ValueError("Empty text cannot be embedded")
+
+    batches = [
+        documents[i:i + EMBEDDING_BATCH_SIZE]
+        for i in range(0, len(documents), EMBEDDING_BATCH_SIZE)
+    ]
+
+    def embed(batch: list[dict]) -> asyncio.Task:
+        return asyncio.create_task(
+            generate_embeddings_batch([doc["content"] for doc in batch])
+        )
+
+    created = []
+    try:
+        next_embeddings = embed(batches[0]) if batches else None
+        for i, batch in enumerate(batches):
+            embeddings = await next_embeddings
+            if i + 1 < len(batches):
+                next_embeddings = embed(batches[i + 1])
+
+            rows = [
+                _document_row(organization_id, embedding=embedding, **doc)
+                for doc, embedding in zip(batch, embeddings, strict=True)
+            ]
+            result = await asyncio.to_thread(
+                supabase.table("knowledge_base").insert(rows).select(DOCUMENT_COLS).execute
+            )
+            created.extend(result.data)
+
+        logger.info(f"Added {len(created)} documents to knowledge base")
+        return created
+
+    except Exception as e:
+        if next_embeddings and not next_embeddings.done():
+            next_embeddings.cancel()
+        logger.error(f"Error adding documents: {e}")
+        raise
+
+
+def _search_query(
+    organization_id: UUID,
+    query_embedding: list[float],
+    store_id: UUID = None,
+    match_threshold: float = 0.75,
+    match_count: int = 5,
+):
+    """Build the similarity search RPC (store-specific when store_id is given)."""
+    if store_id:
+        # Use store-specific search function
+        return async_supabase.rpc(
+            "search_store_knowledge",
+            {
+                "query_embedding": to_vector_literal(query_embedding),
+                "p_store_id": str(store_id),
+                "match_threshold": match_threshold,
+                "match_count": match_count,
+            },
+        )
+
+    # Use general organization search function
+    return async_supabase.rpc(
+        "search_knowledge_base",
+        {
+            "query_embedding": to_vector_literal(query_embedding),
+            "org_id": str(organization_id),
+            "match_threshold": match_threshold,
+            "match_count": match_count,
+        },
+    )
+
+
 async def search_knowledge(
     organization_id: UUID,
     query: str,
@@ -95,41 +250,100 @@ async def search_knowledge(
         List of matching documents with similarity scores
     """
     try:
-        # Generate query embedding
-        query_embedding = await generate_embedding(query)
-
-        # Use the appropriate search function based on whether store_id is provided
-        if store_id:
-            # Use store-specific search function
-            result = supabase.rpc(
-                "search_store_knowledge",
-                {
-                    "query_embedding": query_embedding,
-                    "p_store_id": str(store_id),
-                    "match_threshold": match_threshold,
-                    "match_count": match_count,
-                },
-            ).execute()
+        query_embedding = await generate_query_embedding(query)
+
+        if get_db_pool():
+            matches = await fetch_all(
+                Q_SEARCH_STORE_KNOWLEDGE if store_id else Q_SEARCH_KNOWLEDGE,
+                query_embedding,
+                store_id or organization_id,
+                match_threshold,
+                match_count,
+            )
         else:
-            # Use general organization search function
-            result = supabase.rpc(
-                "search_knowledge_base",
-                {
-                    "query_embedding": query_embedding,
-                    "org_id": str(organization_id),
-                    "match_threshold": match_threshold,
-                    "match_count": match_count,
-                },
+            result = await _search_query(
+                organization_id, query_embedding, store_id, match_threshold, match_count
             ).execute()
+            matches = result.data
 
-        logger.info(f"Found {len(result.data)} matches for query")
-        return result.data
+        logger.info(f"Found {len(matches)} matches for query")
+        return matches
 
     except Exception as e:
         logger.error(f"Error searching knowledge base: {e}")
         return []
 
 
+async def search_knowledge_json(
+    organization_id: UUID,
+    query: str,
+    store_id: UUID = None,
+    match_threshold: float = 0.75,
+    match_count: int = 5,
+) -> bytes:
+    """
+    Like search_knowledge, but returns the raw JSON array from PostgREST.
+
+    Lets the caller parse and validate the matches in a single pass
+    (`TypeAdapter.validate_json`) instead of decoding them to dicts first.
+
+    Returns:
+        JSON array of matching documents (`[]` on error)
+    """
+    try:
+        query_embedding = await generate_query_embedding(query)
+
+        if get_db_pool():
+            matches = await fetch_value(
+                Q_SEARCH_STORE_KNOWLEDGE_JSON if store_id else Q_SEARCH_KNOWLEDGE_JSON,
+                query_embedding,
+                store_id or organization_id,
+                match_threshold,
+                match_count,
+            )
+            return matches.encode()
+
+        response = await execute_raw(
+            _search_query(
+                organization_id, query_embedding, store_id, match_threshold, match_count
+            )
+        )
+        return response.content
+
+    except Exception as e:
+        logger.error(f"Error searching knowledge base: {e}")
+        return b"[]"
+
+
+def format_context_documents(results: list[dict], max_tokens: int) -> list[str]:
+    """
+    Format search matches for a prompt, within a token budget.
+
+    Keeps the longest prefix of matches whose combined size fits in
+    max_tokens (matches come ordered by similarity). Uses the token_count
+    stored at ingest when the search returns it.
+
+    Args:
+        results: Matches from a knowledge search RPC
+        max_tokens: Maximum tokens of document content to include
+
+    Returns:
+        One formatted block per included document
+    """
+    budget = bisect_right(
+        list(accumulate(
+            doc.get("token_count") or count_tokens(doc.get("content", ""))
+            for doc in results
+        )),
+        max_tokens,
+    )
+    return [
+        f"[{doc.get('document_type', 'general').upper()} - Relevancia: "
+        f"{doc.get('similarity', 0):.2f}]\n{doc.get('content', '')}"
+        for doc in results[:budget]
+    ]
+
+
 async def get_relevant_context(
     organization_id: UUID,
     query: str,
@@ -159,25 +373,7 @@ async def get_relevant_context(
         if not results:
             return ""
 
-        # Build context string
-        context_parts = []
-        current_length = 0
-
-        for doc in results:
-            content = doc.get("content", "")
-            # Rough token estimation (4 chars per token)
-            estimated_tokens = len(content) // 4
-
-            if current_length + estimated_tokens > max_tokens:
-                break
-
-            similarity = doc.get("similarity", 0)
-            doc_type = doc.get("document_type", "general")
-
-            context_parts.append(
-                f"[{doc_type.upper()} - Relevancia: {similarity:.2f}]\n{content}"
-            )
-            current_length += estimated_tokens
+        context_parts = format_context_documents(results, max_tokens)
 
         if context_parts:
             return "CONTEXTO RELEVANTE:\n\n" + "\n\n---\n\n".join(context_parts)
@@ -209,6 +405,64 @@ async def delete_document(document_id: UUID) -> bool:
         return False
 
 
+async def get_document(document_id: UUID, organization_id: UUID) -> dict | None:
+    """
+    Get a single document (without embedding).
+
+    Args:
+        document_id: ID of the document
+        organization_id: Organization the document must belong to
+
+    Returns:
+        Document data or None if not found
+    """
+    try:
+        result = (
+            supabase.table("knowledge_base")
+            .select(DOCUMENT_COLS)
+            .eq("id", str(document_id))
+            .eq("organization_id", str(organization_id))
+            .maybe_single()
+            .execute()
+        )
+        return result.data if result else None
+    except Exception as e:
+        logger.error(f"Error getting document: {e}")
+        return None
+
+
+def _documents_query(
+    organization_id: UUID,
+    store_id: UUID = None,
+    agent_id: UUID = None,
+    sub_agent_id: UUID = None,
+    document_type: str = None,
+    limit: int = 50,
+    offset: int = 0,
+    include_content: bool = True,
+):
+    """Build the paginated knowledge_base query used by the list views."""
+    query = (
+        async_supabase.table("knowledge_base")
+        .select(
+            DOCUMENT_COLS if include_content else DOCUMENT_SUMMARY_COLS,
+            count="exact",
+        )
+        .eq("organization_id", str(organization_id))
+    )
+
+    if store_id:
+        query = query.eq("store_id", str(store_id))
+    if agent_id:
+        query = query.eq("agent_id", str(agent_id))
+    if sub_agent_id:
+        query = query.eq("sub_agent_id", str(sub_agent_id))
+    if document_type:
+        query = query.eq("document_type", document_type)
+
+    return query.order("created_at", desc=True).range(offset, offset + limit - 1)
+
+
 async def list_documents(
     organization_id: UUID,
     store_id: UUID = None,
@@ -217,7 +471,8 @@ async def list_documents(
     document_type: str = None,
     limit: int = 50,
     offset: int = 0,
-) -> list[dict]:
+    include_content: bool = True,
+) -> tuple[list[dict], int]:
     """
     List documents in the knowledge base.
 
@@ -228,34 +483,51 @@ async def list_documents(
         document_type: Optional document type filter
         limit: Max results
         offset: Pagination offset
+        include_content: If false, omit the (potentially large) content body
 
     Returns:
-        List of documents (without embeddings)
+        Page of documents (without embeddings) and the total matching count
     """
     try:
-        query = (
-            supabase.table("knowledge_base")
-            .select("id, content, metadata, document_type, source_url, store_id, agent_id, sub_agent_id, created_at")
-            .eq("organization_id", str(organization_id))
-        )
+        result = await _documents_query(
+            organization_id, store_id, agent_id, sub_agent_id,
+            document_type, limit, offset, include_content,
+        ).execute()
+        return result.data, result.count or 0
 
-        if store_id:
-            query = query.eq("store_id", str(store_id))
-        if agent_id:
-            query = query.eq("agent_id", str(agent_id))
-        if sub_agent_id:
-            query = query.eq("sub_agent_id", str(sub_agent_id))
-        if document_type:
-            query = query.eq("document_type", document_type)
+    except Exception as e:
+        logger.error(f"Error listing documents: {e}")
+        return [], 0
 
-        result = (
-            query.order("created_at", desc=True)
-            .range(offset, offset + limit - 1)
-            .execute()
-        )
 
-        return result.data
+async def list_documents_json(
+    organization_id: UUID,
+    store_id: UUID = None,
+    agent_id: UUID = None,
+    sub_agent_id: UUID = None,
+    document_type: str = None,
+    limit: int = 50,
+    offset: int = 0,
+    include_content: bool = True,
+) -> tuple[bytes, int]:
+    """
+    Like list_documents, but returns the page as the raw JSON array.
+
+    The rows already have the API's document shape, so the bytes can be
+    written to the response without being decoded and re-encoded.
+
+    Returns:
+        JSON array of documents (`[]` on error) and the total matching count
+    """
+    try:
+        response = await execute_raw(
+            _documents_query(
+                organization_id, store_id, agent_id, sub_agent_id,
+                document_type, limit, offset, include_content,
+            )
+        )
+        return response.content, content_range_total(response)
 
     except Exception as e:
         logger.error(f"Error listing documents: {e}")
-        return []
+        return b"[]", 0
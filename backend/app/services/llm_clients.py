@@ -0,0 +1,49 @@
+"""
+LLM Clients Service
+Shared chat model clients, reused across requests and callers.
+"""
+
+from langchain_core.caches import InMemoryCache
+from langchain_openai import ChatOpenAI
+
+from app.core.config import settings
+
+# Shared response cache - identical prompts (system prompt incl. RAG context
+# + user message) for the same model config skip the API round-trip
+_response_cache = InMemoryCache(maxsize=settings.LLM_CACHE_MAXSIZE)
+
+# ChatOpenAI clients keyed by (model, temperature, max_tokens, use_cache) so
+# the underlying HTTP connection pool is reused across requests
+_llm_cache: dict[tuple[str, float, int | None, bool], ChatOpenAI] = {}
+
+
+def get_llm(
+    model: str,
+    temperature: float,
+    max_tokens: int | None = None,
+    use_cache: bool = False,
+) -> ChatOpenAI:
+    """
+    Get a cached ChatOpenAI client for the given configuration.
+
+    Args:
+        model: OpenAI model name
+        temperature: Sampling temperature
+        max_tokens: Maximum response tokens (None for the model default)
+        use_cache: Serve identical prompts from the shared response cache
+
+    Returns:
+        Chat model client (shared - do not mutate)
+    """
+    key = (model, temperature, max_tokens, use_cache)
+    llm = _llm_cache.get(key)
+    if llm is None:
+        llm = ChatOpenAI(
+            model=model,
+            api_key=settings.OPENAI_API_KEY,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            cache=_response_cache if use_cache else False,
+        )
+        _llm_cache[key] = llm
+    return llm
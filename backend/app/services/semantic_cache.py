@@ -0,0 +1,142 @@
+"""
+Semantic Cache Service
+Reuses agent responses for near-duplicate queries using embedding similarity.
+"""
+
+import logging
+import math
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Hashable
+from operator import mul
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    In-process cache of (query embedding -> response), partitioned by scope.
+
+    Each scope (organization + agent + store) keeps its own bounded list so
+    tenants never see each other's answers. Embeddings are normalized on
+    insert and stored as float32 arrays, so cosine similarity is a plain dot
+    product at lookup time. The number of scopes is capped as well; the least
+    recently used scope is dropped first.
+
+    Entries may carry a version (e.g. config timestamps): a lookup only
+    matches entries stored under the same version, and drops the others, so
+    config edits retire old entries without opening a new scope.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl_seconds: float = 3600,
+        max_entries: int = 64,
+        max_scopes: int = 128,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        self._scopes: OrderedDict[tuple, OrderedDict[int, tuple[array, str, float, Hashable]]] = OrderedDict()
+        self._next_id = 0
+
+    @staticmethod
+    def _normalize(embedding: list[float]) -> array:
+        norm = math.sqrt(sum(map(mul, embedding, embedding)))
+        if not norm:
+            return array("f", embedding)
+        return array("f", (x / norm for x in embedding))
+
+    def get(self, scope: tuple, embedding: list[float], version: Hashable = None) -> str | None:
+        """
+        Return the cached response most similar to the embedding.
+
+        Args:
+            scope: Partition key (e.g. organization, agent and store IDs)
+            embedding: Query embedding vector
+            version: Only entries stored with this version can match
+
+        Returns:
+            Cached response if similarity >= threshold, else None
+        """
+        entries = self._scopes.get(scope)
+        if not entries:
+            return None
+        self._scopes.move_to_end(scope)
+
+        query = self._normalize(embedding)
+        now = time.monotonic()
+        best_sim = 0.0
+        best_response = None
+
+        for entry_id, (vector, response, expires_at, entry_version) in list(entries.items()):
+            if expires_at < now or entry_version != version:
+                del entries[entry_id]
+                continue
+            sim = sum(map(mul, query, vector))
+            if sim > best_sim:
+                best_sim = sim
+                best_response = response
+
+        if best_sim >= self.threshold:
+            logger.info("Semantic cache hit (similarity=%.3f)", best_sim)
+            return best_response
+        return None
+
+    def set(
+        self,
+        scope: tuple,
+        embedding: list[float],
+        response: str,
+        version: Hashable = None,
+    ) -> None:
+        """
+        Store a response for the given query embedding.
+
+        Args:
+            scope: Partition key (e.g. organization, agent and store IDs)
+            embedding: Query embedding vector
+            response: Final agent response to reuse
+            version: Version the response is valid for
+        """
+        entries = self._scopes.get(scope)
+        if entries is None:
+            entries = self._scopes[scope] = OrderedDict()
+            # Drop least recently used scopes beyond capacity
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        else:
+            self._scopes.move_to_end(scope)
+        entries[self._next_id] = (
+            self._normalize(embedding),
+            response,
+            time.monotonic() + self.ttl_seconds,
+            version,
+        )
+        self._next_id += 1
+
+        # Evict oldest entries beyond capacity
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+
+# Singleton instances
+semantic_cache = SemanticCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    max_scopes=settings.SEMANTIC_CACHE_MAX_SCOPES,
+)
+
+# Sub-agent routing decisions (selected sub-agent id, "" for no match)
+routing_cache = SemanticCache(
+    threshold=settings.ROUTE_SEMANTIC_THRESHOLD,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    max_scopes=settings.SEMANTIC_CACHE_MAX_SCOPES,
+)
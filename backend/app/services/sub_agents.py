@@ -3,51 +3,174 @@ Sub-Agents Service
 Handles loading and routing to sub-agents for orchestrator agents.
 """
 
+import asyncio
+import hashlib
 import logging
+import re
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator
 from uuid import UUID
 from typing import Optional
 
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 
-from app.core.supabase import supabase
+from app.core.supabase import async_supabase
 from app.core.config import settings
-from app.services.knowledge_base import get_relevant_context
+from app.core.db import fetch_all, get_db_pool
+from app.services.embeddings import generate_query_embedding, to_vector_literal
+from app.services.knowledge_base import format_context_documents, get_relevant_context
+from app.services.llm_clients import get_llm
+from app.services.semantic_cache import routing_cache
+from app.tools import ainvoke_with_tools
 
 logger = logging.getLogger(__name__)
 
+# Routing decisions keyed by (parent agent, query digest, sub-agent versions)
+# -> (selected sub-agent id or None when the router picked none, confidence)
+_route_cache: dict[tuple, tuple[str | None, float]] = {}
 
-async def get_sub_agents(parent_agent_id: UUID) -> list[dict]:
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+# Static routing prompt prefixes keyed by (orchestrator name, sub-agent versions)
+_routing_preambles: dict[tuple, str] = {}
+ROUTING_PREAMBLE_MAXSIZE = 256
+
+# Sub-agent name lookups for resolving the router's reply, same keys
+_name_indexes: dict[tuple, tuple] = {}
+
+# Routing keyword lookups (pattern, keyword -> sub-agents), same keys
+_keyword_indexes: dict[tuple, tuple] = {}
+
+# Returned by _route_with_llm when the router call failed (not cached)
+_ROUTING_FAILED = object()
+
+# Routing confidence: the router's reply named a sub-agent exactly, or
+# only partially matched one (then the parent agent runs speculatively too)
+ROUTE_EXACT_CONFIDENCE = 1.0
+ROUTE_PARTIAL_CONFIDENCE = 0.5
+
+
+def _route_cache_key(parent_agent_id: str, user_message: str, sub_agents: list[dict]) -> tuple:
+    """
+    Key a routing decision.
+
+    The query is lower-cased with punctuation and repeated whitespace removed,
+    so trivially different phrasings share an entry. The sub-agent ids and
+    updated_at stamps are part of the key: adding, removing or editing a
+    sub-agent makes older decisions miss instead of going stale.
+    """
+    normalized = " ".join(_PUNCTUATION.sub("", user_message.lower()).split())
+    digest = hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+    versions = tuple(sorted((str(sa["id"]), str(sa.get("updated_at"))) for sa in sub_agents))
+    return parent_agent_id, digest, versions
+
+
+def _cached_sub_agent(sub_agents: list[dict], selected_id: str | None) -> Optional[dict]:
+    """Resolve a cached routing decision to its sub-agent config."""
+    return next((sa for sa in sub_agents if str(sa["id"]) == selected_id), None)
+
+
+# Sub-agent configs change rarely - a short TTL keeps the query off the
+# orchestration hot path; the sub-agent endpoints invalidate on writes
+SUB_AGENTS_CACHE_TTL_SECONDS = 60
+SUB_AGENTS_CACHE_MAXSIZE = 512
+
+_sub_agents_cache: dict[str, tuple[list[dict], float]] = {}
+_sub_agents_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+# Model that picks the sub-agent for a request
+ROUTER_MODEL = "gpt-4o-mini"
+
+# Sub-agent knowledge search parameters
+SUB_AGENT_MATCH_THRESHOLD = 0.70
+SUB_AGENT_MATCH_COUNT = 3
+
+# Direct pool versions of the sub-agent knowledge search RPCs
+Q_SEARCH_SUB_AGENT_KNOWLEDGE = (
+    "SELECT id, content, metadata, document_type, similarity, token_count"
+    " FROM search_sub_agent_knowledge($1, $2, $3, $4)"
+)
+Q_SEARCH_SUB_AGENT_KNOWLEDGE_BATCH = (
+    "SELECT sub_agent_id, id, content, metadata, document_type, similarity, token_count"
+    " FROM search_sub_agent_knowledge_batch($1, $2, $3, $4)"
+)
+
+
+def _format_sub_agent_context(matches: list[dict], max_tokens: int) -> str:
+    """Format a sub-agent's knowledge matches for its system prompt."""
+    context_parts = format_context_documents(matches, max_tokens)
+    if context_parts:
+        return "CONOCIMIENTO DEL SUB-AGENTE:\n\n" + "\n\n---\n\n".join(context_parts)
+    return ""
+
+
+def invalidate_sub_agents(parent_agent_id: UUID | str) -> None:
+    """
+    Drop a parent's cached sub-agents after one of them was modified.
+
+    Args:
+        parent_agent_id: UUID (or string) of the orchestrator agent
+    """
+    _sub_agents_cache.pop(str(parent_agent_id), None)
+
+
+async def get_sub_agents(parent_agent_id: UUID | str) -> list[dict]:
     """
     Load all active sub-agents for a parent (orchestrator) agent.
 
+    Served from a short-lived cache; concurrent misses for the same parent
+    share a single query.
+
     Args:
-        parent_agent_id: UUID of the orchestrator agent
+        parent_agent_id: UUID (or string) of the orchestrator agent
 
     Returns:
-        List of sub-agent configurations
+        List of sub-agent configurations (shared - do not mutate)
     """
-    try:
-        result = (
-            supabase.table("sub_agents")
-            .select("*")
-            .eq("parent_agent_id", str(parent_agent_id))
-            .eq("is_active", True)
-            .order("created_at")
-            .execute()
-        )
+    parent_id = str(parent_agent_id)
+    entry = _sub_agents_cache.get(parent_id)
+    if entry is not None and entry[1] >= time.monotonic():
+        return entry[0]
 
-        logger.info(f"Loaded {len(result.data)} sub-agents for parent {parent_agent_id}")
-        return result.data
+    async with _sub_agents_locks[parent_id]:
+        # Another request may have filled the cache while we waited
+        entry = _sub_agents_cache.get(parent_id)
+        if entry is not None and entry[1] >= time.monotonic():
+            return entry[0]
 
-    except Exception as e:
-        logger.error(f"Error loading sub-agents: {e}")
-        return []
+        try:
+            result = await (
+                async_supabase.table("sub_agents")
+                .select("*")
+                .eq("parent_agent_id", parent_id)
+                .eq("is_active", True)
+                .order("created_at")
+                .execute()
+            )
+        except Exception as e:
+            logger.error("Error loading sub-agents: %s", e)
+            return []
+        finally:
+            _sub_agents_locks.pop(parent_id, None)
+
+        logger.info("Loaded %d sub-agents for parent %s", len(result.data), parent_agent_id)
+
+        _sub_agents_cache.pop(parent_id, None)
+        if len(_sub_agents_cache) >= SUB_AGENTS_CACHE_MAXSIZE:
+            # Drop the oldest entry (dicts keep insertion order)
+            _sub_agents_cache.pop(next(iter(_sub_agents_cache)), None)
+        _sub_agents_cache[parent_id] = (
+            result.data,
+            time.monotonic() + SUB_AGENTS_CACHE_TTL_SECONDS,
+        )
+        return result.data
 
 
 async def get_sub_agent_knowledge(
     organization_id: UUID,
-    sub_agent_id: UUID,
+    sub_agent_id: UUID | str,
     query: str,
     max_tokens: int = 1500,
 ) -> str:
@@ -56,7 +179,7 @@ async def get_sub_agent_knowledge(
 
     Args:
         organization_id: Organization ID
-        sub_agent_id: Sub-agent ID
+        sub_agent_id: Sub-agent ID (UUID or its string form)
         query: User's query
         max_tokens: Maximum tokens for context
 
@@ -65,70 +188,183 @@ async def get_sub_agent_knowledge(
     """
     try:
         # Use the RPC function for sub-agent knowledge search
-        from app.services.embeddings import generate_embedding
-
-        query_embedding = await generate_embedding(query)
-
-        result = supabase.rpc(
-            "search_sub_agent_knowledge",
-            {
-                "query_embedding": query_embedding,
-                "p_sub_agent_id": str(sub_agent_id),
-                "match_threshold": 0.70,
-                "match_count": 3,
-            },
-        ).execute()
+        query_embedding = await generate_query_embedding(query)
+
+        if get_db_pool():
+            matches = await fetch_all(
+                Q_SEARCH_SUB_AGENT_KNOWLEDGE,
+                query_embedding,
+                sub_agent_id,
+                SUB_AGENT_MATCH_THRESHOLD,
+                SUB_AGENT_MATCH_COUNT,
+            )
+        else:
+            matches = (await async_supabase.rpc(
+                "search_sub_agent_knowledge",
+                {
+                    "query_embedding": to_vector_literal(query_embedding),
+                    "p_sub_agent_id": str(sub_agent_id),
+                    "match_threshold": SUB_AGENT_MATCH_THRESHOLD,
+                    "match_count": SUB_AGENT_MATCH_COUNT,
+                },
+            ).execute()).data
+
+        return _format_sub_agent_context(matches, max_tokens) if matches else ""
 
-        if not result.data:
-            return ""
+    except Exception as e:
+        logger.error("Error getting sub-agent knowledge: %s", e)
+        return ""
 
-        # Format context
-        context_parts = []
-        current_length = 0
 
-        for doc in result.data:
-            content = doc.get("content", "")
-            estimated_tokens = len(content) // 4
+async def get_sub_agents_knowledge(
+    sub_agent_ids: list[str],
+    query: str,
+    max_tokens: int = 1500,
+) -> dict[str, str]:
+    """
+    Get knowledge context for several sub-agents in one search.
 
-            if current_length + estimated_tokens > max_tokens:
-                break
+    Embeds the query once and runs a single search_sub_agent_knowledge_batch
+    call instead of one embedding + RPC per sub-agent.
 
-            similarity = doc.get("similarity", 0)
-            doc_type = doc.get("document_type", "general")
+    Args:
+        sub_agent_ids: Sub-agent IDs
+        query: User's query
+        max_tokens: Maximum tokens per sub-agent context
 
-            context_parts.append(
-                f"[{doc_type.upper()} - Relevancia: {similarity:.2f}]\n{content}"
-            )
-            current_length += estimated_tokens
+    Returns:
+        Formatted context per sub-agent ID ("" when nothing matched)
 
-        if context_parts:
-            return "CONOCIMIENTO DEL SUB-AGENTE:\n\n" + "\n\n---\n\n".join(context_parts)
+    Raises:
+        Exception: If the search fails (callers fall back to per-agent search)
+    """
+    query_embedding = await generate_query_embedding(query)
+
+    if get_db_pool():
+        rows = await fetch_all(
+            Q_SEARCH_SUB_AGENT_KNOWLEDGE_BATCH,
+            query_embedding,
+            sub_agent_ids,
+            SUB_AGENT_MATCH_THRESHOLD,
+            SUB_AGENT_MATCH_COUNT,
+        )
+    else:
+        rows = (await async_supabase.rpc(
+            "search_sub_agent_knowledge_batch",
+            {
+                "query_embedding": to_vector_literal(query_embedding),
+                "p_sub_agent_ids": sub_agent_ids,
+                "match_threshold": SUB_AGENT_MATCH_THRESHOLD,
+                "match_count": SUB_AGENT_MATCH_COUNT,
+            },
+        ).execute()).data
 
-        return ""
+    # Rows come grouped by sub-agent, most similar first
+    matches: dict[str, list[dict]] = {str(sa_id): [] for sa_id in sub_agent_ids}
+    for row in rows:
+        matches.setdefault(str(row["sub_agent_id"]), []).append(row)
 
-    except Exception as e:
-        logger.error(f"Error getting sub-agent knowledge: {e}")
-        return ""
+    return {
+        sa_id: _format_sub_agent_context(docs, max_tokens)
+        for sa_id, docs in matches.items()
+    }
 
 
 async def route_to_sub_agent(
     user_message: str,
     sub_agents: list[dict],
     orchestrator_name: str = "Orchestrator",
-) -> Optional[dict]:
+    parent_agent_id: Optional[str] = None,
+) -> tuple[Optional[dict], float]:
     """
     Use LLM to decide which sub-agent should handle the request.
 
+    Messages matching exactly one sub-agent's routing keywords are routed
+    without the LLM. When parent_agent_id is given, decisions are cached so
+    repeated requests skip the router LLM call: first by exact normalized
+    query, then by query embedding similarity so paraphrases reuse the
+    decision too. The query embedding is cached, so the sub-agent knowledge
+    search reuses it.
+
     Args:
         user_message: The user's message
         sub_agents: List of available sub-agents
         orchestrator_name: Name of the parent orchestrator
+        parent_agent_id: ID of the orchestrator (enables the routing cache)
 
     Returns:
-        Selected sub-agent config or None if no match
+        Selected sub-agent config (None if no match) and the routing
+        confidence (ROUTE_EXACT_CONFIDENCE or ROUTE_PARTIAL_CONFIDENCE)
     """
     if not sub_agents:
-        return None
+        return None, ROUTE_EXACT_CONFIDENCE
+
+    # Unambiguous keyword match - no LLM call needed
+    selected = _match_keywords(user_message, sub_agents)
+    if selected is not None:
+        logger.info("[Router] Keyword match: %s", selected["name"])
+        return selected, ROUTE_EXACT_CONFIDENCE
+
+    if not parent_agent_id:
+        routed = await _route_with_llm(user_message, sub_agents, orchestrator_name)
+        return (None, ROUTE_EXACT_CONFIDENCE) if routed is _ROUTING_FAILED else routed
+
+    cache_key = _route_cache_key(str(parent_agent_id), user_message, sub_agents)
+    if settings.ROUTE_CACHE_ENABLED and cache_key in _route_cache:
+        selected_id, confidence = _route_cache[cache_key]
+        logger.info("[Router] Cache hit: %s", selected_id)
+        return _cached_sub_agent(sub_agents, selected_id), confidence
+
+    # Semantic tier, scoped to this orchestrator; entries carry the sub-agent
+    # versions so edits retire old decisions instead of opening a new scope
+    scope = (cache_key[0],)
+    versions = cache_key[2]
+    query_embedding = None
+    if settings.ROUTE_SEMANTIC_CACHE_ENABLED:
+        try:
+            query_embedding = await generate_query_embedding(user_message)
+            selected_id = routing_cache.get(scope, query_embedding, versions)
+            if selected_id is not None:
+                logger.info("[Router] Semantic cache hit: %s", selected_id or "NONE")
+                return _cached_sub_agent(sub_agents, selected_id), ROUTE_EXACT_CONFIDENCE
+        except Exception as e:
+            logger.warning("[Router] Error checking routing cache: %s", e)
+
+    routed = await _route_with_llm(user_message, sub_agents, orchestrator_name)
+    if routed is _ROUTING_FAILED:
+        return None, ROUTE_EXACT_CONFIDENCE
+
+    selected, confidence = routed
+    selected_id = str(selected["id"]) if selected else None
+    if settings.ROUTE_CACHE_ENABLED:
+        if len(_route_cache) >= settings.ROUTE_CACHE_MAXSIZE:
+            # Drop the oldest entry (dicts keep insertion order)
+            _route_cache.pop(next(iter(_route_cache)), None)
+        _route_cache[cache_key] = (selected_id, confidence)
+    # Paraphrases only reuse confident decisions
+    if query_embedding is not None and confidence >= ROUTE_EXACT_CONFIDENCE:
+        routing_cache.set(scope, query_embedding, selected_id or "", versions)
+
+    return selected, confidence
+
+
+def _routing_preamble(sub_agents: list[dict], orchestrator_name: str) -> str:
+    """
+    Build the static part of the routing prompt (everything before the user request).
+
+    Sub-agents are sorted by id so the text is byte-identical across requests
+    for the same orchestrator, which lets OpenAI's prompt prefix cache reuse
+    it. Preambles are cached per orchestrator and sub-agent versions, so an
+    edited sub-agent gets a fresh one.
+    """
+    sub_agents = sorted(sub_agents, key=lambda sa: str(sa["id"]))
+    key = (
+        orchestrator_name,
+        tuple((str(sa["id"]), str(sa.get("updated_at"))) for sa in sub_agents),
+    )
+    preamble = _routing_preambles.get(key)
+    if preamble is not None:
+        return preamble
 
     # Build routing prompt with sub-agent descriptions
     sub_agent_descriptions = "\n".join([
@@ -136,7 +372,7 @@ async def route_to_sub_agent(
         for sa in sub_agents
     ])
 
-    routing_prompt = f"""You are a router for {orchestrator_name}. Analyze the user request and decide which specialized sub-agent should handle it.
+    preamble = f"""You are a router for {orchestrator_name}. Analyze the user request and decide which specialized sub-agent should handle it.
 
 AVAILABLE SUB-AGENTS:
 {sub_agent_descriptions}
@@ -147,146 +383,388 @@ RULES:
 3. If no sub-agent is a good match, respond with "NONE"
 4. Respond with ONLY the exact sub-agent name or "NONE"
 
-User request: {user_message}
+"""
+    if len(_routing_preambles) >= ROUTING_PREAMBLE_MAXSIZE:
+        # Drop the oldest entry (dicts keep insertion order)
+        _routing_preambles.pop(next(iter(_routing_preambles)), None)
+    _routing_preambles[key] = preamble
+    return preamble
+
+
+def _sub_agent_name_index(sub_agents: list[dict]) -> tuple:
+    """
+    Get the lower-cased name lookups for a sub-agent list.
+
+    Returns (records, by_name, names_text, names_pattern): exact names map
+    to their record, names_text holds all names NUL-separated (for finding
+    a reply inside a name) and names_pattern matches any name inside a reply.
+    Cached per sub-agent versions like the routing preambles.
+    """
+    key = tuple((str(sa["id"]), str(sa.get("updated_at"))) for sa in sub_agents)
+    index = _name_indexes.get(key)
+    if index is not None:
+        return index
+
+    names = [sa["name"].lower() for sa in sub_agents]
+    by_name: dict[str, dict] = {}
+    for name, sa in zip(names, sub_agents):
+        by_name.setdefault(name, sa)
+
+    # Longest names first so the alternation prefers the most specific name
+    alternatives = sorted({name for name in names if name}, key=len, reverse=True)
+    names_pattern = re.compile("|".join(map(re.escape, alternatives))) if alternatives else None
+
+    index = (list(sub_agents), by_name, "\0".join(names), names_pattern)
+    if len(_name_indexes) >= ROUTING_PREAMBLE_MAXSIZE:
+        # Drop the oldest entry (dicts keep insertion order)
+        _name_indexes.pop(next(iter(_name_indexes)), None)
+    _name_indexes[key] = index
+    return index
+
+
+def _sub_agent_keyword_index(sub_agents: list[dict]) -> tuple:
+    """
+    Get the routing keyword lookups for a sub-agent list.
+
+    Returns (keywords_pattern, by_keyword): one case-insensitive whole-word
+    alternation over every sub-agent's capabilities.routing_keywords (None
+    when there are none) and each lower-cased keyword's sub-agents.
+    Cached per sub-agent versions like the routing preambles.
+    """
+    key = tuple((str(sa["id"]), str(sa.get("updated_at"))) for sa in sub_agents)
+    index = _keyword_indexes.get(key)
+    if index is not None:
+        return index
+
+    by_keyword: dict[str, list[dict]] = {}
+    for sa in sub_agents:
+        for keyword in (sa.get("capabilities") or {}).get("routing_keywords") or ():
+            keyword = keyword.strip().lower()
+            if keyword and sa not in by_keyword.setdefault(keyword, []):
+                by_keyword[keyword].append(sa)
+
+    # Longest keywords first so the alternation prefers the most specific one.
+    # Lookarounds instead of \b so keywords ending in symbols ("c++") match.
+    alternatives = sorted(by_keyword, key=len, reverse=True)
+    keywords_pattern = (
+        re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, alternatives)) + r")(?!\w)", re.IGNORECASE)
+        if alternatives
+        else None
+    )
+
+    index = (keywords_pattern, by_keyword)
+    if len(_keyword_indexes) >= ROUTING_PREAMBLE_MAXSIZE:
+        # Drop the oldest entry (dicts keep insertion order)
+        _keyword_indexes.pop(next(iter(_keyword_indexes)), None)
+    _keyword_indexes[key] = index
+    return index
+
+
+def _match_keywords(user_message: str, sub_agents: list[dict]) -> Optional[dict]:
+    """Pick the sub-agent whose routing keywords match, if exactly one does."""
+    keywords_pattern, by_keyword = _sub_agent_keyword_index(sub_agents)
+    if keywords_pattern is None:
+        return None
+
+    matched: dict[str, dict] = {}
+    for match in keywords_pattern.finditer(user_message):
+        for sa in by_keyword[match.group().lower()]:
+            matched[str(sa["id"])] = sa
+        if len(matched) > 1:
+            return None
+
+    return next(iter(matched.values()), None)
+
+
+def _match_sub_agent(selected_name: str, sub_agents: list[dict]) -> tuple[Optional[dict], float]:
+    """Resolve the router's reply to a sub-agent and a routing confidence."""
+    records, by_name, names_text, names_pattern = _sub_agent_name_index(sub_agents)
+    selected = selected_name.lower()
+
+    # Find matching sub-agent
+    sa = by_name.get(selected)
+    if sa is not None:
+        return sa, ROUTE_EXACT_CONFIDENCE
+
+    # Fuzzy match - a name containing the reply, then a name inside the reply
+    position = names_text.find(selected) if "\0" not in selected else -1
+    if position >= 0:
+        return records[names_text.count("\0", 0, position)], ROUTE_PARTIAL_CONFIDENCE
+    if names_pattern is not None:
+        match = names_pattern.search(selected)
+        if match:
+            return by_name[match.group()], ROUTE_PARTIAL_CONFIDENCE
+
+    return None, ROUTE_EXACT_CONFIDENCE
+
+
+async def _route_with_llm(
+    user_message: str,
+    sub_agents: list[dict],
+    orchestrator_name: str,
+):
+    """Ask the router LLM for (sub-agent or None, confidence); _ROUTING_FAILED on error."""
+    routing_prompt = f"""{_routing_preamble(sub_agents, orchestrator_name)}User request: {user_message}
 
 Which sub-agent should handle this? Respond with the exact name or NONE:"""
 
     try:
-        llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            api_key=settings.OPENAI_API_KEY,
-            temperature=0,
-        )
-
-        response = llm.invoke([
+        response = await get_llm(ROUTER_MODEL, 0).ainvoke([
             SystemMessage(content=routing_prompt),
         ])
 
         selected_name = response.content.strip()
-        logger.info(f"[Router] Selected sub-agent: {selected_name}")
+        logger.info("[Router] Selected sub-agent: %s", selected_name)
 
         if selected_name.upper() == "NONE":
-            return None
+            return None, ROUTE_EXACT_CONFIDENCE
 
-        # Find matching sub-agent
-        for sa in sub_agents:
-            if sa["name"].lower() == selected_name.lower():
-                return sa
-
-        # Fuzzy match - try partial match
-        for sa in sub_agents:
-            if selected_name.lower() in sa["name"].lower() or sa["name"].lower() in selected_name.lower():
-                return sa
-
-        return None
+        return _match_sub_agent(selected_name, sub_agents)
 
     except Exception as e:
-        logger.error(f"Error routing to sub-agent: {e}")
-        return None
+        logger.error("Error routing to sub-agent: %s", e)
+        return _ROUTING_FAILED
 
 
-async def execute_sub_agent(
+async def _sub_agent_context(
     sub_agent: dict,
     user_message: str,
-    organization_id: Optional[str] = None,
-    rag_context: str = "",
+    organization_id: Optional[UUID],
 ) -> str:
+    """Knowledge context for a sub-agent ("" when RAG is disabled or fails)."""
+    if not (_rag_enabled(sub_agent) and organization_id):
+        return ""
+    try:
+        return await get_sub_agent_knowledge(
+            organization_id=organization_id,
+            sub_agent_id=sub_agent["id"],
+            query=user_message,
+        )
+    except Exception as e:
+        logger.error("Error getting sub-agent knowledge: %s", e)
+        return ""
+
+
+def _rag_enabled(sub_agent: dict) -> bool:
+    """Whether a sub-agent uses its own knowledge base."""
+    return sub_agent.get("capabilities", {}).get("rag_enabled", True)
+
+
+async def _route_with_prefetch(
+    user_message: str,
+    sub_agents: list[dict],
+    orchestrator_name: str,
+    parent_agent_id: str,
+    organization_id: Optional[UUID],
+) -> tuple[Optional[dict], Optional[str], float]:
     """
-    Execute a sub-agent to handle the user's request.
+    Route to a sub-agent while prefetching the sub-agents' knowledge.
 
-    Args:
-        sub_agent: Sub-agent configuration
-        user_message: User's message
-        organization_id: Organization ID for RAG
-        rag_context: Optional pre-fetched RAG context
+    One batched knowledge search for every RAG-enabled sub-agent runs
+    concurrently with the router (both share one query embedding), so the
+    selected sub-agent's context is ready when routing finishes.
 
     Returns:
-        Sub-agent's response
+        Selected sub-agent (or None), its prefetched context (None when
+        it has to be fetched separately) and the routing confidence
     """
+    rag_ids = [str(sa["id"]) for sa in sub_agents if _rag_enabled(sa)]
+    prefetch = (
+        asyncio.create_task(get_sub_agents_knowledge(rag_ids, user_message))
+        if organization_id and rag_ids
+        else None
+    )
+
+    try:
+        selected, confidence = await route_to_sub_agent(
+            user_message, sub_agents, orchestrator_name, parent_agent_id=parent_agent_id
+        )
+    except BaseException:
+        if prefetch:
+            prefetch.cancel()
+        raise
+
+    if prefetch is None:
+        return selected, None, confidence
+    if selected is None or str(selected["id"]) not in rag_ids:
+        prefetch.cancel()
+        return selected, None, confidence
+
+    try:
+        contexts = await prefetch
+    except Exception as e:
+        logger.warning("[%s] Knowledge prefetch failed: %s", orchestrator_name, e)
+        return selected, None, confidence
+    return selected, contexts.get(str(selected["id"]), ""), confidence
+
+
+# Prompt used when a sub-agent has no system_prompt configured
+_DEFAULT_SYSTEM_PROMPT = """Eres {name}, un asistente experto en copywriting y marketing.
+Tu rol es: {role}
+
+Ayudas a crear contenido persuasivo y efectivo para marketing digital.
+Responde siempre en español de manera profesional y creativa."""
+
+# Wrappers around the sub-agent knowledge and the orchestrator's RAG context
+_KNOWLEDGE_HEADER = "\n\n---\n"
+_KNOWLEDGE_FOOTER = (
+    "\n---\n\nUtiliza el conocimiento anterior para informar tus respuestas "
+    "cuando sea relevante."
+)
+_RAG_HEADER = "\n\n---\nCONTEXTO ADICIONAL DEL ORQUESTADOR:\n"
+_RAG_FOOTER = "\n---"
+
+
+async def _prepare_sub_agent_call(
+    sub_agent: dict,
+    user_message: str,
+    organization_id: Optional[UUID] = None,
+    rag_context: str = "",
+    sub_agent_context: Optional[str] = None,
+) -> tuple[ChatOpenAI, list]:
+    """Build the LLM client and prompt messages for a sub-agent call."""
     sub_agent_name = sub_agent.get("name", "Sub-Agent")
 
     # Handle empty or None system_prompt
     system_prompt = sub_agent.get("system_prompt") or ""
     if not system_prompt.strip():
         # Use a default copywriting prompt if none provided
-        system_prompt = f"""Eres {sub_agent_name}, un asistente experto en copywriting y marketing.
-Tu rol es: {sub_agent.get('role', 'Asistente de Marketing')}
-
-Ayudas a crear contenido persuasivo y efectivo para marketing digital.
-Responde siempre en español de manera profesional y creativa."""
-        print(f"[{sub_agent_name}] WARNING: No system_prompt found, using default")
+        system_prompt = _DEFAULT_SYSTEM_PROMPT.format(
+            name=sub_agent_name,
+            role=sub_agent.get("role", "Asistente de Marketing"),
+        )
+        logger.warning("[%s] No system_prompt found, using default", sub_agent_name)
 
     ai_model = sub_agent.get("ai_model") or "gpt-4o-mini"
     temperature = sub_agent.get("temperature") if sub_agent.get("temperature") is not None else 0.7
     max_tokens = sub_agent.get("max_tokens") or 2048
 
-    print(f"[{sub_agent_name}] Executing with model={ai_model}, temp={temperature}")
-    print(f"[{sub_agent_name}] System prompt length: {len(system_prompt)} chars")
-    print(f"[{sub_agent_name}] User message: {user_message[:100]}...")
+    logger.info("[%s] Executing with model=%s, temp=%s", sub_agent_name, ai_model, temperature)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "[%s] System prompt length: %d chars, user message: %s...",
+            sub_agent_name, len(system_prompt), user_message[:100],
+        )
 
-    # Get sub-agent specific knowledge if RAG is enabled
-    sub_agent_context = ""
-    capabilities = sub_agent.get("capabilities", {})
-    if capabilities.get("rag_enabled", True) and organization_id:
-        try:
-            sub_agent_context = await get_sub_agent_knowledge(
-                organization_id=UUID(organization_id),
-                sub_agent_id=UUID(sub_agent["id"]),
-                query=user_message,
-            )
-        except Exception as e:
-            logger.error(f"Error getting sub-agent knowledge: {e}")
+    # Get sub-agent specific knowledge (unless prefetched during routing)
+    if sub_agent_context is None:
+        sub_agent_context = await _sub_agent_context(sub_agent, user_message, organization_id)
 
-    # Build full system prompt with context
-    full_prompt = system_prompt
+    # Build full system prompt with context (one join, no intermediate copies)
+    parts = [system_prompt]
     if sub_agent_context:
-        full_prompt = f"""{system_prompt}
+        parts += (_KNOWLEDGE_HEADER, sub_agent_context, _KNOWLEDGE_FOOTER)
+    if rag_context:
+        parts += (_RAG_HEADER, rag_context, _RAG_FOOTER)
+    full_prompt = "".join(parts)
 
----
-{sub_agent_context}
----
+    # Response caching is opt-in per sub-agent (cached answers are replayed verbatim)
+    capabilities = sub_agent.get("capabilities") or {}
+    use_cache = settings.LLM_CACHE_ENABLED and capabilities.get("llm_cache_enabled", False)
 
-Utiliza el conocimiento anterior para informar tus respuestas cuando sea relevante."""
+    llm = get_llm(ai_model, temperature, max_tokens, use_cache)
+    messages = [
+        SystemMessage(content=full_prompt),
+        HumanMessage(content=user_message),
+    ]
+    return llm, messages
 
-    if rag_context:
-        full_prompt = f"""{full_prompt}
 
----
-CONTEXTO ADICIONAL DEL ORQUESTADOR:
-{rag_context}
----"""
+async def _invoke_sub_agent(
+    sub_agent: dict,
+    user_message: str,
+    organization_id: Optional[UUID],
+    rag_context: str,
+    tools: Optional[list],
+    sub_agent_context: Optional[str],
+) -> str:
+    """Run a sub-agent and return its response (raises on failure)."""
+    sub_agent_name = sub_agent.get("name", "Sub-Agent")
+    llm, messages = await _prepare_sub_agent_call(
+        sub_agent, user_message, organization_id, rag_context, sub_agent_context
+    )
+
+    response = await ainvoke_with_tools(llm, messages, tools)
+
+    result = response.content
+    logger.info("[%s] Generated response (%d chars)", sub_agent_name, len(result))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[%s] LLM Response: %s...", sub_agent_name, result[:200])
+    return result
+
+
+# Start of the apology returned when a sub-agent call fails; callers use it
+# to keep these fallbacks out of the response caches
+ERROR_RESPONSE_PREFIX = "Lo siento, hubo un error al procesar tu solicitud"
+
+
+async def execute_sub_agent(
+    sub_agent: dict,
+    user_message: str,
+    organization_id: Optional[UUID] = None,
+    rag_context: str = "",
+    tools: Optional[list] = None,
+    sub_agent_context: Optional[str] = None,
+) -> str:
+    """
+    Execute a sub-agent to handle the user's request.
+
+    Args:
+        sub_agent: Sub-agent configuration
+        user_message: User's message
+        organization_id: Organization ID for RAG
+        rag_context: Optional pre-fetched RAG context
+        tools: Optional tools the LLM may call (e.g. knowledge base search)
+        sub_agent_context: Pre-fetched sub-agent knowledge (searched if None)
+
+    Returns:
+        Sub-agent's response
+    """
+    sub_agent_name = sub_agent.get("name", "Sub-Agent")
 
     try:
-        llm = ChatOpenAI(
-            model=ai_model,
-            api_key=settings.OPENAI_API_KEY,
-            temperature=temperature,
-            max_tokens=max_tokens,
+        return await _invoke_sub_agent(
+            sub_agent, user_message, organization_id, rag_context, tools, sub_agent_context
         )
 
-        print(f"[{sub_agent_name}] Calling LLM...")
-        response = llm.invoke([
-            SystemMessage(content=full_prompt),
-            {"role": "user", "content": user_message},
-        ])
+    except Exception as e:
+        logger.exception("[%s] Error executing sub-agent: %s", sub_agent_name, e)
+        return f"{ERROR_RESPONSE_PREFIX} con {sub_agent_name}."
 
-        result = response.content
-        print(f"[{sub_agent_name}] LLM Response: {result[:200]}...")
-        print(f"[{sub_agent_name}] Generated response ({len(result)} chars)")
-        return result
 
-    except Exception as e:
-        print(f"[{sub_agent_name}] ERROR: {e}")
-        import traceback
-        traceback.print_exc()
-        return f"Lo siento, hubo un error al procesar tu solicitud con {sub_agent_name}."
+async def stream_sub_agent(
+    sub_agent: dict,
+    user_message: str,
+    organization_id: Optional[UUID] = None,
+    rag_context: str = "",
+    sub_agent_context: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of execute_sub_agent.
+    Yields content chunks as the LLM produces them (no tool loop).
+    The response length is logged once, after the last chunk was delivered.
+    """
+    sub_agent_name = sub_agent.get("name", "Sub-Agent")
+    llm, messages = await _prepare_sub_agent_call(
+        sub_agent, user_message, organization_id, rag_context, sub_agent_context
+    )
+
+    length = 0
+    async for chunk in llm.astream(messages):
+        if chunk.content:
+            length += len(chunk.content)
+            yield chunk.content
+
+    logger.info("[%s] Streamed response (%d chars)", sub_agent_name, length)
 
 
 async def orchestrate_with_sub_agents(
     user_message: str,
     parent_agent: dict,
-    organization_id: Optional[str] = None,
+    organization_id: Optional[UUID] = None,
     rag_context: str = "",
+    tools: Optional[list] = None,
+    sub_agents: Optional[list[dict]] = None,
 ) -> str:
     """
     Main orchestration function that routes to sub-agents.
@@ -303,6 +781,8 @@ async def orchestrate_with_sub_agents(
         parent_agent: Parent agent configuration
         organization_id: Organization ID
         rag_context: Pre-fetched RAG context
+        tools: Optional tools passed through to the executing agent
+        sub_agents: Pre-fetched sub-agents (loaded from database if None)
 
     Returns:
         Response from sub-agent or parent agent
@@ -310,31 +790,111 @@ async def orchestrate_with_sub_agents(
     parent_name = parent_agent.get("name", "Orchestrator")
     parent_id = parent_agent.get("id")
 
-    # Debug logging (using print for visibility)
-    print(f"[{parent_name}] Orchestrating - ID: {parent_id}")
-    print(f"[{parent_name}] Has system_prompt: {bool(parent_agent.get('system_prompt'))}")
-    print(f"[{parent_name}] Model: {parent_agent.get('ai_model')}, Temp: {parent_agent.get('temperature')}")
+    logger.debug(
+        "[%s] Orchestrating - ID: %s, model: %s, temp: %s",
+        parent_name, parent_id, parent_agent.get("ai_model"), parent_agent.get("temperature"),
+    )
 
     if not parent_id:
-        print(f"[{parent_name}] WARNING: No parent agent ID, using parent config directly")
-        return await execute_sub_agent(parent_agent, user_message, organization_id, rag_context)
+        logger.warning("[%s] No parent agent ID, using parent config directly", parent_name)
+        return await execute_sub_agent(parent_agent, user_message, organization_id, rag_context, tools)
 
-    # Load sub-agents
-    sub_agents = await get_sub_agents(UUID(parent_id))
+    # Load sub-agents (unless the caller already prefetched them)
+    if sub_agents is None:
+        sub_agents = await get_sub_agents(parent_id)
 
     if not sub_agents:
-        print(f"[{parent_name}] No sub-agents found, using parent config directly")
-        return await execute_sub_agent(parent_agent, user_message, organization_id, rag_context)
-
-    logger.info(f"[{parent_name}] Found {len(sub_agents)} sub-agents, routing...")
-
-    # Route to appropriate sub-agent
-    selected_sub_agent = await route_to_sub_agent(user_message, sub_agents, parent_name)
+        logger.info("[%s] No sub-agents found, using parent config directly", parent_name)
+        return await execute_sub_agent(parent_agent, user_message, organization_id, rag_context, tools)
+
+    logger.info("[%s] Found %d sub-agents, routing...", parent_name, len(sub_agents))
+
+    # Route to appropriate sub-agent (its knowledge search overlaps routing)
+    selected_sub_agent, sub_agent_context, confidence = await _route_with_prefetch(
+        user_message, sub_agents, parent_name, parent_id, organization_id
+    )
+
+    if (
+        selected_sub_agent
+        and settings.ROUTE_SPECULATIVE_ENABLED
+        and confidence < settings.ROUTE_SPECULATIVE_THRESHOLD
+    ):
+        # Uncertain routing - run the parent too, so a failing sub-agent
+        # does not cost a second sequential LLM call
+        logger.info(
+            f"[{parent_name}] Low-confidence routing to {selected_sub_agent['name']}, "
+            f"running parent speculatively"
+        )
+        sub_agent_result, parent_result = await asyncio.gather(
+            _invoke_sub_agent(
+                selected_sub_agent, user_message, organization_id, rag_context, tools,
+                sub_agent_context,
+            ),
+            execute_sub_agent(parent_agent, user_message, organization_id, rag_context, tools),
+            return_exceptions=True,
+        )
+        if not isinstance(sub_agent_result, BaseException):
+            return sub_agent_result
+        logger.warning("[%s] Sub-agent failed, using parent response: %s", parent_name, sub_agent_result)
+        if isinstance(parent_result, BaseException):
+            raise parent_result
+        return parent_result
 
     if selected_sub_agent:
-        logger.info(f"[{parent_name}] Routing to sub-agent: {selected_sub_agent['name']}")
-        return await execute_sub_agent(selected_sub_agent, user_message, organization_id, rag_context)
+        logger.info("[%s] Routing to sub-agent: %s", parent_name, selected_sub_agent["name"])
+        return await execute_sub_agent(
+            selected_sub_agent, user_message, organization_id, rag_context, tools,
+            sub_agent_context=sub_agent_context,
+        )
 
     # No sub-agent match - use parent agent
-    logger.info(f"[{parent_name}] No sub-agent match, using parent config")
-    return await execute_sub_agent(parent_agent, user_message, organization_id, rag_context)
+    logger.info("[%s] No sub-agent match, using parent config", parent_name)
+    return await execute_sub_agent(parent_agent, user_message, organization_id, rag_context, tools)
+
+
+async def orchestrate_with_sub_agents_stream(
+    user_message: str,
+    parent_agent: dict,
+    organization_id: Optional[UUID] = None,
+    rag_context: str = "",
+    sub_agents: Optional[list[dict]] = None,
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of orchestrate_with_sub_agents.
+
+    Routing still needs the full router answer, but the selected agent's
+    response is streamed chunk by chunk.
+
+    Args:
+        user_message: User's message
+        parent_agent: Parent agent configuration
+        organization_id: Organization ID
+        rag_context: Pre-fetched RAG context
+        sub_agents: Pre-fetched sub-agents (loaded from database if None)
+
+    Yields:
+        Response text chunks from the sub-agent or parent agent
+    """
+    parent_name = parent_agent.get("name", "Orchestrator")
+    parent_id = parent_agent.get("id")
+
+    if sub_agents is None:
+        sub_agents = await get_sub_agents(parent_id) if parent_id else []
+
+    selected_sub_agent, sub_agent_context = None, None
+    if sub_agents:
+        selected_sub_agent, sub_agent_context, _ = await _route_with_prefetch(
+            user_message, sub_agents, parent_name, parent_id, organization_id
+        )
+
+    if selected_sub_agent:
+        logger.info("[%s] Streaming from sub-agent: %s", parent_name, selected_sub_agent["name"])
+
+    async for chunk in stream_sub_agent(
+        selected_sub_agent or parent_agent,
+        user_message,
+        organization_id,
+        rag_context,
+        sub_agent_context=sub_agent_context,
+    ):
+        yield chunk
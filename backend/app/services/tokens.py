@@ -0,0 +1,48 @@
+"""
+Token Counting Service
+Counts prompt tokens with the BPE encoding used by the OpenAI chat models.
+"""
+
+import logging
+from functools import lru_cache
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# Encoding of the gpt-4o model family (gpt-4o, gpt-4o-mini)
+ENCODING_NAME = "o200k_base"
+
+
+@lru_cache
+def _get_encoding() -> tiktoken.Encoding | None:
+    """
+    Load the tokenizer once (tiktoken downloads the BPE file on first use).
+
+    Returns:
+        The encoding, or None if it could not be loaded (e.g. offline)
+    """
+    try:
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens in a text.
+
+    Falls back to the ~4 characters per token estimate when the encoding
+    is not available.
+
+    Args:
+        text: Text to count
+
+    Returns:
+        Number of tokens
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
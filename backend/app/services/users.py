@@ -0,0 +1,76 @@
+"""
+Users Service
+Creates platform users: the auth user through the GoTrue admin API, then
+the profile with the role and organization.
+"""
+
+import logging
+
+from app.core.supabase import async_supabase
+
+logger = logging.getLogger(__name__)
+
+
+async def create_user_with_profile(
+    email: str,
+    password: str,
+    full_name: str,
+    role: str,
+    organization_id: str | None,
+) -> str:
+    """
+    Create an auth user (email auto-confirmed) and its profile.
+
+    The auth user goes through GoTrue so every auth.users column it reads on
+    sign-in is filled and its password policy applies. The profile is then
+    written with one upsert (the on_auth_user_created trigger may already
+    have inserted a basic row); if that fails the auth user is deleted again.
+
+    Args:
+        email: User email
+        password: User password
+        full_name: Display name
+        role: Profile role ("admin" or "user")
+        organization_id: Organization to assign
+
+    Returns:
+        ID of the new user
+
+    Raises:
+        ValueError: If GoTrue did not return a user
+        Exception: GoTrue or PostgREST errors (e.g. "already been registered")
+    """
+    auth_response = await async_supabase.auth.admin.create_user(
+        {
+            "email": email,
+            "password": password,
+            "email_confirm": True,  # Auto-confirm email
+            "user_metadata": {
+                "full_name": full_name,
+            },
+        }
+    )
+    if not auth_response.user:
+        raise ValueError("Failed to create auth user")
+
+    user_id = auth_response.user.id
+    try:
+        await async_supabase.table("profiles").upsert(
+            {
+                "id": user_id,
+                "email": email,
+                "full_name": full_name,
+                "role": role,
+                "organization_id": organization_id,
+            },
+            on_conflict="id",
+        ).execute()
+    except Exception:
+        # Rollback: do not leave an auth user without its profile
+        try:
+            await async_supabase.auth.admin.delete_user(user_id)
+        except Exception as e:
+            logger.error(f"Error rolling back auth user {user_id}: {e}")
+        raise
+
+    return user_id
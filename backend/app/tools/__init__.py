@@ -1 +1,8 @@
 # Custom Agent Tools
+from app.tools.executor import ainvoke_with_tools
+from app.tools.knowledge import build_knowledge_tool
+
+__all__ = [
+    "ainvoke_with_tools",
+    "build_knowledge_tool",
+]
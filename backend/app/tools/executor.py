@@ -0,0 +1,56 @@
+"""
+Tool Executor
+Runs a chat model with a bounded tool-calling loop.
+"""
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.tools import BaseTool
+
+# Maximum LLM <-> tool round-trips before forcing a final answer
+MAX_TOOL_ROUNDS = 3
+
+
+async def ainvoke_with_tools(
+    llm: BaseChatModel,
+    messages: list[BaseMessage],
+    tools: list[BaseTool] | None = None,
+    max_rounds: int = MAX_TOOL_ROUNDS,
+) -> AIMessage:
+    """
+    Invoke the LLM, executing any tool calls it makes until it answers.
+
+    Args:
+        llm: Chat model to call
+        messages: Prompt messages
+        tools: Tools the model may call (plain invoke when empty)
+        max_rounds: Maximum number of tool-calling rounds
+
+    Returns:
+        Final AI message
+    """
+    if not tools:
+        return await llm.ainvoke(messages)
+
+    tools_by_name = {tool.name: tool for tool in tools}
+    llm_with_tools = llm.bind_tools(tools)
+    messages = list(messages)
+
+    for _ in range(max_rounds):
+        response = await llm_with_tools.ainvoke(messages)
+        if not response.tool_calls:
+            return response
+
+        messages.append(response)
+        for tool_call in response.tool_calls:
+            tool = tools_by_name.get(tool_call["name"])
+            if tool is None:
+                content = f"Unknown tool: {tool_call['name']}"
+            else:
+                content = await tool.ainvoke(tool_call["args"])
+            messages.append(
+                ToolMessage(content=str(content), tool_call_id=tool_call["id"])
+            )
+
+    # Tool budget exhausted - answer with what has been gathered
+    return await llm.ainvoke(messages)
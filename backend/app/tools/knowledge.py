@@ -0,0 +1,46 @@
+"""
+Knowledge Base Tool
+Lets the LLM decide when to query the knowledge base (lazy RAG).
+"""
+
+from uuid import UUID
+
+from langchain_core.tools import StructuredTool
+
+from app.services.knowledge_base import get_relevant_context
+
+
+def build_knowledge_tool(
+    organization_id: UUID,
+    store_id: UUID | None = None,
+    max_tokens: int = 2000,
+) -> StructuredTool:
+    """
+    Build a knowledge base search tool bound to a tenant context.
+
+    Args:
+        organization_id: Organization whose knowledge base is searched
+        store_id: Optional store to scope the search
+        max_tokens: Maximum tokens of context returned to the LLM
+
+    Returns:
+        Tool the LLM can call with a search query
+    """
+    async def search_knowledge_base(query: str) -> str:
+        context = await get_relevant_context(
+            organization_id=organization_id,
+            query=query,
+            store_id=store_id,
+            max_tokens=max_tokens,
+        )
+        return context or "No relevant information found in the knowledge base."
+
+    return StructuredTool.from_function(
+        coroutine=search_knowledge_base,
+        name="search_knowledge_base",
+        description=(
+            "Search the organization's knowledge base (products, FAQs, brand "
+            "guidelines). Use it only when the answer depends on company-specific "
+            "information; do not use it for greetings or general questions."
+        ),
+    )
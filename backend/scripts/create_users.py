@@ -3,13 +3,14 @@ Script to create test users for the 2B platform.
 Run this from the backend directory: python scripts/create_users.py
 """
 
+import asyncio
 import os
 import sys
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from supabase import create_client
+from supabase import AsyncClient, acreate_client
 
 # Configuration
 SUPABASE_URL = os.getenv("SUPABASE_URL", "https://ubyghfhlawbwvqwmrzbw.supabase.co")
@@ -38,106 +39,132 @@ USERS = [
 ]
 
 
-def create_users():
-    """Create test users using Supabase Admin API."""
-    print("Creating test users for 2B Platform...")
-    print(f"   Supabase URL: {SUPABASE_URL}")
-    print()
+async def _provision_user(
+    supabase: AsyncClient,
+    user_data: dict,
+    existing_id: str | None,
+) -> tuple[str | None, list[str]]:
+    """
+    Create (or refresh) the auth side of one test user.
+
+    Args:
+        supabase: Admin client
+        user_data: Entry from USERS
+        existing_id: Profile id when the user already exists
+
+    Returns:
+        The user's id (None on failure) and log lines for this user,
+        printed once all users are done so the output of concurrent users
+        does not interleave
+    """
+    email = user_data["email"]
+    password = user_data["password"]
+    full_name = user_data["full_name"]
+
+    log = [f"Creating user: {email}"]
+
+    try:
+        if existing_id:
+            log.append("   [WARN] User already exists, updating...")
+
+            # Update auth user to confirm email and reset password
+            try:
+                await supabase.auth.admin.update_user_by_id(
+                    existing_id,
+                    {
+                        "email_confirm": True,
+                        "password": password,
+                    }
+                )
+                log.append("   [OK] Auth user updated (email confirmed, password reset)")
+            except Exception as auth_err:
+                log.append(f"   [WARN] Could not update auth: {auth_err}")
+
+            return existing_id, log
+
+        # Step 1: Create auth user
+        auth_response = await supabase.auth.admin.create_user(
+            {
+                "email": email,
+                "password": password,
+                "email_confirm": True,  # Auto-confirm email
+                "user_metadata": {
+                    "full_name": full_name,
+                },
+            }
+        )
 
-    # Create admin client with service role
-    supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+        if not auth_response.user:
+            log.append("   [ERROR] Failed to create auth user")
+            return None, log
 
-    for user_data in USERS:
-        email = user_data["email"]
-        password = user_data["password"]
-        full_name = user_data["full_name"]
-        role = user_data["role"]
+        user_id = auth_response.user.id
+        log.append(f"   [OK] Auth user created: {user_id}")
+        return user_id, log
 
-        print(f"Creating user: {email}")
+    except Exception as e:
+        log.append(f"   [ERROR] {e}")
+        return None, log
 
-        try:
-            # Step 1: Create auth user
-            auth_response = supabase.auth.admin.create_user(
-                {
-                    "email": email,
-                    "password": password,
-                    "email_confirm": True,  # Auto-confirm email
-                    "user_metadata": {
-                        "full_name": full_name,
-                    },
-                }
-            )
-
-            if not auth_response.user:
-                print(f"   [ERROR] Failed to create auth user")
-                continue
-
-            user_id = auth_response.user.id
-            print(f"   [OK] Auth user created: {user_id}")
-
-            # Step 2: Update profile with role and organization
-            # The profile is auto-created by the trigger, so we just update it
-            profile_response = (
-                supabase.table("profiles")
-                .update({
-                    "role": role,
-                    "organization_id": ORGANIZATION_ID,
-                    "full_name": full_name,
-                })
-                .eq("id", user_id)
-                .execute()
-            )
-
-            if profile_response.data:
-                print(f"   [OK] Profile updated: role={role}, org={ORGANIZATION_ID[:8]}...")
-            else:
-                # Profile might not exist yet, create it
-                print(f"   [WARN] Profile not found, creating...")
-                supabase.table("profiles").insert({
-                    "id": user_id,
-                    "email": email,
-                    "full_name": full_name,
-                    "role": role,
-                    "organization_id": ORGANIZATION_ID,
-                }).execute()
-                print(f"   [OK] Profile created")
 
-            print()
+async def create_users():
+    """Create test users using Supabase Admin API (all users concurrently)."""
+    print("Creating test users for 2B Platform...")
+    print(f"   Supabase URL: {SUPABASE_URL}")
+    print()
 
+    # Create admin client with service role
+    supabase = await acreate_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+
+    # Look up existing users once, so create vs. update is decided up front
+    existing = await (
+        supabase.table("profiles")
+        .select("id,email")
+        .in_("email", [user_data["email"] for user_data in USERS])
+        .execute()
+    )
+    by_email = {row["email"]: row["id"] for row in existing.data}
+
+    results = await asyncio.gather(
+        *(
+            _provision_user(supabase, user_data, by_email.get(user_data["email"]))
+            for user_data in USERS
+        ),
+        return_exceptions=True,
+    )
+
+    # Step 2: Set role and organization on every profile in one upsert
+    # (inserts the profile if the trigger did not create it)
+    profiles = [
+        {
+            "id": result[0],
+            "email": user_data["email"],
+            "full_name": user_data["full_name"],
+            "role": user_data["role"],
+            "organization_id": ORGANIZATION_ID,
+        }
+        for user_data, result in zip(USERS, results)
+        if not isinstance(result, BaseException) and result[0]
+    ]
+    profile_error = None
+    if profiles:
+        try:
+            await supabase.table("profiles").upsert(profiles, on_conflict="id").execute()
         except Exception as e:
-            error_msg = str(e)
-            if "already been registered" in error_msg or "already exists" in error_msg.lower():
-                print(f"   [WARN] User already exists, updating...")
-
-                # Get existing user from profiles
-                existing = supabase.table("profiles").select("id").eq("email", email).execute()
-                if existing.data:
-                    user_id = existing.data[0]["id"]
-
-                    # Update auth user to confirm email and reset password
-                    try:
-                        supabase.auth.admin.update_user_by_id(
-                            user_id,
-                            {
-                                "email_confirm": True,
-                                "password": password,
-                            }
-                        )
-                        print(f"   [OK] Auth user updated (email confirmed, password reset)")
-                    except Exception as auth_err:
-                        print(f"   [WARN] Could not update auth: {auth_err}")
-
-                    # Update profile
-                    supabase.table("profiles").update({
-                        "role": role,
-                        "organization_id": ORGANIZATION_ID,
-                        "full_name": full_name,
-                    }).eq("id", user_id).execute()
-                    print(f"   [OK] Profile updated")
-                print()
-            else:
-                print(f"   [ERROR] {error_msg}")
-                print()
+            profile_error = e
+
+    for user_data, result in zip(USERS, results):
+        if isinstance(result, BaseException):
+            print(f"Creating user: {user_data['email']}")
+            print(f"   [ERROR] {result}")
+        else:
+            user_id, log = result
+            print("\n".join(log))
+            if user_id and profile_error:
+                print(f"   [ERROR] Profile not saved: {profile_error}")
+            elif user_id:
+                print(f"   [OK] Profile saved: role={user_data['role']}, org={ORGANIZATION_ID[:8]}...")
+        print()
 
     print("=" * 50)
     print("Done! Test users:")
@@ -150,4 +177,4 @@ def create_users():
 
 
 if __name__ == "__main__":
-    create_users()
+    asyncio.run(create_users())
@@ -12,7 +12,7 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from supabase import create_client, Client
+from supabase import AsyncClient, acreate_client
 
 # Configuration
 SUPABASE_URL = os.getenv("SUPABASE_URL", "https://ubyghfhlawbwvqwmrzbw.supabase.co")
@@ -38,24 +38,66 @@ TEST_USERS = [
 ]
 
 
-def create_supabase_admin_client() -> Client:
+async def create_supabase_admin_client() -> AsyncClient:
     """Create Supabase client with service role key for admin operations."""
     if not SUPABASE_SERVICE_KEY:
         raise ValueError(
             "SUPABASE_SERVICE_ROLE_KEY environment variable is required. "
             "Get it from Supabase Dashboard > Settings > API"
         )
-    return create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    return await acreate_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
 
 
-def seed_users():
-    """Create test users in Supabase Auth."""
+async def _seed_user(
+    supabase: AsyncClient,
+    user_data: dict,
+    existing_id: str | None,
+) -> tuple[str | None, list[str]]:
+    """
+    Create one test user in Auth (existing users are kept).
+
+    Returns:
+        The user's id (None on failure) and log lines for this user,
+        printed once all users are done
+    """
+    log = [f"\n📧 Creating user: {user_data['email']}"]
+
+    try:
+        if existing_id:
+            log.append("   ℹ️ User already exists, updating profile...")
+            return existing_id, log
+
+        # Create user in Auth
+        auth_response = await supabase.auth.admin.create_user(
+            {
+                "email": user_data["email"],
+                "password": user_data["password"],
+                "email_confirm": True,  # Auto-confirm email
+                "user_metadata": {
+                    "full_name": user_data["full_name"],
+                },
+            }
+        )
+
+        if auth_response.user:
+            user_id = auth_response.user.id
+            log.append(f"   ✅ Auth user created: {user_id}")
+            return user_id, log
+
+    except Exception as e:
+        log.append(f"   ❌ Error: {e}")
+
+    return None, log
+
+
+async def seed_users():
+    """Create test users in Supabase Auth (all users concurrently)."""
     print("=" * 60)
     print("Seeding Test Users")
     print("=" * 60)
 
     try:
-        supabase = create_supabase_admin_client()
+        supabase = await create_supabase_admin_client()
     except ValueError as e:
         print(f"\n❌ Error: {e}")
         print("\nTo fix this:")
@@ -64,62 +106,53 @@ def seed_users():
         print("3. Set it as SUPABASE_SERVICE_ROLE_KEY environment variable")
         return
 
-    for user_data in TEST_USERS:
-        print(f"\n📧 Creating user: {user_data['email']}")
-
+    # Look up existing users once, so create vs. update is decided up front
+    existing = await (
+        supabase.table("profiles")
+        .select("id,email")
+        .in_("email", [user_data["email"] for user_data in TEST_USERS])
+        .execute()
+    )
+    by_email = {row["email"]: row["id"] for row in existing.data}
+
+    results = await asyncio.gather(
+        *(
+            _seed_user(supabase, user_data, by_email.get(user_data["email"]))
+            for user_data in TEST_USERS
+        ),
+        return_exceptions=True,
+    )
+
+    # Set role and organization on every profile in one upsert
+    profiles = [
+        {
+            "id": result[0],
+            "email": user_data["email"],
+            "full_name": user_data["full_name"],
+            "role": user_data["role"],
+            "organization_id": DEMO_ORG_ID,
+        }
+        for user_data, result in zip(TEST_USERS, results)
+        if not isinstance(result, BaseException) and result[0]
+    ]
+    profile_error = None
+    if profiles:
         try:
-            # Create user in Auth
-            auth_response = supabase.auth.admin.create_user(
-                {
-                    "email": user_data["email"],
-                    "password": user_data["password"],
-                    "email_confirm": True,  # Auto-confirm email
-                    "user_metadata": {
-                        "full_name": user_data["full_name"],
-                    },
-                }
-            )
-
-            if auth_response.user:
-                user_id = auth_response.user.id
-                print(f"   ✅ Auth user created: {user_id}")
-
-                # Update profile with role and organization
-                profile_update = supabase.table("profiles").update(
-                    {
-                        "role": user_data["role"],
-                        "organization_id": DEMO_ORG_ID,
-                        "full_name": user_data["full_name"],
-                    }
-                ).eq("id", user_id).execute()
-
-                if profile_update.data:
-                    print(f"   ✅ Profile updated: role={user_data['role']}")
-                else:
-                    print(f"   ⚠️ Profile update may have failed")
-
+            await supabase.table("profiles").upsert(profiles, on_conflict="id").execute()
         except Exception as e:
-            error_msg = str(e)
-            if "already been registered" in error_msg or "already exists" in error_msg:
-                print(f"   ℹ️ User already exists, updating profile...")
-
-                # Get existing user
-                existing = supabase.table("profiles").select("id").eq(
-                    "email", user_data["email"]
-                ).single().execute()
-
-                if existing.data:
-                    # Update existing profile
-                    supabase.table("profiles").update(
-                        {
-                            "role": user_data["role"],
-                            "organization_id": DEMO_ORG_ID,
-                            "full_name": user_data["full_name"],
-                        }
-                    ).eq("id", existing.data["id"]).execute()
-                    print(f"   ✅ Existing profile updated")
-            else:
-                print(f"   ❌ Error: {error_msg}")
+            profile_error = e
+
+    for user_data, result in zip(TEST_USERS, results):
+        if isinstance(result, BaseException):
+            print(f"\n📧 Creating user: {user_data['email']}")
+            print(f"   ❌ Error: {result}")
+        else:
+            user_id, log = result
+            print("\n".join(log))
+            if user_id and profile_error:
+                print(f"   ⚠️ Profile update failed: {profile_error}")
+            elif user_id:
+                print(f"   ✅ Profile updated: role={user_data['role']}")
 
     print("\n" + "=" * 60)
     print("Test User Credentials")
@@ -133,4 +166,4 @@ def seed_users():
 
 
 if __name__ == "__main__":
-    seed_users()
+    asyncio.run(seed_users())
@@ -0,0 +1,12 @@
+"""
+Shared test setup.
+
+Settings are read once at import, so the required Supabase variables get
+placeholder values before any app module is imported.
+"""
+
+import os
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-role-key")
+os.environ.setdefault("OPENAI_API_KEY", "test-openai-key")
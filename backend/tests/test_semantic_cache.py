@@ -0,0 +1,91 @@
+"""Tests for the embedding-similarity response cache."""
+
+from app.services.semantic_cache import SemanticCache
+
+SCOPE = ("org", "agent", None)
+
+
+def test_hit_on_similar_embedding():
+    cache = SemanticCache(threshold=0.95)
+    cache.set(SCOPE, [1.0, 0.0, 0.0], "respuesta")
+
+    assert cache.get(SCOPE, [0.99, 0.05, 0.0]) == "respuesta"
+
+
+def test_miss_below_threshold():
+    cache = SemanticCache(threshold=0.95)
+    cache.set(SCOPE, [1.0, 0.0, 0.0], "respuesta")
+
+    assert cache.get(SCOPE, [0.0, 1.0, 0.0]) is None
+
+
+def test_similarity_ignores_magnitude():
+    cache = SemanticCache(threshold=0.99)
+    cache.set(SCOPE, [3.0, 4.0], "respuesta")
+
+    assert cache.get(SCOPE, [0.6, 0.8]) == "respuesta"
+
+
+def test_returns_most_similar_entry():
+    cache = SemanticCache(threshold=0.9)
+    cache.set(SCOPE, [1.0, 0.2], "lejana")
+    cache.set(SCOPE, [1.0, 0.0], "cercana")
+
+    assert cache.get(SCOPE, [1.0, 0.01]) == "cercana"
+
+
+def test_scopes_are_isolated():
+    cache = SemanticCache()
+    cache.set(("org-a", "agent", None), [1.0, 0.0], "de org-a")
+
+    assert cache.get(("org-b", "agent", None), [1.0, 0.0]) is None
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.semantic_cache.time.monotonic", lambda: clock[0])
+    cache = SemanticCache(ttl_seconds=60)
+    cache.set(SCOPE, [1.0, 0.0], "respuesta")
+
+    clock[0] += 61
+    assert cache.get(SCOPE, [1.0, 0.0]) is None
+    assert not cache._scopes[SCOPE]
+
+
+def test_oldest_entries_evicted_beyond_max_entries():
+    cache = SemanticCache(threshold=0.99, max_entries=2)
+    cache.set(SCOPE, [1.0, 0.0, 0.0], "primera")
+    cache.set(SCOPE, [0.0, 1.0, 0.0], "segunda")
+    cache.set(SCOPE, [0.0, 0.0, 1.0], "tercera")
+
+    assert cache.get(SCOPE, [1.0, 0.0, 0.0]) is None
+    assert cache.get(SCOPE, [0.0, 0.0, 1.0]) == "tercera"
+
+
+def test_least_recently_used_scope_evicted_beyond_max_scopes():
+    cache = SemanticCache(max_scopes=2)
+    cache.set(("a",), [1.0, 0.0], "a")
+    cache.set(("b",), [1.0, 0.0], "b")
+    # Touch "a" so "b" becomes the least recently used scope
+    assert cache.get(("a",), [1.0, 0.0]) == "a"
+    cache.set(("c",), [1.0, 0.0], "c")
+
+    assert cache.get(("b",), [1.0, 0.0]) is None
+    assert cache.get(("a",), [1.0, 0.0]) == "a"
+    assert cache.get(("c",), [1.0, 0.0]) == "c"
+
+
+def test_version_mismatch_misses_and_drops_stale_entries():
+    cache = SemanticCache()
+    cache.set(SCOPE, [1.0, 0.0], "v1", version="2026-01-01")
+
+    assert cache.get(SCOPE, [1.0, 0.0], version="2026-01-01") == "v1"
+    assert cache.get(SCOPE, [1.0, 0.0], version="2026-02-01") is None
+    assert cache.get(SCOPE, [1.0, 0.0], version="2026-01-01") is None
+
+
+def test_zero_vector_does_not_raise():
+    cache = SemanticCache()
+    cache.set(SCOPE, [0.0, 0.0], "vacia")
+
+    assert cache.get(SCOPE, [0.0, 0.0]) is None
@@ -0,0 +1,47 @@
+"""Tests for sub-agent slug generation."""
+
+import random
+import re
+
+import pytest
+
+from app.api.sub_agents import generate_slug
+
+
+def _reference_slug(name: str) -> str:
+    """The original regex implementation generate_slug must reproduce."""
+    slug = name.lower().strip()
+    slug = re.sub(r"[^a-z0-9\s-]", "", slug)
+    slug = re.sub(r"[\s_]+", "-", slug)
+    slug = re.sub(r"-+", "-", slug)
+    return slug[:50]
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [
+        ("Soporte Técnico", "soporte-tcnico"),
+        ("  Ventas  Online ", "ventas-online"),
+        ("a - b", "a-b"),
+        ("snake_case name", "snakecase-name"),
+        ("Agente #1!", "agente-1"),
+        ("a b　c", "a-b-c"),
+        ("", ""),
+        ("x" * 80, "x" * 50),
+    ],
+)
+def test_examples(name, expected):
+    assert generate_slug(name) == expected
+
+
+def test_matches_reference_on_random_names():
+    rnd = random.Random(1234)
+    whitespace = [chr(c) for c in range(0x3001) if chr(c).isspace()]
+    pool = whitespace + list("aZ9-_ .#éÑİK") + ["\U0001f600"]
+
+    for _ in range(5000):
+        name = "".join(
+            rnd.choice(pool) if rnd.random() < 0.7 else chr(rnd.randrange(0x3000))
+            for _ in range(rnd.randint(0, 70))
+        )
+        assert generate_slug(name) == _reference_slug(name), repr(name)
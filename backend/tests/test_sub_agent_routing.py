@@ -0,0 +1,101 @@
+"""Tests for the LLM-free parts of sub-agent routing."""
+
+import uuid
+
+from app.services.sub_agents import (
+    ROUTE_EXACT_CONFIDENCE,
+    ROUTE_PARTIAL_CONFIDENCE,
+    _match_keywords,
+    _match_sub_agent,
+)
+
+
+def _sub_agent(name: str, keywords: list[str] | None = None) -> dict:
+    # Fresh ids so the per-version index caches never collide across tests
+    return {
+        "id": str(uuid.uuid4()),
+        "name": name,
+        "updated_at": "2026-01-01T00:00:00Z",
+        "capabilities": {"routing_keywords": keywords or []},
+    }
+
+
+class TestMatchSubAgent:
+    def test_exact_name_is_case_insensitive(self):
+        ventas = _sub_agent("Ventas")
+        soporte = _sub_agent("Soporte Técnico")
+
+        assert _match_sub_agent("soporte técnico", [ventas, soporte]) == (
+            soporte,
+            ROUTE_EXACT_CONFIDENCE,
+        )
+
+    def test_reply_inside_a_name_is_partial(self):
+        soporte = _sub_agent("Soporte Técnico")
+
+        assert _match_sub_agent("técnico", [_sub_agent("Ventas"), soporte]) == (
+            soporte,
+            ROUTE_PARTIAL_CONFIDENCE,
+        )
+
+    def test_name_inside_the_reply_is_partial(self):
+        ventas = _sub_agent("Ventas")
+
+        assert _match_sub_agent("El agente de ventas.", [ventas]) == (
+            ventas,
+            ROUTE_PARTIAL_CONFIDENCE,
+        )
+
+    def test_longest_name_wins_inside_the_reply(self):
+        ventas = _sub_agent("Ventas")
+        mayoristas = _sub_agent("Ventas Mayoristas")
+
+        selected, _ = _match_sub_agent("usar ventas mayoristas", [ventas, mayoristas])
+
+        assert selected is mayoristas
+
+    def test_unknown_reply_returns_none(self):
+        assert _match_sub_agent("facturación", [_sub_agent("Ventas")]) == (
+            None,
+            ROUTE_EXACT_CONFIDENCE,
+        )
+
+    def test_separator_in_reply_does_not_match_across_names(self):
+        agents = [_sub_agent("Ventas"), _sub_agent("Soporte")]
+
+        selected, _ = _match_sub_agent("s\0s", agents)
+
+        assert selected is None
+
+
+class TestMatchKeywords:
+    def test_single_keyword_match(self):
+        facturas = _sub_agent("Facturación", ["factura", "cobro"])
+        agents = [facturas, _sub_agent("Envíos", ["envío"])]
+
+        assert _match_keywords("Necesito mi FACTURA de enero", agents) is facturas
+
+    def test_whole_words_only(self):
+        agents = [_sub_agent("Facturación", ["factura"])]
+
+        assert _match_keywords("facturas pendientes", agents) is None
+
+    def test_keywords_with_symbols(self):
+        cpp = _sub_agent("C++", ["c++", ".net"])
+
+        assert _match_keywords("dudas sobre C++ hoy", [cpp]) is cpp
+        assert _match_keywords("migrar a .net", [cpp]) is cpp
+        assert _match_keywords("c++x", [cpp]) is None
+
+    def test_ambiguous_match_returns_none(self):
+        agents = [_sub_agent("Facturación", ["factura"]), _sub_agent("Envíos", ["envío"])]
+
+        assert _match_keywords("la factura del envío", agents) is None
+
+    def test_shared_keyword_is_ambiguous(self):
+        agents = [_sub_agent("A", ["pedido"]), _sub_agent("B", ["pedido"])]
+
+        assert _match_keywords("mi pedido", agents) is None
+
+    def test_no_keywords_configured(self):
+        assert _match_keywords("hola", [_sub_agent("Ventas")]) is None
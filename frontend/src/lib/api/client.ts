@@ -16,6 +16,14 @@ export interface ChatResponse {
   agent_used: string;
 }
 
+export interface AgentBrief {
+  id: string;
+  name: string;
+  slug: string;
+  ai_model?: string;
+  welcome_message?: string;
+}
+
 export interface Thread {
   id: string;
   user_id: string;
@@ -26,6 +34,7 @@ export interface Thread {
   status: string;
   created_at: string;
   updated_at: string;
+  agent?: AgentBrief | null;
 }
 
 export interface Message {
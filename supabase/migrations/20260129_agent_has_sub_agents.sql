@@ -0,0 +1,73 @@
+-- ============================================================================
+-- Agent has_sub_agents Flag
+-- Keeps agents.capabilities.has_sub_agents in sync with active sub-agents so
+-- the backend can skip the sub-agent lookup/orchestration for plain agents.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.agent_has_active_sub_agents(p_agent_id UUID)
+RETURNS BOOLEAN
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT EXISTS (
+        SELECT 1 FROM sub_agents
+        WHERE parent_agent_id = p_agent_id
+        AND is_active = true
+    );
+$$;
+
+-- Recompute the flag whenever an agent's capabilities are written, so a
+-- stale value sent by the admin panel can never hide existing sub-agents
+CREATE OR REPLACE FUNCTION public.set_agent_has_sub_agents()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+    NEW.capabilities := COALESCE(NEW.capabilities, '{}'::jsonb)
+        || jsonb_build_object('has_sub_agents', agent_has_active_sub_agents(NEW.id));
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS agents_set_has_sub_agents ON agents;
+CREATE TRIGGER agents_set_has_sub_agents
+    BEFORE INSERT OR UPDATE OF capabilities ON agents
+    FOR EACH ROW
+    EXECUTE FUNCTION public.set_agent_has_sub_agents();
+
+-- Touch the parent agent's capabilities when its sub-agents change so the
+-- trigger above recomputes the flag
+CREATE OR REPLACE FUNCTION public.sync_agent_has_sub_agents()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        UPDATE agents SET capabilities = capabilities
+        WHERE id = NEW.parent_agent_id;
+    END IF;
+
+    IF TG_OP = 'DELETE'
+        OR (TG_OP = 'UPDATE' AND OLD.parent_agent_id IS DISTINCT FROM NEW.parent_agent_id) THEN
+        UPDATE agents SET capabilities = capabilities
+        WHERE id = OLD.parent_agent_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS sub_agents_sync_parent_flag ON sub_agents;
+CREATE TRIGGER sub_agents_sync_parent_flag
+    AFTER INSERT OR DELETE OR UPDATE OF is_active, parent_agent_id ON sub_agents
+    FOR EACH ROW
+    EXECUTE FUNCTION public.sync_agent_has_sub_agents();
+
+-- Backfill existing agents
+UPDATE agents SET capabilities = capabilities;
+
+SELECT 'has_sub_agents flag migration complete!' as status;
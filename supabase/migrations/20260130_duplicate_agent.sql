@@ -0,0 +1,35 @@
+-- ============================================================================
+-- Duplicate Agent (single round-trip)
+-- Copies an agent server-side with INSERT ... SELECT instead of fetching the
+-- row into the backend and inserting it back.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.duplicate_agent(
+    p_agent_id UUID,
+    p_name TEXT,
+    p_slug TEXT
+)
+RETURNS SETOF agents
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO agents (
+        organization_id, name, slug, role, description, icon, system_prompt,
+        is_active, settings, ai_model, temperature, max_tokens, welcome_message,
+        capabilities, category, is_orchestrator, version, modified_by
+    )
+    SELECT
+        organization_id, p_name, p_slug, role, description, icon, system_prompt,
+        is_active, settings, ai_model, temperature, max_tokens, welcome_message,
+        capabilities, category, is_orchestrator, 1, NULL
+    FROM agents
+    WHERE id = p_agent_id
+    RETURNING *;
+$$;
+
+-- Backend only (service role)
+REVOKE ALL ON FUNCTION public.duplicate_agent(UUID, TEXT, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.duplicate_agent(UUID, TEXT, TEXT) TO service_role;
+
+SELECT 'duplicate_agent function created!' as status;
@@ -0,0 +1,26 @@
+-- ============================================================================
+-- List Query Indexes
+-- Composite indexes matching the backend's filter + order chains so list
+-- queries use an index range scan without a separate sort step.
+-- ============================================================================
+
+-- list_agents: organization_id = ? [AND is_active] ORDER BY created_at
+CREATE INDEX IF NOT EXISTS agents_org_active_created_idx
+    ON agents(organization_id, is_active, created_at);
+
+-- list_stores: organization_id = ? [AND is_active] ORDER BY created_at
+CREATE INDEX IF NOT EXISTS stores_org_active_created_idx
+    ON stores(organization_id, is_active, created_at);
+
+-- get_agent_config_history: agent_id = ? ORDER BY changed_at DESC
+CREATE INDEX IF NOT EXISTS agent_config_history_agent_changed_idx
+    ON agent_config_history(agent_id, changed_at DESC);
+
+-- get_sub_agents (every chat turn): parent_agent_id = ? AND is_active ORDER BY created_at
+CREATE INDEX IF NOT EXISTS idx_sub_agents_parent_active_created
+    ON sub_agents(parent_agent_id, is_active, created_at);
+
+-- get_agent_by_slug / get_store_by_slug are already covered by the
+-- UNIQUE(organization_id, slug) constraints on agents and stores.
+
+SELECT 'List query indexes created!' as status;
@@ -0,0 +1,53 @@
+-- ============================================================================
+-- Batched Sub-Agent Knowledge Search
+-- Top matches for several sub-agents in one call, so the backend can fetch
+-- every sub-agent's knowledge with one embedding and one round-trip.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.search_sub_agent_knowledge_batch(
+    query_embedding vector(1536),
+    p_sub_agent_ids UUID[],
+    match_threshold FLOAT DEFAULT 0.75,
+    match_count INT DEFAULT 5
+)
+RETURNS TABLE (
+    sub_agent_id UUID,
+    id UUID,
+    content TEXT,
+    metadata JSONB,
+    document_type TEXT,
+    similarity FLOAT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    -- Best match_count matches per sub-agent, most similar first
+    SELECT ranked.sub_agent_id, ranked.id, ranked.content, ranked.metadata,
+           ranked.document_type, ranked.similarity
+    FROM (
+        SELECT
+            kb.sub_agent_id,
+            kb.id,
+            kb.content,
+            kb.metadata,
+            kb.document_type,
+            1 - (kb.embedding <=> query_embedding) AS similarity,
+            row_number() OVER (
+                PARTITION BY kb.sub_agent_id
+                ORDER BY kb.embedding <=> query_embedding
+            ) AS rank
+        FROM knowledge_base kb
+        WHERE kb.sub_agent_id = ANY(p_sub_agent_ids)
+            AND 1 - (kb.embedding <=> query_embedding) > match_threshold
+    ) ranked
+    WHERE ranked.rank <= match_count
+    ORDER BY ranked.sub_agent_id, ranked.rank;
+$$;
+
+-- Backend only (service role)
+REVOKE ALL ON FUNCTION public.search_sub_agent_knowledge_batch(vector, UUID[], FLOAT, INT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.search_sub_agent_knowledge_batch(vector, UUID[], FLOAT, INT) TO service_role;
+
+SELECT 'search_sub_agent_knowledge_batch function created!' as status;
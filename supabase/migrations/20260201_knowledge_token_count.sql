@@ -0,0 +1,98 @@
+-- ============================================================================
+-- Knowledge Token Counts
+-- Store each document's prompt token count at ingest, and return it from the
+-- sub-agent knowledge searches so the backend budgets context without
+-- re-tokenizing the same documents on every request.
+-- ============================================================================
+
+-- Filled by the backend on insert; NULL for older rows (counted on read)
+ALTER TABLE knowledge_base
+    ADD COLUMN IF NOT EXISTS token_count INT;
+
+-- The return type changes, so the functions are dropped and recreated
+DROP FUNCTION IF EXISTS search_sub_agent_knowledge(vector, UUID, FLOAT, INT);
+DROP FUNCTION IF EXISTS public.search_sub_agent_knowledge_batch(vector, UUID[], FLOAT, INT);
+
+CREATE OR REPLACE FUNCTION search_sub_agent_knowledge(
+    query_embedding vector(1536),
+    p_sub_agent_id UUID,
+    match_threshold FLOAT DEFAULT 0.75,
+    match_count INT DEFAULT 5
+)
+RETURNS TABLE (
+    id UUID,
+    content TEXT,
+    metadata JSONB,
+    document_type TEXT,
+    similarity FLOAT,
+    token_count INT
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        kb.id,
+        kb.content,
+        kb.metadata,
+        kb.document_type,
+        1 - (kb.embedding <=> query_embedding) AS similarity,
+        kb.token_count
+    FROM knowledge_base kb
+    WHERE kb.sub_agent_id = p_sub_agent_id
+        AND 1 - (kb.embedding <=> query_embedding) > match_threshold
+    ORDER BY kb.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.search_sub_agent_knowledge_batch(
+    query_embedding vector(1536),
+    p_sub_agent_ids UUID[],
+    match_threshold FLOAT DEFAULT 0.75,
+    match_count INT DEFAULT 5
+)
+RETURNS TABLE (
+    sub_agent_id UUID,
+    id UUID,
+    content TEXT,
+    metadata JSONB,
+    document_type TEXT,
+    similarity FLOAT,
+    token_count INT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    -- Best match_count matches per sub-agent, most similar first
+    SELECT ranked.sub_agent_id, ranked.id, ranked.content, ranked.metadata,
+           ranked.document_type, ranked.similarity, ranked.token_count
+    FROM (
+        SELECT
+            kb.sub_agent_id,
+            kb.id,
+            kb.content,
+            kb.metadata,
+            kb.document_type,
+            1 - (kb.embedding <=> query_embedding) AS similarity,
+            kb.token_count,
+            row_number() OVER (
+                PARTITION BY kb.sub_agent_id
+                ORDER BY kb.embedding <=> query_embedding
+            ) AS rank
+        FROM knowledge_base kb
+        WHERE kb.sub_agent_id = ANY(p_sub_agent_ids)
+            AND 1 - (kb.embedding <=> query_embedding) > match_threshold
+    ) ranked
+    WHERE ranked.rank <= match_count
+    ORDER BY ranked.sub_agent_id, ranked.rank;
+$$;
+
+-- Backend only (service role)
+REVOKE ALL ON FUNCTION public.search_sub_agent_knowledge_batch(vector, UUID[], FLOAT, INT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.search_sub_agent_knowledge_batch(vector, UUID[], FLOAT, INT) TO service_role;
+
+SELECT 'knowledge_base.token_count added!' as status;